@@ -0,0 +1,27 @@
+"""
+Server entry point: python -m api (from the backend folder)
+Uvicorn gets the app by import string, so every worker imports
+api.openai_server exactly once and this launcher builds none of its
+singletons (limiters, caches, write buffers).
+"""
+
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import SERVER_WORKERS
+
+HOST = "0.0.0.0"
+PORT = 8090
+
+
+def run_server(workers: int = SERVER_WORKERS):
+    """Run the API server; with workers > 1, caches, sessions and run leases go through shared state"""
+    import uvicorn
+    uvicorn.run("api.openai_server:app", host=HOST, port=PORT, workers=max(workers, 1))
+
+
+if __name__ == "__main__":
+    run_server()
@@ -15,29 +15,51 @@ from concurrent.futures import ThreadPoolExecutor
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
-from src.data.tools import extract_ticker, normalize_ticker, is_crypto
-from src.db import get_mongo_client
-from src.graph import app as graph_app
+from src.config import (
+    WORKER_THREADS, STREAM_TOKENS, BATCH_MAX_CONCURRENCY, BATCH_MAX_TICKERS,
+    SERVER_WORKERS, SHARED_RUN_LEASE_TTL, SHARED_POLL_INTERVAL, PRELOAD_ON_STARTUP,
+    LOCAL_INDICATOR_PERIOD
+)
+from src.agents.base_agent import set_token_sink, reset_token_sink
+from src.data.tools import (
+    extract_ticker, normalize_ticker, is_crypto, prefetch_price_history, get_market_data_cache
+)
+from src.data.providers import (
+    aclose_http_clients, get_rate_limiter_stats, request_priority, PRIORITY_LOW
+)
+from src.db import (
+    get_mongo_client, get_analysis_cache, get_llm_cache, get_session_store, derive_session_id,
+    get_shared_state, WORKER_ID, write_buffer_stats, flush_write_buffers
+)
+from src.graph import get_app as get_graph_app, make_initial_state, preload as preload_graph
+from src.tracing import span, get_tracer
 
 # MongoDB
 mongo = get_mongo_client()
 
-# Session context storage (for follow-up questions)
-# In production, use Redis or database for multi-user support
-session_context = {
-    "last_ticker": None,
-    "last_report": None,
-    "last_analysis_data": {}  # Stores all analysis results for context
-}
+# Finished-report cache (memory + MongoDB) in front of the graph
+analysis_cache = get_analysis_cache()
+_background_tasks = set()
+
+# In-flight pipeline runs by ticker; concurrent requests attach instead of re-running.
+# Across workers, a lease in shared state lets one worker run a ticker while the others wait
+_inflight_runs = {}
+shared_state = get_shared_state()
+
+# Last analysis per conversation (for follow-up questions)
+sessions = get_session_store()
+
+# History periods one pipeline run reads: stock data / fingerprint, technical score, local indicators
+BATCH_HISTORY_PERIODS = ("1mo", "3mo", LOCAL_INDICATOR_PERIOD)
 
 # FastAPI app
 app = FastAPI(title="AI Stock Analyst API", version="1.0.0")
@@ -52,6 +74,36 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def configure_executor():
+    """Size the default executor used by asyncio.to_thread for agent/data calls"""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="analysis")
+    )
+    if PRELOAD_ON_STARTUP:
+        # Graph, agents, LLM SDK and yfinance load while the server already accepts requests
+        task = asyncio.create_task(preload_in_background())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def preload_in_background():
+    try:
+        await asyncio.to_thread(preload_graph)
+        print("[Startup] Graph, agents and LLM client preloaded")
+    except Exception as e:
+        print(f"[Startup] Preload failed, loading on first request instead: {e}")
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Close pooled provider connections and write out buffered MongoDB writes"""
+    await aclose_http_clients()
+    written = await asyncio.to_thread(flush_write_buffers)
+    if written:
+        print(f"[Shutdown] Flushed {written} buffered MongoDB writes")
+
+
 # ============ Pydantic Models (OpenAI format) ============
 
 class Message(BaseModel):
@@ -64,6 +116,12 @@ class ChatCompletionRequest(BaseModel):
     stream: bool = False
     temperature: float = 0.7
     max_tokens: Optional[int] = None
+    user: Optional[str] = None
+    conversation_id: Optional[str] = None
+
+class BatchAnalysisRequest(BaseModel):
+    tickers: List[str]
+    max_concurrency: Optional[int] = None
 
 class ModelInfo(BaseModel):
     id: str
@@ -74,6 +132,17 @@ class ModelInfo(BaseModel):
 
 # ============ Helper Functions ============
 
+_chat_agent = None
+
+def get_chat_agent():
+    """Get or create the follow-up chat agent"""
+    global _chat_agent
+    if _chat_agent is None:
+        from src.agents.base_agent import BaseAgent
+        _chat_agent = BaseAgent("ChatAssistant")
+    return _chat_agent
+
+
 def safe_get(result, key: str, default: str = "") -> str:
     """Safely get a value from result which could be dict or string"""
     if isinstance(result, dict):
@@ -83,6 +152,364 @@ def safe_get(result, key: str, default: str = "") -> str:
     return default
 
 
+class TokenStreamMux:
+    """
+    Token sink that serializes concurrently streaming agents into one SSE stream
+    
+    One agent streams live at a time; output of agents running in parallel
+    is buffered and flushed as soon as the live agent finishes.
+    """
+    
+    def __init__(self, events: asyncio.Queue, show_agent_names: bool = True):
+        self.events = events
+        self.show_agent_names = show_agent_names
+        self._waiting = []     # stream ids in start order
+        self._buffers = {}     # stream id -> buffered text
+        self._finished = set()
+        self._agent_streams = set()
+        self._live = None
+        self._next_id = 0
+    
+    def start(self, agent_name: Optional[str]) -> int:
+        stream_id = self._next_id
+        self._next_id += 1
+        header = f"\n\n> ✍️ *{agent_name}*\n\n" if agent_name and self.show_agent_names else ""
+        if agent_name:
+            self._agent_streams.add(stream_id)
+        self._buffers[stream_id] = [header]
+        self._waiting.append(stream_id)
+        self._advance()
+        return stream_id
+    
+    def push(self, stream_id: int, text: str):
+        if stream_id == self._live:
+            self.events.put_nowait(("token", text))
+        else:
+            self._buffers[stream_id].append(text)
+    
+    def end(self, stream_id: int):
+        if stream_id in self._agent_streams:
+            self._agent_streams.discard(stream_id)
+            self.push(stream_id, "\n\n")
+        self._finished.add(stream_id)
+        if stream_id == self._live:
+            self._live = None
+            self._advance()
+    
+    def emit(self, text: str):
+        """Queue a complete message (e.g. a phase banner) behind the live stream"""
+        stream_id = self.start(None)
+        self.push(stream_id, text)
+        self.end(stream_id)
+    
+    def _advance(self):
+        while self._live is None and self._waiting:
+            stream_id = self._waiting.pop(0)
+            buffered = "".join(self._buffers.pop(stream_id))
+            if buffered:
+                self.events.put_nowait(("token", buffered))
+            if stream_id in self._finished:
+                self._finished.discard(stream_id)
+                continue
+            self._live = stream_id
+
+
+async def run_with_token_sink(events: asyncio.Queue, mux: Optional[TokenStreamMux], work):
+    """Run work() with `mux` as the agents' token sink, then signal completion on `events`"""
+    token = set_token_sink(mux) if mux else None
+    try:
+        await work()
+        events.put_nowait(("done", None))
+    except Exception as e:
+        events.put_nowait(("error", e))
+    finally:
+        if token:
+            reset_token_sink(token)
+
+
+def report_tail(report: str) -> str:
+    """Part of the report not already streamed live by the agents (the disclaimer)"""
+    index = report.find("\n## ⚠️ Disclaimer")
+    return report[index:] if index >= 0 else ""
+
+
+async def refresh_analysis(ticker: str, crypto_flag: bool):
+    """
+    Re-run the pipeline for a stale cached ticker without blocking the caller
+    Goes through get_or_start_run, so it joins a live run of the ticker (in this
+    worker, or another worker's via the run lease) instead of running the graph twice.
+    The run stores its report in the analysis cache.
+    """
+    try:
+        async with span("analysis_refresh", "pipeline", ticker=ticker, crypto=crypto_flag):
+            fingerprint = await asyncio.to_thread(analysis_cache.fingerprint, ticker)
+            await get_or_start_run(ticker, crypto_flag, fingerprint).result()
+        print(f"[AnalysisCache] Refreshed {ticker}")
+    except Exception as e:
+        print(f"[AnalysisCache] Refresh failed for {ticker}: {e}")
+    finally:
+        analysis_cache.finish_refresh(ticker)
+
+
+def schedule_refresh(ticker: str, crypto_flag: bool):
+    """Start a background refresh unless one is already running for ticker"""
+    if not analysis_cache.start_refresh(ticker):
+        return
+    task = asyncio.create_task(refresh_analysis(ticker, crypto_flag))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def format_cached_notice(cached: Dict) -> str:
+    """Banner shown when a cached report is served"""
+    minutes = int(cached["age"] // 60)
+    return f"⚡ ใช้ผลวิเคราะห์ล่าสุด **{cached['ticker']}** (เมื่อ {minutes} นาทีที่แล้ว) — **{cached['decision']}**\n\n---\n\n"
+
+
+class AnalysisRun:
+    """
+    One pipeline run for a ticker, shared by every request that arrives while it is in flight
+    
+    Streamed output is recorded as text chunks: late subscribers replay what they
+    missed, then follow live. The run is cancelled once nobody is listening.
+    If another worker holds the ticker's run lease, the run waits for that
+    worker's report in the shared analysis cache instead of running the graph.
+    """
+    
+    def __init__(self, ticker: str, crypto_flag: bool, fingerprint: str):
+        self.ticker = ticker
+        self.crypto_flag = crypto_flag
+        self.fingerprint = fingerprint
+        self.chunks: List[str] = []
+        self.state: Optional[Dict[str, Any]] = None   # final graph state (local runs only)
+        self.outcome: Optional[Dict[str, Any]] = None  # result once finished successfully
+        self.done = False
+        self._subscribers = set()
+        self._waiters = 0
+        self._task = asyncio.create_task(self._traced_produce())
+        self._task.add_done_callback(self._finished)
+    
+    def publish(self, text: str):
+        """Record a chunk and fan it out to live subscribers"""
+        self.chunks.append(text)
+        for queue in self._subscribers:
+            queue.put_nowait(text)
+    
+    async def stream(self):
+        """Yield every chunk of the run, from the beginning"""
+        queue = asyncio.Queue()
+        for text in self.chunks:
+            queue.put_nowait(text)
+        if self.done:
+            queue.put_nowait(None)
+        self._subscribers.add(queue)
+        try:
+            while (text := await queue.get()) is not None:
+                yield text
+        finally:
+            self._subscribers.discard(queue)
+            self._cancel_if_abandoned()
+    
+    async def result(self) -> Dict[str, Any]:
+        """Wait for the run and return its ticker, decision and report"""
+        self._waiters += 1
+        try:
+            return await asyncio.shield(self._task)
+        finally:
+            self._waiters -= 1
+            self._cancel_if_abandoned()
+    
+    def _cancel_if_abandoned(self):
+        if not self.done and not self._subscribers and not self._waiters:
+            self._task.cancel()
+    
+    def _finished(self, task: asyncio.Task):
+        self.done = True
+        if _inflight_runs.get(self.ticker) is self:
+            del _inflight_runs[self.ticker]
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            print(f"[AnalysisRun] {self.ticker} failed: {task.exception()}")
+        else:
+            self.outcome = task.result()
+    
+    async def _traced_produce(self) -> Dict[str, Any]:
+        async with span("analysis", "pipeline", ticker=self.ticker, crypto=self.crypto_flag):
+            lease = f"run:{self.ticker}"
+            while not await asyncio.to_thread(shared_state.acquire, lease, SHARED_RUN_LEASE_TTL):
+                result = await self._wait_for_peer(lease)
+                if result is not None:
+                    return result
+            heartbeat = asyncio.create_task(self._renew_lease(lease))
+            try:
+                return await self._produce()
+            finally:
+                heartbeat.cancel()
+                await asyncio.to_thread(shared_state.release, lease)
+    
+    async def _renew_lease(self, lease: str):
+        """Keep the run lease while the graph runs longer than its TTL"""
+        while True:
+            await asyncio.sleep(SHARED_RUN_LEASE_TTL / 3)
+            await asyncio.to_thread(shared_state.acquire, lease, SHARED_RUN_LEASE_TTL)
+    
+    async def _wait_for_peer(self, lease: str) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the worker holding the lease to publish its analysis
+        
+        Returns:
+            the peer's result, or None once the lease is free without one (take over)
+        """
+        with span("analysis_wait", "pipeline", ticker=self.ticker):
+            self.publish(f"⏳ กำลังรอผลวิเคราะห์ **{self.ticker}** ที่กำลังประมวลผลอยู่...\n\n")
+            while await asyncio.to_thread(shared_state.get, lease) is not None:
+                await asyncio.sleep(SHARED_POLL_INTERVAL)
+            cached, _ = await analysis_cache.aget(self.ticker)
+        if not cached:
+            return None
+        self.publish(cached["report"])
+        return {"ticker": self.ticker, "decision": cached["decision"], "report": cached["report"]}
+    
+    async def _produce(self) -> Dict[str, Any]:
+        ticker = self.ticker
+        crypto_flag = self.crypto_flag
+        fingerprint = self.fingerprint
+        report = ""
+        
+        # Initialize State (node updates are folded in as they stream)
+        initial_state = make_initial_state(ticker, crypto_flag)
+        final_state = dict(initial_state)
+        
+        if crypto_flag:
+            self.publish(f"💰 เริ่มวิเคราะห์ Crypto **{ticker}** (LangGraph)...\n\n")
+            self.publish("📊 **Phase 1:** กำลังรวบรวมข้อมูล Crypto...\n")
+        else:
+            self.publish(f"🔍 เริ่มวิเคราะห์หุ้น **{ticker}** (LangGraph)...\n\n")
+            self.publish("📊 **Phase 1:** กำลังรวบรวมข้อมูล...\n")
+
+        current_phase = 1
+        final_decision = "N/A"
+        branches_done = set()  # Debate and risk branches run in parallel; PM starts after both
+
+        # Graph events and agent tokens share one queue; in streaming mode the mux
+        # also orders phase banners behind whichever agent is streaming live.
+        events = asyncio.Queue()
+        mux = TokenStreamMux(events) if STREAM_TOKENS else None
+        pending = []
+
+        def say(text: str):
+            if mux:
+                mux.emit(text)
+            else:
+                pending.append(text)
+
+        async def pump_graph():
+            async for event in get_graph_app().astream(initial_state):
+                events.put_nowait(("graph", event))
+
+        task = asyncio.create_task(run_with_token_sink(events, mux, pump_graph))
+
+        try:
+            while True:
+                kind, event = await events.get()
+                if kind == "token":
+                    self.publish(event)
+                    continue
+                if kind == "error":
+                    raise event
+                if kind == "done":
+                    # Flush anything emitted while handling the last graph event
+                    while not events.empty():
+                        _, text = events.get_nowait()
+                        self.publish(text)
+                    break
+
+                for node_name, output in event.items():
+                    if isinstance(output, dict):
+                        final_state.update(output)
+                    
+                    # STOCK FLOW EVENTS
+                    if node_name == "run_analysts_parallel":
+                        say("✅ รวบรวมข้อมูลเสร็จสิ้น\n\n")
+                        say("🐂🐻 **Phase 2:** Bull vs Bear Debate + ⚠️ Risk Analysis (parallel)...\n")
+                    
+                    elif node_name == "researchers":
+                        say("✅ Bull vs Bear เสร็จสิ้น\n\n")
+                        say("⚖️ **Phase 3:** Moderating debate...\n")
+                    
+                    elif node_name in ("debate_moderator", "risk_judge"):
+                        if node_name == "debate_moderator":
+                            say("✅ Moderation เสร็จสิ้น\n\n")
+                        else:
+                            say("✅ Risk Analysis เสร็จสิ้น\n\n")
+                        branches_done.add(node_name)
+                        if branches_done == {"debate_moderator", "risk_judge"}:
+                            say("💼 **Phase 5:** Final Decision...\n")
+                    
+                    elif node_name == "portfolio_manager":
+                        decision = output.get("final_decision", {}).get("decision", "HOLD")
+                        final_decision = decision
+                        say(f"✅ **คำตัดสินสุดท้าย: {decision}**\n\n")
+                        say("---\n\n")
+                    
+                    elif node_name == "report_builder":
+                        report = output.get("final_report", "")
+                        
+                        # Agent sections were already streamed live; otherwise send the full report
+                        say(report_tail(report) if mux else report)
+                        
+                        # Save to cache + MongoDB
+                        await analysis_cache.astore(ticker, fingerprint, report, final_decision)
+
+                    # CRYPTO FLOW EVENTS
+                    elif node_name == "crypto_analyst":
+                        say("✅ รวบรวมข้อมูลเสร็จสิ้น\n\n")
+                        say("📰 **Phase 2:** วิเคราะห์ข่าวและ Social...\n")
+                    
+                    elif node_name == "crypto_enrichment":
+                         say("✅ วิเคราะห์ข่าวและ Social เสร็จสิ้น\n\n")
+                    
+                    elif node_name == "crypto_report":
+                        report = output.get("final_report", "")
+                        decision_data = output.get("final_decision", {})
+                        decision = decision_data.get("decision", "NEUTRAL")
+                        final_decision = decision
+                        
+                        say(f"✅ **สัญญาณ: {decision}**\n\n")
+                        say("---\n\n")
+                        
+                        say(report_tail(report) if mux else report)
+                        
+                        await analysis_cache.astore(ticker, fingerprint, report, decision)
+
+                for text in pending:
+                    self.publish(text)
+                pending.clear()
+
+        except Exception as e:
+            self.publish(f"\n\n❌ เกิดข้อผิดพลาด: {str(e)}")
+            raise
+        finally:
+            task.cancel()
+        
+        self.state = final_state
+        return {"ticker": ticker, "decision": final_decision, "report": report}
+
+
+def get_or_start_run(ticker: str, crypto_flag: bool, fingerprint: str) -> AnalysisRun:
+    """Attach to the in-flight run for ticker, or start one (single-flight)"""
+    run = _inflight_runs.get(ticker)
+    if run is None or run.done:
+        run = AnalysisRun(ticker, crypto_flag, fingerprint)
+        _inflight_runs[ticker] = run
+    else:
+        print(f"[AnalysisRun] Joining in-flight analysis of {ticker}")
+    return run
+
+
 # ============ Endpoints ============
 
 @app.get("/")
@@ -107,7 +534,9 @@ async def list_models():
 
 
 @app.post("/v1/chat/completions")
-async def chat_completions(request: ChatCompletionRequest):
+async def chat_completions(request: ChatCompletionRequest,
+                           x_conversation_id: Optional[str] = Header(None),
+                           chatui_conversation_id: Optional[str] = Header(None, alias="ChatUI-Conversation-ID")):
     """Chat completions endpoint (OpenAI format)"""
     
     # Get last user message
@@ -120,17 +549,25 @@ async def chat_completions(request: ChatCompletionRequest):
     if not user_message:
         raise HTTPException(status_code=400, detail="No user message found")
     
+    # Follow-up context is kept per conversation (Chat-UI sends ChatUI-Conversation-ID);
+    # requests that identify no conversation get none
+    session_id = derive_session_id(
+        [(msg.role, msg.content) for msg in request.messages],
+        explicit=chatui_conversation_id or x_conversation_id or request.conversation_id,
+        user=request.user,
+    )
+    
     # Extract ticker from message
     ticker = extract_ticker(user_message)
     
     if request.stream:
         return StreamingResponse(
-            stream_analysis(ticker, user_message, request.model),
+            stream_analysis(ticker, user_message, request.model, session_id),
             media_type="text/event-stream"
         )
     else:
         # Non-streaming response
-        response_text = await run_analysis(ticker, user_message, request.model)
+        response_text = await run_analysis(ticker, user_message, request.model, session_id)
         return {
             "id": f"chatcmpl-{datetime.now().strftime('%Y%m%d%H%M%S')}",
             "object": "chat.completion",
@@ -154,14 +591,86 @@ async def chat_completions(request: ChatCompletionRequest):
         }
 
 
-async def stream_analysis(ticker: str, user_message: str, model: str):
+@app.get("/metrics")
+async def metrics(format: str = "prometheus"):
+    """Span timings (p50/p95, queue time, cache hits) for nodes, agents, LLM and data calls"""
+    if format == "json":
+        return {
+            "spans": get_tracer().metrics(),
+            "market_data_cache": get_market_data_cache().stats(),
+            "llm_cache": get_llm_cache().stats(),
+            "write_buffer": write_buffer_stats(),
+            "providers": get_rate_limiter_stats(),
+            "worker": WORKER_ID,
+        }
+    
+    cache_stats = get_market_data_cache().stats()
+    lines = [get_tracer().prometheus(), "# TYPE market_data_cache gauge"]
+    for key in ("hits", "misses", "coalesced", "hit_rate", "entries", "evictions"):
+        lines.append(f'market_data_cache{{stat="{key}"}} {cache_stats[key]}')
+    llm_stats = get_llm_cache().stats()
+    lines.append("# TYPE llm_cache gauge")
+    for key in ("hits", "misses", "stores", "hit_rate", "entries"):
+        lines.append(f'llm_cache{{stat="{key}"}} {llm_stats[key]}')
+    lines.append("# TYPE write_buffer gauge")
+    for name, buffer_stats in write_buffer_stats().items():
+        for key in ("depth", "queued", "written", "dropped", "errors", "retries", "last_flush_ms", "avg_flush_ms", "max_flush_ms"):
+            lines.append(f'write_buffer{{buffer="{name}",stat="{key}"}} {buffer_stats[key]}')
+    return PlainTextResponse("\n".join(lines) + "\n")
+
+
+@app.get("/v1/providers/quota")
+async def provider_quota():
+    """Rate-limit budget and queue metrics for external data providers"""
+    return {"providers": get_rate_limiter_stats()}
+
+
+@app.post("/v1/analyses/batch")
+async def batch_analyses(request: BatchAnalysisRequest):
+    """Analyze a list of tickers; streams one SSE event per ticker as it completes"""
+    
+    tickers = list(dict.fromkeys(normalize_ticker(t) for t in request.tickers if t and t.strip()))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+    if len(tickers) > BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_TICKERS} tickers per batch")
+    
+    max_concurrency = max(1, min(request.max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    
+    return StreamingResponse(
+        stream_batch(tickers, max_concurrency),
+        media_type="text/event-stream"
+    )
+
+
+@app.get("/v1/analyses/search")
+async def search_analyses(q: str = "", ticker: Optional[str] = None, decision: Optional[str] = None,
+                          date_from: Optional[str] = None, date_to: Optional[str] = None,
+                          page: int = 1, page_size: int = 10):
+    """Full-text search over stored analyses (Thai or English), ranked and paginated"""
+    if not q.strip() and not (ticker or decision or date_from or date_to):
+        raise HTTPException(status_code=400, detail="Provide a query or at least one filter")
+    try:
+        for value in (date_from, date_to):
+            if value:
+                datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be ISO format (YYYY-MM-DD)")
+    
+    return await mongo.asearch_analyses(q, limit=max(1, min(page_size, 50)), page=max(1, page),
+                                        ticker=normalize_ticker(ticker) if ticker else None,
+                                        decision=decision, date_from=date_from, date_to=date_to)
+
+
+async def stream_analysis(ticker: str, user_message: str, model: str, session_id: Optional[str]):
     """Stream the analysis response using LangGraph"""
     
     if not ticker:
-        # No ticker found - check if we have context for follow-up questions
-        if session_context["last_ticker"] and session_context["last_report"]:
+        # No ticker found - check if this conversation has context for follow-up questions
+        session = await sessions.aget(session_id) if session_id else None
+        if session and session["report"]:
             # Use LLM to answer follow-up questions based on context
-            async for chunk in stream_followup_chat(user_message):
+            async for chunk in stream_followup_chat(user_message, session):
                 yield chunk
             return
         else:
@@ -172,126 +681,59 @@ async def stream_analysis(ticker: str, user_message: str, model: str):
     ticker = normalize_ticker(ticker)
     crypto_flag = is_crypto(ticker)
     
-    # Initialize State
-    initial_state = {
-        "ticker": ticker, 
-        "is_crypto": crypto_flag,
-        "market_data": {}, "fundamentals_data": {}, "news_data": {}, 
-        "social_data": {}, "risk_data": {}, "crypto_data": {},
-        "bull_analysis": {}, "bear_analysis": {}, 
-        "debate_outcome": {}, "risk_judgment": {}, "final_decision": {},
-        "final_report": ""
-    }
+    # Serve a fresh cached report when the market data hasn't moved
+    cached, fingerprint = await analysis_cache.aget(ticker)
+    if cached:
+        if cached["status"] == "stale":
+            schedule_refresh(ticker, crypto_flag)
+        if session_id:
+            await sessions.asave(session_id, ticker, cached["report"], cached["decision"])
+        yield format_sse_chunk(format_cached_notice(cached))
+        yield format_sse_chunk(cached["report"])
+        yield format_sse_done()
+        return
     
-    if crypto_flag:
-        yield format_sse_chunk(f"💰 เริ่มวิเคราะห์ Crypto **{ticker}** (LangGraph)...\n\n")
-        yield format_sse_chunk("📊 **Phase 1:** กำลังรวบรวมข้อมูล Crypto...\n")
-    else:
-        yield format_sse_chunk(f"🔍 เริ่มวิเคราะห์หุ้น **{ticker}** (LangGraph)...\n\n")
-        yield format_sse_chunk("📊 **Phase 1:** กำลังรวบรวมข้อมูล...\n")
-
-    current_phase = 1
-
-    try:
-        # Stream events from LangGraph
-        async for event in graph_app.astream(initial_state):
-            for node_name, output in event.items():
-                
-                # STOCK FLOW EVENTS
-                if node_name == "run_analysts_parallel":
-                    yield format_sse_chunk("✅ รวบรวมข้อมูลเสร็จสิ้น\n\n")
-                    yield format_sse_chunk("🐂🐻 **Phase 2:** Bull vs Bear Debate...\n")
-                
-                elif node_name == "researchers":
-                    yield format_sse_chunk("✅ Bull vs Bear เสร็จสิ้น\n\n")
-                    yield format_sse_chunk("⚖️ **Phase 3:** Moderating debate...\n")
-                
-                elif node_name == "debate_moderator":
-                    yield format_sse_chunk("✅ Moderation เสร็จสิ้น\n\n")
-                    yield format_sse_chunk("⚠️ **Phase 4:** Risk Analysis...\n")
-                
-                elif node_name == "risk_judge":
-                    yield format_sse_chunk("✅ Risk Analysis เสร็จสิ้น\n\n")
-                    yield format_sse_chunk("💼 **Phase 5:** Final Decision...\n")
-                
-                elif node_name == "portfolio_manager":
-                    decision = output.get("final_decision", {}).get("decision", "HOLD")
-                    yield format_sse_chunk(f"✅ **คำตัดสินสุดท้าย: {decision}**\n\n")
-                    yield format_sse_chunk("---\n\n")
-                
-                elif node_name == "report_builder":
-                    report = output.get("final_report", "")
-                    
-                    # Store context
-                    session_context["last_ticker"] = ticker
-                    session_context["last_report"] = report
-                    # Note: We don't have full state access here easily in astream loop unless we accumulate it,
-                    # but for now we trust the report generation. 
-                    # If we need 'last_analysis_data' for follow-up, we might need to grab it from the final state if returned,
-                    # or just rely on 'report' being sufficient for now to save complexity.
-                    
-                    # Stream report chunks
-                    chunk_size = 500
-                    for i in range(0, len(report), chunk_size):
-                        yield format_sse_chunk(report[i:i+chunk_size])
-                        await asyncio.sleep(0.05)
-                        
-                    # Save to MongoDB
-                    if mongo.is_connected():
-                         # We need final decision string
-                         # We can parse it or rely on valid state if we had it. 
-                         # For now, let's assume report building succeeded.
-                         mongo.save_analysis(ticker=ticker, final_decision="N/A", report_content=report)
-
-                # CRYPTO FLOW EVENTS
-                elif node_name == "crypto_analyst":
-                    yield format_sse_chunk("✅ รวบรวมข้อมูลเสร็จสิ้น\n\n")
-                    yield format_sse_chunk("📰 **Phase 2:** วิเคราะห์ข่าวและ Social...\n")
-                
-                elif node_name == "crypto_enrichment":
-                     yield format_sse_chunk("✅ วิเคราะห์ข่าวและ Social เสร็จสิ้น\n\n")
-                
-                elif node_name == "crypto_report":
-                    report = output.get("final_report", "")
-                    decision_data = output.get("final_decision", {})
-                    decision = decision_data.get("decision", "NEUTRAL")
-                    
-                    yield format_sse_chunk(f"✅ **สัญญาณ: {decision}**\n\n")
-                    yield format_sse_chunk("---\n\n")
-                    
-                    # Stream report chunks
-                    chunk_size = 500
-                    for i in range(0, len(report), chunk_size):
-                        yield format_sse_chunk(report[i:i+chunk_size])
-                        await asyncio.sleep(0.05)
-                        
-                    if mongo.is_connected():
-                        mongo.save_analysis(ticker=ticker, final_decision=decision, report_content=report)
-
-                    session_context["last_ticker"] = ticker
-                    session_context["last_report"] = report
-
-    except Exception as e:
-        yield format_sse_chunk(f"\n\n❌ เกิดข้อผิดพลาด: {str(e)}")
+    run = get_or_start_run(ticker, crypto_flag, fingerprint)
+    async for text in run.stream():
+        yield format_sse_chunk(text)
+    
+    if run.outcome and session_id:
+        await sessions.asave(session_id, ticker, run.outcome["report"], run.outcome["decision"], run.state)
     
     yield format_sse_done()
 
 
-async def stream_followup_chat(user_message: str):
-    """Stream follow-up chat response based on previous analysis context"""
-    
-    # Simple fallback using just the report as context since we might not have full state dict easily available
-    # after the refactor to simple astream. 
-    # To improve: we could store the final state in a global/cache.
+def format_decision_context(state: Optional[Dict[str, Any]]) -> str:
+    """Scalar fields of the final decision and risk judgment from a saved graph state"""
+    if not state:
+        return ""
+    lines = []
+    for key in ("final_decision", "risk_judgment", "debate_outcome"):
+        fields = state.get(key)
+        if not isinstance(fields, dict):
+            continue
+        values = {k: v for k, v in fields.items()
+                  if isinstance(v, (str, int, float)) and k != "report_section" and len(str(v)) <= 200}
+        if values:
+            lines.append(f"- {key}: " + ", ".join(f"{k}={v}" for k, v in values.items()))
+    return "\n".join(lines)
+
+
+async def stream_followup_chat(user_message: str, session: Dict[str, Any]):
+    """Stream follow-up chat response based on the conversation's last analysis"""
     
-    ticker = session_context["last_ticker"]
-    report = session_context["last_report"]
+    ticker = session["ticker"]
+    report = session["report"]
+    decision_context = format_decision_context(session.get("state"))
+    if decision_context:
+        decision_context = f"\nผลการตัดสินใจของทีม:\n{decision_context}\n"
     
     yield format_sse_chunk(f"💬 **กำลังตอบคำถามเกี่ยวกับ {ticker}...**\n\n")
     
     system_prompt = f"""คุณเป็นผู้ช่วยนักวิเคราะห์หุ้น AI ที่เพิ่งวิเคราะห์หุ้น {ticker} เสร็จ
 ข้อมูลในรายงานล่าสุด:
 {report}
+{decision_context}
 
 หน้าที่ของคุณ:
 - ตอบคำถามโดยอ้างอิงจากข้อมูลการวิเคราะห์ที่มี
@@ -299,65 +741,121 @@ async def stream_followup_chat(user_message: str):
 - ตอบเป็นภาษาไทย กระชับ ได้ใจความ
 """
     
-    loop = asyncio.get_event_loop()
+    events = asyncio.Queue()
+    mux = TokenStreamMux(events, show_agent_names=False) if STREAM_TOKENS else None
+
+    async def answer():
+        # Shared agent - uses the pooled async LLM client
+        response = await get_chat_agent().acall_llm(system_prompt, user_message)
+        if not mux:
+            events.put_nowait(("token", response))
+
+    task = asyncio.create_task(run_with_token_sink(events, mux, answer))
+
     try:
-        # Use base_agent's LLM call
-        from src.agents.base_agent import BaseAgent
-        # Initializing a temporary agent for chat
-        chat_agent = BaseAgent("ChatAssistant")
-        
-        # Run in executor to avoid blocking
-        response = await loop.run_in_executor(
-            None, chat_agent.call_llm, system_prompt, user_message
-        )
-        
-        # Stream response
-        chunk_size = 200
-        for i in range(0, len(response), chunk_size):
-            yield format_sse_chunk(response[i:i+chunk_size])
-            await asyncio.sleep(0.03)
+        while True:
+            kind, event = await events.get()
+            if kind == "token":
+                yield format_sse_chunk(event)
+            elif kind == "error":
+                raise event
+            else:
+                break
             
     except Exception as e:
         yield format_sse_chunk(f"\n\n❌ เกิดข้อผิดพลาด: {str(e)}")
+    finally:
+        task.cancel()
     
     yield format_sse_done()
 
 
-async def run_analysis(ticker: str, user_message: str, model: str) -> str:
+async def analyze_ticker(ticker: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze one normalized ticker, serving the analysis cache when fresh
+    
+    Args:
+        ticker: Normalized ticker
+        session_id: Conversation to record the analysis in for follow-ups (optional)
+    
+    Returns:
+        dict with ticker, decision, report and cached flag
+    """
+    crypto_flag = is_crypto(ticker)
+    
+    cached, fingerprint = await analysis_cache.aget(ticker)
+    if cached:
+        if cached["status"] == "stale":
+            schedule_refresh(ticker, crypto_flag)
+        if session_id:
+            await sessions.asave(session_id, ticker, cached["report"], cached["decision"])
+        return {"ticker": ticker, "decision": cached["decision"], "report": cached["report"], "cached": True}
+    
+    # Shares the run with any concurrent request for the same ticker
+    run = get_or_start_run(ticker, crypto_flag, fingerprint)
+    result = await run.result()
+    if session_id:
+        await sessions.asave(session_id, ticker, result["report"], result["decision"], run.state)
+    return {**result, "report": result["report"] or "No report generated.", "cached": False}
+
+
+async def run_analysis(ticker: str, user_message: str, model: str, session_id: Optional[str] = None) -> str:
     """Run full analysis (non-streaming)"""
     
     if not ticker:
         return "ไม่พบ ticker ในข้อความ กรุณาระบุหุ้นที่ต้องการวิเคราะห์ เช่น 'วิเคราะห์ AAPL'"
     
     ticker = normalize_ticker(ticker)
-    crypto_flag = is_crypto(ticker)
-    
-    initial_state = {
-        "ticker": ticker, 
-        "is_crypto": crypto_flag,
-        "market_data": {}, "fundamentals_data": {}, "news_data": {}, 
-        "social_data": {}, "risk_data": {}, "crypto_data": {},
-        "bull_analysis": {}, "bear_analysis": {}, 
-        "debate_outcome": {}, "risk_judgment": {}, "final_decision": {},
-        "final_report": ""
-    }
     
     try:
-        # Use ainvoke to get final state
-        final_state = await graph_app.ainvoke(initial_state)
-        report = final_state.get("final_report", "No report generated.")
-        
-        decision = final_state.get("final_decision", {}).get("decision", "N/A")
-        
-        if mongo.is_connected():
-            mongo.save_analysis(ticker=ticker, final_decision=decision, report_content=report)
-            
-        return report
+        result = await analyze_ticker(ticker, session_id)
+        return result["report"]
         
     except Exception as e:
         return f"❌ เกิดข้อผิดพลาด: {str(e)}"
 
 
+async def stream_batch(tickers: List[str], max_concurrency: int):
+    """Analyze a watchlist and stream each ticker's result as it completes"""
+    
+    # One bulk OHLCV download of the longest period the pipeline reads seeds the
+    # market data cache for every ticker and period; the entries stay pinned until
+    # the batch ends, however long the later tickers queue behind the semaphore
+    cache = get_market_data_cache()
+    pinned = [cache.make_key(t, "history", p) for t in tickers for p in BATCH_HISTORY_PERIODS]
+    cache.pin(pinned)
+    try:
+        loaded = await asyncio.to_thread(prefetch_price_history, tickers, "1mo", BATCH_HISTORY_PERIODS)
+    except BaseException:
+        cache.unpin(pinned)
+        raise
+    print(f"[Batch] Prefetched prices for {len(loaded)}/{len(tickers)} tickers")
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run_one(ticker: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                # Watchlist calls queue behind interactive ones for provider quota
+                with request_priority(PRIORITY_LOW):
+                    result = await analyze_ticker(ticker)
+                return {**result, "status": "ok"}
+            except Exception as e:
+                return {"ticker": ticker, "status": "error", "error": str(e)}
+    
+    tasks = [asyncio.create_task(run_one(t)) for t in tickers]
+    try:
+        for completed in asyncio.as_completed(tasks):
+            result = await completed
+            yield f"data: {json.dumps(result, ensure_ascii=False)}\n\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+        cache.unpin(pinned)
+    
+    yield "data: [DONE]\n\n"
+
+
 def format_sse_chunk(content: str) -> str:
     """Format content as SSE data chunk"""
     data = {
@@ -395,5 +893,12 @@ def format_sse_done() -> str:
 
 
 if __name__ == "__main__":
+    if SERVER_WORKERS > 1:
+        # Run as __main__, this module would be imported a second time in every worker
+        # (once as __mp_main__, once as api.openai_server); start from `python -m api` instead
+        import subprocess
+        print("[Server] SERVER_WORKERS > 1: starting via `python -m api`")
+        sys.exit(subprocess.call([sys.executable, "-m", "api"],
+                                 cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8090)
@@ -12,5 +12,5 @@ echo.
 echo Chat-UI should connect to: http://localhost:8080/v1
 echo.
 
-python api/openai_server.py
+python -m api
 pause
@@ -0,0 +1,51 @@
+"""
+Benchmarks package - Offline end-to-end performance harness
+Replays recorded (or synthetic) yfinance / Tavily / Finnhub / Alpha Vantage
+responses and a deterministic fake LLM through graph_app, so latency,
+throughput and memory can be compared between changes without network access.
+
+Run from backend/:  python -m benchmarks --help
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+# Must be set before src.config is imported: agents refuse to start without
+# a Gemini key, the fakes emulate the Gemini client, and the OHLCV store
+# and LLM cache must not read or write the real caches.
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+os.environ["LLM_PROVIDER"] = "gemini"
+os.environ["OHLCV_STORE_DIR"] = tempfile.mkdtemp(prefix="bench-ohlcv-")
+atexit.register(shutil.rmtree, os.environ["OHLCV_STORE_DIR"], True)
+# LLM responses are cached in memory only, and dropped with the other caches between cold passes
+os.environ.setdefault("LLM_CACHE_BACKEND", "memory")
+
+from .fixtures import (
+    FixtureSet,
+    synthesize_fixture,
+    record_fixture,
+    save_fixture,
+    load_fixture,
+    FIXTURE_DIR
+)
+from .fakes import FakeLLM, FakeYFinance, FakeHTTPSession, offline_environment
+from .runner import run_benchmark, format_report, save_result, load_result
+
+__all__ = [
+    'FixtureSet',
+    'synthesize_fixture',
+    'record_fixture',
+    'save_fixture',
+    'load_fixture',
+    'FIXTURE_DIR',
+    'FakeLLM',
+    'FakeYFinance',
+    'FakeHTTPSession',
+    'offline_environment',
+    'run_benchmark',
+    'format_report',
+    'save_result',
+    'load_result'
+]
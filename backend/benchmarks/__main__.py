@@ -0,0 +1,90 @@
+"""
+Command line entry point
+
+    python -m benchmarks                          # default offline run
+    python -m benchmarks -c 1 8 32 --llm-latency 1.0 --json out.json
+    python -m benchmarks --baseline out.json      # compare with an earlier run
+    python -m benchmarks record AAPL MSFT         # capture live fixtures (needs network)
+"""
+
+import argparse
+import sys
+
+from benchmarks import (
+    FIXTURE_DIR, record_fixture, save_fixture,
+    run_benchmark, format_report, save_result, load_result
+)
+from benchmarks.runner import DEFAULT_TICKERS, DEFAULT_CONCURRENCY
+
+
+def _record(args) -> int:
+    failed = 0
+    for ticker in args.tickers:
+        try:
+            path = save_fixture(record_fixture(ticker), args.fixture_dir)
+            print(f"[Benchmark] Recorded {ticker} -> {path}")
+        except Exception as e:
+            failed += 1
+            print(f"[Benchmark] Error recording {ticker}: {e}")
+    return 1 if failed else 0
+
+
+def _run(args) -> int:
+    result = run_benchmark(
+        tickers=args.tickers or DEFAULT_TICKERS,
+        concurrency=args.concurrency,
+        rounds=args.rounds,
+        llm_latency=args.llm_latency,
+        llm_chars=args.llm_chars,
+        llm_chunks=args.llm_chunks,
+        llm_chunk_delay=args.llm_chunk_delay,
+        llm_rpm=args.llm_rpm,
+        data_latency=args.data_latency,
+        warm=args.warm,
+        memory=not args.no_memory,
+        warmup=args.warmup,
+        seed=args.seed,
+        fixture_dir=args.fixture_dir,
+        verbose=args.verbose,
+    )
+    baseline = load_result(args.baseline) if args.baseline else None
+    print(format_report(result, baseline))
+    if args.json:
+        save_result(result, args.json)
+        print(f"\n[Benchmark] Saved results to {args.json}")
+    return 1 if any(level["errors"] for level in result["levels"]) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Offline end-to-end benchmark of the analysis graph")
+    parser.add_argument("--fixture-dir", default=FIXTURE_DIR, help="recorded fixtures directory")
+    sub = parser.add_subparsers(dest="command")
+
+    record = sub.add_parser("record", help="capture live responses as fixtures (needs network)")
+    record.add_argument("tickers", nargs="+")
+
+    parser.add_argument("-t", "--tickers", nargs="+", help=f"default: {' '.join(DEFAULT_TICKERS)}")
+    parser.add_argument("-c", "--concurrency", nargs="+", type=int, default=list(DEFAULT_CONCURRENCY),
+                        help="in-flight requests per level")
+    parser.add_argument("-r", "--rounds", type=int, default=2, help="requests per level = concurrency * rounds")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds to first LLM chunk")
+    parser.add_argument("--llm-chars", type=int, default=1500, help="characters per LLM reply")
+    parser.add_argument("--llm-chunks", type=int, default=20, help="chunks per LLM reply")
+    parser.add_argument("--llm-chunk-delay", type=float, default=0.01, help="seconds between LLM chunks")
+    parser.add_argument("--llm-rpm", type=int, default=0, help="LLM requests per minute (0 = unlimited)")
+    parser.add_argument("--data-latency", type=float, default=0.05, help="seconds per data/API round-trip")
+    parser.add_argument("--warm", action="store_true", help="keep market data and LLM caches between levels")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed requests before measuring")
+    parser.add_argument("--seed", type=int, default=0, help="seed for synthetic fixtures")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="earlier --json output to compare against")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show agent logs")
+
+    args = parser.parse_args(argv)
+    return _record(args) if args.command == "record" else _run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
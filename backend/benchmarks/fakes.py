@@ -0,0 +1,322 @@
+"""
+Benchmark Fakes - Offline stand-ins for every external dependency
+yfinance, Tavily, the Finnhub / Alpha Vantage HTTP clients and the Gemini
+model are replaced by fakes that replay fixtures after a configurable
+latency. offline_environment() installs them and blocks real sockets.
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import time
+import types
+import zlib
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Optional
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks.fixtures import FixtureSet, OFFLINE_KEY
+
+
+# ============ yfinance ============
+
+def _slice_history(hist: pd.DataFrame, period: str = "1mo", start=None) -> pd.DataFrame:
+    """What yfinance would return for a period / start date"""
+    from src.data.tools.ohlcv_store import period_start, _align_tz
+
+    if start is not None:
+        since = pd.Timestamp(start, tz="UTC")
+    elif period in ("1d", "5d"):
+        return hist.tail(int(period[0])).copy()
+    else:
+        since = period_start(period)
+        if since is None:
+            return hist.copy()
+    return hist[hist.index >= _align_tz(since, hist.index)].copy()
+
+
+class FakeTicker:
+    """yf.Ticker replaying one fixture; every data access costs one round-trip"""
+
+    def __init__(self, symbol: str, source: "FakeYFinance"):
+        self.ticker = symbol
+        self._source = source
+
+    def _fixture(self) -> Dict:
+        self._source.calls += 1
+        if self._source.latency:
+            time.sleep(self._source.latency)
+        return self._source.fixtures.get(self.ticker)
+
+    def history(self, period: str = "1mo", start=None, **kwargs) -> pd.DataFrame:
+        return _slice_history(self._fixture()["history"], period, start)
+
+    @property
+    def info(self) -> Dict:
+        return dict(self._fixture()["info"])
+
+    @property
+    def news(self):
+        return list(self._fixture()["news"])
+
+    def _statement(self, name: str) -> pd.DataFrame:
+        return self._fixture()["statements"][name].copy()
+
+    income_stmt = property(lambda self: self._statement("income_stmt"))
+    balance_sheet = property(lambda self: self._statement("balance_sheet"))
+    cashflow = property(lambda self: self._statement("cashflow"))
+
+
+class FakeYFinance:
+    """Module-shaped replacement for `yfinance` (Ticker + download)"""
+
+    def __init__(self, fixtures: FixtureSet, latency: float = 0.0):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.calls = 0
+
+    def Ticker(self, symbol: str) -> FakeTicker:
+        return FakeTicker(symbol, self)
+
+    def download(self, tickers, period: str = "1mo", group_by: str = "column", **kwargs) -> pd.DataFrame:
+        """One bulk round-trip for all tickers (ticker-first MultiIndex columns, like group_by="ticker")"""
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {t: _slice_history(self.fixtures.get(t)["history"], period)
+                  .drop(columns=["Dividends", "Stock Splits"], errors="ignore")
+                  for t in tickers}
+        return pd.concat(frames, axis=1)
+
+
+# ============ Tavily ============
+
+def make_tavily_module(fixtures: FixtureSet, latency: float = 0.0) -> types.ModuleType:
+    """A `tavily` module whose TavilyClient.search replays fixture results"""
+
+    class TavilyClient:
+        def __init__(self, api_key: Optional[str] = None, **kwargs):
+            self.api_key = api_key
+
+        def search(self, query: str, topic: str = "general", max_results: int = 5, **kwargs) -> Dict:
+            if latency:
+                time.sleep(latency)
+            symbol = query.split()[0]
+            results = fixtures.get(symbol)["tavily"].get(query, [])
+            return {"query": query, "results": results[:max_results]}
+
+    module = types.ModuleType("tavily")
+    module.TavilyClient = TavilyClient
+    return module
+
+
+# ============ Finnhub / Alpha Vantage HTTP ============
+
+class FakeResponse:
+    """The parts of requests.Response / httpx.Response the providers use"""
+
+    def __init__(self, payload, status_code: int = 200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeHTTPSession:
+    """Routes provider GETs to fixture payloads (sync session + async client API)"""
+
+    def __init__(self, fixtures: FixtureSet, latency: float = 0.0):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.calls = 0
+
+    def _route(self, url: str, params: Optional[Dict]) -> FakeResponse:
+        from src.data.providers.data_providers import FinnhubProvider, AlphaVantageProvider
+
+        self.calls += 1
+        params = params or {}
+        fixture = self.fixtures.get(params.get("symbol", ""))
+        if url.startswith(FinnhubProvider.BASE_URL):
+            payload = fixture["finnhub"].get(url[len(FinnhubProvider.BASE_URL) + 1:])
+        elif url.startswith(AlphaVantageProvider.BASE_URL):
+            payload = fixture["alpha_vantage"].get(params.get("function"))
+        else:
+            payload = None
+        return FakeResponse(payload, 200 if payload is not None else 404)
+
+    def get(self, url: str, params: Optional[Dict] = None, timeout=None) -> FakeResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._route(url, params)
+
+    async def aget(self, url: str, params: Optional[Dict] = None, timeout=None) -> FakeResponse:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._route(url, params)
+
+
+class _FakeAsyncClient:
+    """httpx.AsyncClient facade over FakeHTTPSession"""
+
+    def __init__(self, session: FakeHTTPSession):
+        self.get = session.aget
+
+
+# ============ LLM ============
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _ChunkStream:
+    """Async iterator of chunks; the first is immediate (it already paid the latency)"""
+
+    def __init__(self, chunks, delay: float):
+        self._chunks = chunks
+        self._delay = delay
+
+    def __aiter__(self):
+        return self._generate()
+
+    async def _generate(self):
+        for i, chunk in enumerate(self._chunks):
+            if i and self._delay:
+                await asyncio.sleep(self._delay)
+            yield _Chunk(chunk)
+
+
+class FakeLLM:
+    """
+    Deterministic stand-in for the Gemini model
+
+    The reply depends only on the prompt (same prompt -> same text and action).
+    Each call waits `latency` seconds for the first chunk, then `chunk_delay`
+    per further chunk, so streamed and plain calls take the same time.
+    """
+
+    ACTIONS = ("BUY", "HOLD", "SELL")
+
+    def __init__(self, latency: float = 0.5, response_chars: int = 1500,
+                 chunks: int = 20, chunk_delay: float = 0.01):
+        self.latency = latency
+        self.response_chars = response_chars
+        self.chunks = max(1, chunks)
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def reply(self, prompt: str) -> str:
+        digest = zlib.crc32(prompt.encode("utf-8"))
+        action = self.ACTIONS[digest % len(self.ACTIONS)]
+        confidence = 50 + digest % 45
+        header = (f"## สรุปการวิเคราะห์\n\n**{action}** — ความมั่นใจ {confidence}%\n\n"
+                  f"Sentiment: {'POSITIVE' if action == 'BUY' else 'NEGATIVE' if action == 'SELL' else 'NEUTRAL'}\n\n")
+        footer = f"\n\nACTION: {action}\nRECOMMENDATION: {action}\n"
+        filler = "ปัจจัยพื้นฐานและแนวโน้มราคาสนับสนุนมุมมองนี้ ความเสี่ยงอยู่ในระดับที่ยอมรับได้ "
+        body_len = max(0, self.response_chars - len(header) - len(footer))
+        body = (filler * (body_len // len(filler) + 1))[:body_len]
+        return header + body + footer
+
+    def _split(self, text: str):
+        size = max(1, -(-len(text) // self.chunks))
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _record(self, prompt: str):
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        self._record(prompt)
+        time.sleep(self.latency + self.chunk_delay * (self.chunks - 1))
+        return _Chunk(self.reply(prompt))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        self._record(prompt)
+        await asyncio.sleep(self.latency)
+        text = self.reply(prompt)
+        if stream:
+            return _ChunkStream(self._split(text), self.chunk_delay)
+        await asyncio.sleep(self.chunk_delay * (self.chunks - 1))
+        return _Chunk(text)
+
+
+# ============ Network guard ============
+
+class NetworkBlocked(OSError):
+    """Raised when code under benchmark tries to open a real connection"""
+
+
+def _blocked_connect(self, address, *args, **kwargs):
+    raise NetworkBlocked(f"offline benchmark: connection to {address!r} blocked")
+
+
+def _blocked_create_connection(address, *args, **kwargs):
+    raise NetworkBlocked(f"offline benchmark: connection to {address!r} blocked")
+
+
+# ============ Installation ============
+
+@contextmanager
+def offline_environment(fixtures: FixtureSet, llm: FakeLLM,
+                        data_latency: float = 0.05, llm_rpm: int = 0):
+    """
+    Route every upstream call of the pipeline to the fakes
+
+    Args:
+        fixtures: Fixture source for all tickers
+        llm: Fake model answering every agent
+        data_latency: Simulated seconds per yfinance / Tavily / provider call
+        llm_rpm: LLM requests per minute (0 = unlimited; set to reproduce a quota)
+
+    Yields:
+        dict of the installed fakes ("yfinance", "http", "llm")
+    """
+    from src.agents import base_agent
+    from src.data.tools import data_tools
+    from src.data.providers import (
+        data_providers, get_finnhub_provider, get_alpha_vantage_provider, get_rate_limiter
+    )
+
+    fake_yf = FakeYFinance(fixtures, data_latency)
+    http = FakeHTTPSession(fixtures, data_latency)
+    async_client = _FakeAsyncClient(http)
+    model = base_agent._get_gemini_model()
+
+    with ExitStack() as stack:
+        def patch(target, attribute, value):
+            stack.enter_context(mock.patch.object(target, attribute, value))
+
+        # Market data, search and provider HTTP
+        patch(data_tools, "yf", fake_yf)
+        stack.enter_context(mock.patch.dict(sys.modules, {"tavily": make_tavily_module(fixtures, data_latency)}))
+        stack.enter_context(mock.patch.dict(os.environ, {"TAVILY_API_KEY": os.getenv("TAVILY_API_KEY") or OFFLINE_KEY}))
+        patch(data_providers, "_get_http_session", lambda: http)
+        patch(data_providers, "_get_async_client", lambda: async_client)
+        for provider in (get_finnhub_provider(), get_alpha_vantage_provider()):
+            patch(provider, "api_key", provider.api_key or OFFLINE_KEY)
+        # Free-tier quotas would make the limiter, not the code, the thing being measured
+        for name in ("finnhub", "alpha_vantage"):
+            limiter = get_rate_limiter(name)
+            patch(limiter, "per_minute", 0)
+            patch(limiter, "per_day", 0)
+
+        # LLM (the per-loop pool reads GEMINI_RPM when it is created)
+        patch(base_agent, "GEMINI_RPM", llm_rpm)
+        patch(model, "generate_content", llm.generate_content)
+        patch(model, "generate_content_async", llm.generate_content_async)
+
+        # Anything not faked above fails loudly instead of reaching the network
+        patch(socket.socket, "connect", _blocked_connect)
+        patch(socket, "create_connection", _blocked_create_connection)
+
+        yield {"yfinance": fake_yf, "http": http, "llm": llm}
@@ -0,0 +1,358 @@
+"""
+Benchmark Fixtures - Upstream responses replayed by the offline fakes
+A fixture holds everything the pipeline fetches for one ticker: yfinance
+history/info/news/statements, Tavily searches and raw Finnhub / Alpha Vantage
+payloads. Recorded fixtures (see record_fixture) are JSON files in
+FIXTURE_DIR; tickers without one get a deterministic synthetic fixture.
+"""
+
+import json
+import os
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Placeholder API key set for the offline run (see benchmarks/__init__.py)
+OFFLINE_KEY = "offline-benchmark"
+
+# Searches issued by NewsAnalyst / SocialAnalyst: (query template, topic)
+TAVILY_QUERIES = [
+    ("{ticker} stock news", "news"),
+    ("{ticker} stock reddit discussion", "general"),
+    ("{ticker} stock twitter sentiment", "general"),
+]
+
+# Finnhub endpoints used by FinnhubProvider
+FINNHUB_ENDPOINTS = ["quote", "stock/profile2", "stock/recommendation",
+                     "stock/earnings", "stock/insider-sentiment"]
+
+# Alpha Vantage functions used by AlphaVantageProvider
+ALPHA_VANTAGE_FUNCTIONS = ["RSI", "MACD", "SMA", "OVERVIEW"]
+
+STATEMENTS = ("income_stmt", "balance_sheet", "cashflow")
+
+
+# ============ DataFrame <-> JSON ============
+
+def frame_to_json(frame: pd.DataFrame) -> Dict:
+    """Serialize a DataFrame (datetime index or columns kept as ISO strings)"""
+    def labels(values):
+        return [v.isoformat() if isinstance(v, pd.Timestamp) else str(v) for v in values]
+
+    values = frame.to_numpy(dtype=float, na_value=np.nan) if not frame.empty else np.empty((0, 0))
+    return {
+        "index": labels(frame.index),
+        "columns": labels(frame.columns),
+        "data": [[None if np.isnan(v) else float(v) for v in row] for row in values],
+        "datetime_index": isinstance(frame.index, pd.DatetimeIndex),
+        "datetime_columns": isinstance(frame.columns, pd.DatetimeIndex),
+    }
+
+
+def frame_from_json(payload: Dict) -> pd.DataFrame:
+    """Inverse of frame_to_json"""
+    index = pd.DatetimeIndex(pd.to_datetime(payload["index"], utc=True)) \
+        if payload.get("datetime_index") else payload["index"]
+    columns = pd.DatetimeIndex(pd.to_datetime(payload["columns"])) \
+        if payload.get("datetime_columns") else payload["columns"]
+    data = np.array(payload["data"], dtype=float) if payload["data"] else None
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def _shift_to_today(hist: pd.DataFrame, tz: str) -> pd.DataFrame:
+    """
+    Move a recorded history forward so its last bar is the latest business day
+    (periods are sliced relative to today, so an old recording would come back empty)
+    """
+    if hist.empty:
+        return hist
+    index = hist.index.tz_convert(tz)
+    today = pd.Timestamp.now(tz=tz).date()
+    lag = int(np.busday_count(index[-1].date() + pd.Timedelta(days=1), today + pd.Timedelta(days=1)))
+    hist = hist.copy()
+    hist.index = index + pd.offsets.BDay(lag) if lag > 0 else index
+    hist.index.name = "Date"
+    return hist
+
+
+# ============ Synthetic fixtures ============
+
+def _rng(ticker: str, seed: int) -> np.random.Generator:
+    return np.random.default_rng(zlib.crc32(ticker.upper().encode()) + seed)
+
+
+def synthesize_fixture(ticker: str, seed: int = 0, days: int = 260) -> Dict:
+    """
+    Deterministic fixture for a ticker (same ticker + seed -> same data)
+
+    Prices follow a geometric random walk; payload shapes match what the
+    real APIs return, so parsers and agents run their normal code paths.
+    """
+    symbol = ticker.strip().upper()
+    rng = _rng(symbol, seed)
+    tz = "America/New_York"
+
+    index = pd.bdate_range(end=pd.Timestamp.now(tz=tz).normalize(), periods=days, name="Date")
+    start_price = float(rng.uniform(20, 400))
+    returns = rng.normal(0.0004, 0.018, days)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = close * (1 + rng.normal(0, 0.004, days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, days)))
+    volume = rng.lognormal(16, 0.35, days).round()
+    history = pd.DataFrame({
+        "Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume,
+        "Dividends": 0.0, "Stock Splits": 0.0,
+    }, index=index)
+
+    price = float(close[-1])
+    shares = float(rng.uniform(2e8, 1.5e10))
+    revenue = float(price * shares * rng.uniform(0.05, 0.4))
+    margin = float(rng.uniform(0.05, 0.35))
+    eps = revenue * margin / shares
+
+    info = {
+        "symbol": symbol,
+        "shortName": f"{symbol} Holdings",
+        "longName": f"{symbol} Holdings Inc.",
+        "sector": "Technology",
+        "industry": "Software",
+        "marketCap": price * shares,
+        "totalRevenue": revenue,
+        "trailingPE": price / eps,
+        "forwardPE": price / (eps * 1.1),
+        "trailingEps": eps,
+        "profitMargins": margin,
+        "operatingMargins": margin * 1.3,
+        "returnOnEquity": float(rng.uniform(0.05, 0.45)),
+        "currentPrice": price,
+        "previousClose": float(close[-2]),
+        "targetMeanPrice": price * float(rng.uniform(0.85, 1.3)),
+        "recommendationKey": str(rng.choice(["buy", "hold", "strong_buy", "underperform"])),
+        "fiftyTwoWeekHigh": float(high.max()),
+        "fiftyTwoWeekLow": float(low.min()),
+        "beta": float(rng.uniform(0.6, 1.8)),
+        "dividendYield": float(rng.uniform(0, 0.03)),
+        "sharesOutstanding": shares,
+        "volume": float(volume[-1]),
+        "averageVolume": float(volume[-60:].mean()),
+    }
+
+    now = int(datetime.now(timezone.utc).timestamp())
+    news = [{
+        "title": f"{symbol} {headline}",
+        "publisher": publisher,
+        "link": f"https://news.example.com/{symbol.lower()}/{i}",
+        "providerPublishTime": now - i * 5400,
+    } for i, (headline, publisher) in enumerate([
+        ("beats quarterly revenue estimates", "Reuters"),
+        ("announces new product line", "Bloomberg"),
+        ("shares slip as guidance disappoints", "CNBC"),
+        ("expands buyback program", "MarketWatch"),
+        ("faces regulatory scrutiny in Europe", "Financial Times"),
+        ("analysts raise price target", "Barron's"),
+    ])]
+
+    years = pd.DatetimeIndex([f"{datetime.now().year - i}-12-31" for i in range(1, 5)])
+    growth = np.cumprod(rng.uniform(0.9, 1.2, len(years)))[::-1]
+    statements = {
+        "income_stmt": pd.DataFrame({
+            "Total Revenue": revenue * growth,
+            "Gross Profit": revenue * growth * 0.55,
+            "Operating Income": revenue * growth * margin * 1.3,
+            "Net Income": revenue * growth * margin,
+            "Diluted EPS": eps * growth,
+        }, index=years).T,
+        "balance_sheet": pd.DataFrame({
+            "Total Assets": revenue * growth * 1.8,
+            "Total Liabilities Net Minority Interest": revenue * growth * 0.9,
+            "Stockholders Equity": revenue * growth * 0.9,
+            "Cash And Cash Equivalents": revenue * growth * 0.2,
+            "Total Debt": revenue * growth * 0.4,
+        }, index=years).T,
+        "cashflow": pd.DataFrame({
+            "Operating Cash Flow": revenue * growth * margin * 1.4,
+            "Capital Expenditure": -revenue * growth * 0.06,
+            "Free Cash Flow": revenue * growth * margin * 1.1,
+            "Repurchase Of Capital Stock": -revenue * growth * 0.05,
+        }, index=years).T,
+    }
+
+    tavily = {}
+    for template, topic in TAVILY_QUERIES:
+        query = template.format(ticker=symbol)
+        tavily[query] = [{
+            "title": f"{symbol}: {topic} result {i + 1}",
+            "url": f"https://{'www.reddit.com' if 'reddit' in query else 'web.example.com'}/{symbol.lower()}/{topic}/{i}",
+            "content": f"Discussion about {symbol} ({topic}) #{i + 1}",
+            "published_date": datetime.fromtimestamp(now - i * 3600, timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT"),
+            "score": round(0.9 - i * 0.1, 2),
+        } for i in range(5)]
+
+    dates = [d.strftime("%Y-%m-%d") for d in index[::-1][:5]]
+    finnhub = {
+        "quote": {"c": price, "d": price - float(close[-2]), "dp": (price / float(close[-2]) - 1) * 100,
+                  "h": float(high[-1]), "l": float(low[-1]), "o": float(open_[-1]),
+                  "pc": float(close[-2]), "t": now},
+        "stock/profile2": {"name": info["longName"], "ticker": symbol, "exchange": "NASDAQ",
+                           "finnhubIndustry": "Technology", "marketCapitalization": info["marketCap"] / 1e6,
+                           "shareOutstanding": shares / 1e6, "logo": "", "weburl": f"https://{symbol.lower()}.example.com",
+                           "ipo": "2004-08-19"},
+        "stock/recommendation": [{"buy": int(rng.integers(5, 25)), "hold": int(rng.integers(3, 15)),
+                                  "sell": int(rng.integers(0, 5)), "strongBuy": int(rng.integers(2, 12)),
+                                  "strongSell": int(rng.integers(0, 3)), "period": dates[0], "symbol": symbol}],
+        "stock/earnings": [{"actual": eps / 4 * 1.03, "estimate": eps / 4, "surprise": eps / 4 * 0.03,
+                            "surprisePercent": 3.0, "period": years[0].strftime("%Y-%m-%d"), "symbol": symbol}],
+        "stock/insider-sentiment": {"symbol": symbol, "data": [
+            {"symbol": symbol, "year": datetime.now().year, "month": m,
+             "change": int(rng.integers(-50000, 50000)), "mspr": float(rng.uniform(-60, 60))}
+            for m in range(1, 4)
+        ]},
+    }
+
+    alpha_vantage = {
+        "RSI": {"Meta Data": {"1: Symbol": symbol},
+                "Technical Analysis: RSI": {d: {"RSI": f"{rng.uniform(25, 75):.4f}"} for d in dates}},
+        "MACD": {"Meta Data": {"1: Symbol": symbol},
+                 "Technical Analysis: MACD": {d: {"MACD": f"{m:.4f}", "MACD_Signal": f"{m * 0.8:.4f}",
+                                                  "MACD_Hist": f"{m * 0.2:.4f}"}
+                                              for d, m in zip(dates, rng.normal(0, price * 0.01, len(dates)))}},
+        "SMA": {"Meta Data": {"1: Symbol": symbol},
+                "Technical Analysis: SMA": {d: {"SMA": f"{float(close[-50:].mean()):.4f}"} for d in dates}},
+        "OVERVIEW": {"Symbol": symbol, "PERatio": f"{info['trailingPE']:.2f}", "PEGRatio": "1.8",
+                     "BookValue": f"{price / 6:.2f}", "DividendYield": f"{info['dividendYield']:.4f}",
+                     "EPS": f"{eps:.2f}", "RevenuePerShareTTM": f"{revenue / shares:.2f}",
+                     "ProfitMargin": f"{margin:.4f}", "OperatingMarginTTM": f"{margin * 1.3:.4f}",
+                     "ReturnOnEquityTTM": f"{info['returnOnEquity']:.4f}", "ReturnOnAssetsTTM": "0.08",
+                     "Beta": f"{info['beta']:.2f}", "52WeekHigh": f"{high.max():.2f}",
+                     "52WeekLow": f"{low.min():.2f}", "AnalystTargetPrice": f"{info['targetMeanPrice']:.2f}"},
+    }
+
+    return {
+        "ticker": symbol,
+        "source": "synthetic",
+        "tz": tz,
+        "history": history,
+        "info": info,
+        "news": news,
+        "statements": statements,
+        "tavily": tavily,
+        "finnhub": finnhub,
+        "alpha_vantage": alpha_vantage,
+    }
+
+
+# ============ Recorded fixtures ============
+
+def _fixture_path(ticker: str, fixture_dir: str) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in ticker.strip().upper())
+    return os.path.join(fixture_dir, f"{safe}.json")
+
+
+def record_fixture(ticker: str) -> Dict:
+    """
+    Capture live responses for a ticker (needs network and, for Tavily /
+    Finnhub / Alpha Vantage, real API keys; sources without a key are skipped)
+    """
+    import yfinance as yf
+    from src.data.providers import get_finnhub_provider, get_alpha_vantage_provider
+    from src.data.providers.data_providers import FinnhubProvider, AlphaVantageProvider
+
+    symbol = ticker.strip().upper()
+    stock = yf.Ticker(symbol)
+    history = stock.history(period="1y")
+    fixture = {
+        "ticker": symbol,
+        "source": "recorded",
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "tz": str(history.index.tz or "America/New_York"),
+        "history": history,
+        "info": stock.info,
+        "news": stock.news,
+        "statements": {name: getattr(stock, name) for name in STATEMENTS},
+        "tavily": {},
+        "finnhub": {},
+        "alpha_vantage": {},
+    }
+
+    tavily_key = os.getenv("TAVILY_API_KEY")
+    if tavily_key and tavily_key != OFFLINE_KEY:
+        from tavily import TavilyClient
+        client = TavilyClient(api_key=tavily_key)
+        for template, topic in TAVILY_QUERIES:
+            query = template.format(ticker=symbol)
+            fixture["tavily"][query] = client.search(query=query, topic=topic, max_results=5).get("results", [])
+
+    finnhub = get_finnhub_provider()
+    if finnhub.api_key and finnhub.api_key != OFFLINE_KEY:
+        for endpoint in FINNHUB_ENDPOINTS:
+            params = FinnhubProvider._insider_params(symbol) if endpoint == "stock/insider-sentiment" \
+                else {"symbol": symbol}
+            fixture["finnhub"][endpoint] = finnhub._request(endpoint, params)
+
+    alpha = get_alpha_vantage_provider()
+    if alpha.api_key and alpha.api_key != OFFLINE_KEY:
+        requests_by_function = {
+            "RSI": AlphaVantageProvider._rsi_params(symbol, "daily", 14),
+            "MACD": AlphaVantageProvider._macd_params(symbol, "daily"),
+            "SMA": AlphaVantageProvider._sma_params(symbol, "daily", 50),
+            "OVERVIEW": {"function": "OVERVIEW", "symbol": symbol},
+        }
+        for function, params in requests_by_function.items():
+            fixture["alpha_vantage"][function] = alpha._request(params)
+
+    return fixture
+
+
+def save_fixture(fixture: Dict, fixture_dir: str = FIXTURE_DIR) -> str:
+    """Write a fixture as JSON; returns the file path"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    payload = dict(fixture)
+    payload["history"] = frame_to_json(fixture["history"])
+    payload["statements"] = {name: frame_to_json(frame) for name, frame in fixture["statements"].items()}
+    path = _fixture_path(fixture["ticker"], fixture_dir)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, default=str)
+    return path
+
+
+def load_fixture(ticker: str, fixture_dir: str = FIXTURE_DIR) -> Optional[Dict]:
+    """Read a recorded fixture (history shifted to end today); None if not recorded"""
+    path = _fixture_path(ticker, fixture_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    payload["history"] = _shift_to_today(frame_from_json(payload["history"]), payload.get("tz", "UTC"))
+    payload["statements"] = {name: frame_from_json(frame) for name, frame in payload["statements"].items()}
+    return payload
+
+
+class FixtureSet:
+    """Fixtures by ticker: recorded when available, synthesized otherwise"""
+
+    def __init__(self, fixture_dir: str = FIXTURE_DIR, seed: int = 0):
+        self.fixture_dir = fixture_dir
+        self.seed = seed
+        self._fixtures: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ticker: str) -> Dict:
+        symbol = ticker.strip().upper()
+        with self._lock:
+            fixture = self._fixtures.get(symbol)
+            if fixture is None:
+                fixture = load_fixture(symbol, self.fixture_dir) or synthesize_fixture(symbol, self.seed)
+                self._fixtures[symbol] = fixture
+            return fixture
+
+    def sources(self) -> Dict[str, str]:
+        """ticker -> "recorded" / "synthetic" for the fixtures used so far"""
+        with self._lock:
+            return {symbol: fixture["source"] for symbol, fixture in self._fixtures.items()}
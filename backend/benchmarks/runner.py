@@ -0,0 +1,281 @@
+"""
+Benchmark Runner - Drives graph_app end to end against the offline fakes
+For each concurrency level it reports end-to-end latency, throughput,
+per-phase latency (from the tracer's node / agent / llm / data spans)
+and peak Python heap (tracemalloc, measured in a separate pass).
+"""
+
+import asyncio
+import gc
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional, Sequence
+
+from benchmarks.fakes import FakeLLM, offline_environment
+from benchmarks.fixtures import FIXTURE_DIR, FixtureSet
+
+DEFAULT_TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "GOOGL", "META", "JPM"]
+DEFAULT_CONCURRENCY = (1, 4, 16)
+
+# Span kinds reported as phases, in pipeline order
+PHASE_KINDS = ("node", "agent", "llm", "data", "provider", "cache")
+
+
+def _summary(samples: Sequence[float]) -> Dict:
+    """avg / p50 / p95 / max of millisecond samples"""
+    if not samples:
+        return {"avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "avg_ms": round(sum(ordered) / len(ordered), 1),
+        "p50_ms": round(pick(0.5), 1),
+        "p95_ms": round(pick(0.95), 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+
+
+def _reset_caches():
+    """Cold start for the next pass: drop cached lookups, stored OHLCV files and LLM responses"""
+    from src.data.tools import get_market_data_cache, get_ohlcv_store
+    from src.db.llm_cache import get_llm_cache
+
+    get_market_data_cache().invalidate()
+    get_llm_cache().clear_memory()
+    store = get_ohlcv_store()
+    if store is not None:
+        for path in glob.glob(os.path.join(store.root, "*.npz")):
+            os.remove(path)
+
+
+async def _run_request(ticker: str) -> Dict:
+    """One full graph run; never raises"""
+    from src.data.tools import is_crypto
+    from src.graph import app as graph_app, make_initial_state
+    from src.tracing import span
+
+    started = time.perf_counter()
+    try:
+        async with span("benchmark", "pipeline", ticker=ticker):
+            state = await graph_app.ainvoke(make_initial_state(ticker, is_crypto(ticker)))
+        decision = (state.get("final_decision") or {}).get("decision", "N/A")
+        error = None
+    except Exception as e:
+        decision, error = None, f"{type(e).__name__}: {e}"
+    return {"ticker": ticker, "ms": (time.perf_counter() - started) * 1000,
+            "decision": decision, "error": error}
+
+
+async def _run_pass(tickers: List[str], concurrency: int, requests: int) -> Dict:
+    """`requests` graph runs with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> Dict:
+        async with semaphore:
+            return await _run_request(tickers[i % len(tickers)])
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(requests)))
+    return {"wall_s": time.perf_counter() - started, "results": results}
+
+
+def _phases(metrics: Dict) -> Dict:
+    """Tracer aggregates restricted to the pipeline phases"""
+    return {kind: metrics[kind] for kind in PHASE_KINDS if kind in metrics}
+
+
+async def _run_level(tickers: List[str], concurrency: int, requests: int, fakes: Dict,
+                     warm: bool, memory: bool) -> Dict:
+    from src.tracing import get_tracer
+
+    tracer = get_tracer()
+    calls_before = {name: fake.calls for name, fake in fakes.items()}
+
+    if not warm:
+        _reset_caches()
+    tracer.reset()
+    timed = await _run_pass(tickers, concurrency, requests)
+    phases = _phases(tracer.metrics())
+    upstream = {name: fake.calls - calls_before[name] for name, fake in fakes.items()}
+
+    results = timed["results"]
+    ok = [r for r in results if r["error"] is None]
+    level = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(results) - len(ok),
+        "wall_s": round(timed["wall_s"], 3),
+        "throughput_rps": round(len(ok) / timed["wall_s"], 3) if timed["wall_s"] else 0.0,
+        "latency": _summary([r["ms"] for r in ok]),
+        "decisions": dict(Counter(r["decision"] for r in ok)),
+        "upstream_calls_per_request": {name: round(n / requests, 1) for name, n in upstream.items()},
+        "phases": phases,
+        "peak_memory_mb": None,
+    }
+    failed = [r["error"] for r in results if r["error"]]
+    if failed:
+        level["first_error"] = failed[0]
+
+    if memory:
+        # Separate pass: tracemalloc slows allocation-heavy code enough to skew the timings above
+        if not warm:
+            _reset_caches()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            await _run_pass(tickers, concurrency, requests)
+            level["peak_memory_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        finally:
+            tracemalloc.stop()
+    return level
+
+
+def run_benchmark(tickers: Optional[List[str]] = None,
+                  concurrency: Sequence[int] = DEFAULT_CONCURRENCY,
+                  rounds: int = 2,
+                  llm_latency: float = 0.5,
+                  llm_chars: int = 1500,
+                  llm_chunks: int = 20,
+                  llm_chunk_delay: float = 0.01,
+                  llm_rpm: int = 0,
+                  data_latency: float = 0.05,
+                  warm: bool = False,
+                  memory: bool = True,
+                  warmup: int = 1,
+                  seed: int = 0,
+                  fixture_dir: str = FIXTURE_DIR,
+                  verbose: bool = False) -> Dict:
+    """
+    Run the analysis graph offline at each concurrency level
+
+    Args:
+        tickers: Symbols to analyze (requests cycle through them)
+        concurrency: In-flight request counts to measure
+        rounds: Requests per level = concurrency * rounds
+        llm_latency: Seconds before the fake LLM's first chunk
+        llm_chars: Length of every fake LLM reply
+        llm_chunks: Chunks per reply (streamed or not, each adds llm_chunk_delay)
+        llm_chunk_delay: Seconds between chunks
+        llm_rpm: LLM rate limit during the run (0 = unlimited)
+        data_latency: Seconds per simulated yfinance / Tavily / provider round-trip
+        warm: Keep market data and LLM caches between levels instead of starting cold
+        memory: Also measure peak heap per level (extra pass under tracemalloc)
+        warmup: Untimed requests before the first level (imports, pools, threads)
+        seed: Seed for synthetic fixtures
+        fixture_dir: Directory with recorded fixtures (see `python -m benchmarks record`)
+        verbose: Show agent logs instead of discarding them
+
+    Returns:
+        dict with the run configuration and one entry per level
+    """
+    from src.config import WORKER_THREADS
+
+    tickers = [t.strip().upper() for t in (tickers or DEFAULT_TICKERS)]
+    fixtures = FixtureSet(fixture_dir, seed)
+    llm = FakeLLM(llm_latency, llm_chars, llm_chunks, llm_chunk_delay)
+    config = {
+        "tickers": tickers, "concurrency": list(concurrency), "rounds": rounds,
+        "llm_latency": llm_latency, "llm_chars": llm_chars, "llm_chunks": llm_chunks,
+        "llm_chunk_delay": llm_chunk_delay, "llm_rpm": llm_rpm, "data_latency": data_latency,
+        "warm": warm, "seed": seed, "python": sys.version.split()[0],
+    }
+
+    async def main(fakes: Dict) -> List[Dict]:
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="bench-worker")
+        )
+        for i in range(warmup):
+            await _run_request(tickers[i % len(tickers)])
+        levels = []
+        for n in concurrency:
+            levels.append(await _run_level(tickers, n, max(1, n * rounds), fakes, warm, memory))
+        return levels
+
+    with offline_environment(fixtures, llm, data_latency, llm_rpm) as fakes:
+        if verbose:
+            levels = asyncio.run(main(fakes))
+        else:
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                levels = asyncio.run(main(fakes))
+
+    config["fixtures"] = dict(Counter(fixtures.sources().values()))
+    return {"config": config, "levels": levels}
+
+
+# ============ Reporting ============
+
+def format_report(result: Dict, baseline: Optional[Dict] = None, top: int = 8) -> str:
+    """Human-readable report; with a baseline, adds % change per level"""
+    config = result["config"]
+    lines = [
+        "Offline pipeline benchmark",
+        f"  tickers={','.join(config['tickers'])}  fixtures={config.get('fixtures', {})}",
+        f"  llm_latency={config['llm_latency']}s  llm_chars={config['llm_chars']}  "
+        f"data_latency={config['data_latency']}s  warm={config['warm']}",
+        "",
+        f"{'conc':>5} {'reqs':>5} {'err':>4} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'max ms':>9} {'peak MB':>8}",
+    ]
+    for level in result["levels"]:
+        latency = level["latency"]
+        peak = level["peak_memory_mb"]
+        lines.append(
+            f"{level['concurrency']:>5} {level['requests']:>5} {level['errors']:>4} "
+            f"{level['throughput_rps']:>8.2f} {latency['p50_ms']:>9.0f} {latency['p95_ms']:>9.0f} "
+            f"{latency['max_ms']:>9.0f} {peak if peak is not None else '-':>8}"
+        )
+        if level.get("first_error"):
+            lines.append(f"      first error: {level['first_error']}")
+
+    for level in result["levels"]:
+        lines += ["", f"Phases at concurrency {level['concurrency']} "
+                      f"(upstream calls/request: {level['upstream_calls_per_request']})"]
+        for kind, spans in level["phases"].items():
+            lines.append(f"  [{kind}]")
+            for name, stats in list(spans.items())[:top]:
+                extra = f" queue {stats['queue_ms']:.0f}ms" if stats["queue_ms"] else ""
+                cache = f" cache {stats['cache']}" if stats["cache"] else ""
+                lines.append(
+                    f"    {name:<34} n={stats['count']:<4} avg {stats['avg_ms']:>8.1f}  "
+                    f"p95 {stats['p95_ms']:>8.1f}ms{extra}{cache}"
+                )
+
+    if baseline:
+        lines += ["", "Change vs baseline"]
+        before = {level["concurrency"]: level for level in baseline.get("levels", [])}
+        for level in result["levels"]:
+            old = before.get(level["concurrency"])
+            if old is None:
+                continue
+            lines.append(
+                f"  conc {level['concurrency']:>3}: "
+                f"p50 {_change(old['latency']['p50_ms'], level['latency']['p50_ms'])}  "
+                f"p95 {_change(old['latency']['p95_ms'], level['latency']['p95_ms'])}  "
+                f"req/s {_change(old['throughput_rps'], level['throughput_rps'])}  "
+                f"peak {_change(old.get('peak_memory_mb'), level.get('peak_memory_mb'))}"
+            )
+    return "\n".join(lines)
+
+
+def _change(before, after) -> str:
+    if not before or after is None:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def save_result(result: Dict, path: str):
+    """Write a result as JSON (usable later as --baseline)"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def load_result(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -2,8 +2,8 @@
 Crypto Analyst Agent - Analyzes cryptocurrency assets.
 Focuses on price action, volume, market cap, and sentiment.
 """
-import yfinance as yf
 from src.agents.base_agent import BaseAgent
+from src.data.tools.data_tools import get_price_history, get_ticker_info
 
 
 class CryptoAnalyst(BaseAgent):
@@ -34,9 +34,8 @@ class CryptoAnalyst(BaseAgent):
         
         # Fetch crypto data
         try:
-            crypto = yf.Ticker(ticker)
-            info = crypto.info
-            hist = crypto.history(period="1mo")
+            info = get_ticker_info(ticker)
+            hist = get_price_history(ticker, period="1mo")
             
             # Extract crypto-specific data
             data = {
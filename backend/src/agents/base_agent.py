@@ -3,11 +3,147 @@ Base Agent - Foundation class for all AI agents
 Handles LLM communication with Gemini or OpenAI
 """
 
-from openai import OpenAI
-import google.generativeai as genai
+import asyncio
+import threading
+import time
+import weakref
+from collections import deque
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
 import traceback
 
-from src.config import OPENAI_API_KEY, GEMINI_API_KEY, LLM_PROVIDER
+# The SDKs take ~1s each to import; only the configured provider's is loaded, on first use
+if TYPE_CHECKING:
+    from openai import OpenAI, AsyncOpenAI
+
+from src.config import (
+    OPENAI_API_KEY, GEMINI_API_KEY, LLM_PROVIDER,
+    LLM_MAX_CONCURRENCY, GEMINI_RPM, OPENAI_RPM, per_worker_limit
+)
+from src.tracing import span
+from src.agents.prompt_compaction import compact_sections, agent_token_budget
+from src.db.llm_cache import get_llm_cache, make_cache_key
+
+GEMINI_MODEL = "gemini-2.5-flash"
+OPENAI_MODEL = "gpt-4o"
+
+# Event loop that owns the async LLM pool for the current agent run.
+# Set by run_in_thread() so sync agent code in worker threads can route
+# its LLM calls back through the shared async client and limits.
+_agent_loop: ContextVar = ContextVar("agent_loop", default=None)
+
+# Receiver for token-level output of the current run (see set_token_sink).
+_token_sink: ContextVar = ContextVar("token_sink", default=None)
+
+
+def set_token_sink(sink):
+    """
+    Stream LLM output of agents running in the current context to `sink`
+
+    The sink must provide start(agent_name) -> stream_id, push(stream_id, text)
+    and end(stream_id); it is called on the event loop thread.
+
+    Returns:
+        ContextVar token for reset_token_sink()
+    """
+    return _token_sink.set(sink)
+
+
+def reset_token_sink(token):
+    """Stop streaming to the sink installed by set_token_sink()"""
+    _token_sink.reset(token)
+
+
+# ============ Shared LLM Clients ============
+
+_client_lock = threading.Lock()
+_openai_client = None
+_gemini_models = {}
+
+
+def _get_openai_client() -> "OpenAI":
+    """Get the process-wide sync OpenAI client"""
+    global _openai_client
+    with _client_lock:
+        if _openai_client is None:
+            from openai import OpenAI
+            _openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        return _openai_client
+
+
+def _get_gemini_model(model_name: str = GEMINI_MODEL):
+    """Get a shared Gemini model (genai.configure runs once per process)"""
+    import google.generativeai as genai
+
+    with _client_lock:
+        if not _gemini_models:
+            genai.configure(api_key=GEMINI_API_KEY)
+        if model_name not in _gemini_models:
+            _gemini_models[model_name] = genai.GenerativeModel(model_name)
+        return _gemini_models[model_name]
+
+
+def preload_llm_client():
+    """Import the configured provider's SDK and create its client now instead of on the first call"""
+    if LLM_PROVIDER == "gemini":
+        _get_gemini_model()
+    else:
+        _get_openai_client()
+
+
+class _RateLimiter:
+    """Sliding-window limiter allowing at most `rpm` calls per minute"""
+
+    def __init__(self, rpm: int):
+        self.rpm = rpm
+        self._calls = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rpm <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= 60:
+                    self._calls.popleft()
+                if len(self._calls) < self.rpm:
+                    self._calls.append(now)
+                    return
+                await asyncio.sleep(60 - (now - self._calls[0]))
+
+
+class _LLMPool:
+    """Async client, global semaphore and rate limiters bound to one event loop"""
+
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        self.limiters = {
+            # Each server worker gets its share of the provider limit
+            "gemini": _RateLimiter(per_worker_limit(GEMINI_RPM)),
+            "openai": _RateLimiter(per_worker_limit(OPENAI_RPM)),
+        }
+        self._openai_client = None
+
+    @property
+    def openai_client(self) -> "AsyncOpenAI":
+        if self._openai_client is None:
+            from openai import AsyncOpenAI
+            self._openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        return self._openai_client
+
+
+_pools = weakref.WeakKeyDictionary()
+
+
+def _get_pool() -> _LLMPool:
+    """Get the LLM pool for the running event loop"""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _LLMPool()
+        _pools[loop] = pool
+    return pool
 
 
 class BaseAgent:
@@ -20,48 +156,231 @@ class BaseAgent:
         if self.provider == "gemini":
             if not GEMINI_API_KEY:
                 raise ValueError("GEMINI_API_KEY not found in environment variables")
-            genai.configure(api_key=GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
         else:
             if not OPENAI_API_KEY:
                 print(f"[{self.name}] WARNING: OPENAI_API_KEY not found. Agent may fail.")
-            self.client = OpenAI(api_key=OPENAI_API_KEY)
+    
+    @property
+    def model(self):
+        """Shared Gemini model, created on first use"""
+        return _get_gemini_model()
+    
+    @property
+    def client(self) -> "OpenAI":
+        """Shared sync OpenAI client, created on first use"""
+        return _get_openai_client()
     
     def call_llm(self, system_prompt: str, user_prompt: str) -> str:
         """
         Call the LLM with system and user prompts
         
+        When running inside run_in_thread(), the call is routed to the
+        owning event loop so it shares the pooled async client and limits.
+        
+        Args:
+            system_prompt: Instructions for the AI
+            user_prompt: The actual query/data
+        
+        Returns:
+            LLM response text
+        """
+        loop = _agent_loop.get()
+        if loop is not None and loop.is_running() and not self._on_loop(loop):
+            future = asyncio.run_coroutine_threadsafe(
+                self.acall_llm(system_prompt, user_prompt), loop
+            )
+            return future.result()
+        
+        cache = get_llm_cache()
+        cache_key = self._cache_key(system_prompt, user_prompt) if cache.is_enabled() else None
+        with self._llm_span(system_prompt, user_prompt, streamed=False) as llm_span:
+            cached = cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                llm_span.set(cache="hit", response_chars=len(cached))
+                return cached
+            try:
+                if self.provider == "gemini":
+                    full_prompt = f"System: {system_prompt}\nUser: {user_prompt}"
+                    response = self.model.generate_content(full_prompt)
+                    text = response.text
+                else:
+                    response = self.client.chat.completions.create(
+                        model=OPENAI_MODEL,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        temperature=0.7
+                    )
+                    text = response.choices[0].message.content
+                llm_span.set(response_chars=len(text or ""))
+                if cache_key:
+                    llm_span.set(cache="miss")
+                    cache.put(cache_key, text, **self._cache_meta())
+                return text
+            except Exception as e:
+                llm_span.error = str(e)
+                self.log(f"Error calling LLM: {e}")
+                self.log(f"Traceback: {traceback.format_exc()}")
+                return "Error generating response."
+    
+    async def acall_llm(self, system_prompt: str, user_prompt: str) -> str:
+        """
+        Async LLM call through the shared pool
+        
+        Waits on the global concurrency semaphore (LLM_MAX_CONCURRENCY)
+        and the provider's rate limit (GEMINI_RPM / OPENAI_RPM).
+        If a token sink is installed, the response is streamed to it.
+        Responses for unchanged prompts come from the LLM response cache.
+        
         Args:
             system_prompt: Instructions for the AI
             user_prompt: The actual query/data
-            
+        
         Returns:
             LLM response text
         """
+        pool = _get_pool()
+        sink = _token_sink.get()
+        cache = get_llm_cache()
+        cache_key = self._cache_key(system_prompt, user_prompt) if cache.is_enabled() else None
+        with self._llm_span(system_prompt, user_prompt, streamed=sink is not None) as llm_span:
+            cached = await cache.aget(cache_key) if cache_key else None
+            if cached is not None:
+                llm_span.set(cache="hit", response_chars=len(cached))
+                if sink is not None:
+                    stream_id = sink.start(self.name)
+                    sink.push(stream_id, cached)
+                    sink.end(stream_id)
+                return cached
+            try:
+                queued = time.perf_counter()
+                async with pool.semaphore:
+                    await pool.limiters["gemini" if self.provider == "gemini" else "openai"].acquire()
+                    llm_span.add_queue_time(time.perf_counter() - queued)
+                    if sink is not None:
+                        text = await self._astream_llm(pool, sink, system_prompt, user_prompt)
+                    elif self.provider == "gemini":
+                        full_prompt = f"System: {system_prompt}\nUser: {user_prompt}"
+                        response = await self.model.generate_content_async(full_prompt)
+                        text = response.text
+                    else:
+                        response = await pool.openai_client.chat.completions.create(
+                            model=OPENAI_MODEL,
+                            messages=[
+                                {"role": "system", "content": system_prompt},
+                                {"role": "user", "content": user_prompt}
+                            ],
+                            temperature=0.7
+                        )
+                        text = response.choices[0].message.content
+                llm_span.set(response_chars=len(text or ""))
+                if cache_key:
+                    llm_span.set(cache="miss")
+                    await cache.aput(cache_key, text, **self._cache_meta())
+                return text
+            except Exception as e:
+                llm_span.error = str(e)
+                self.log(f"Error calling LLM: {e}")
+                self.log(f"Traceback: {traceback.format_exc()}")
+                return "Error generating response."
+    
+    def _model_name(self) -> str:
+        return GEMINI_MODEL if self.provider == "gemini" else OPENAI_MODEL
+    
+    def _cache_key(self, system_prompt: str, user_prompt: str) -> str:
+        """LLM response cache key for this agent's call"""
+        return make_cache_key(self.provider, self._model_name(), self.name, system_prompt, user_prompt)
+    
+    def _cache_meta(self) -> dict:
+        return {"agent": self.name, "provider": self.provider, "model": self._model_name()}
+    
+    def _llm_span(self, system_prompt: str, user_prompt: str, streamed: bool):
+        """Span for one LLM call (sizes in characters)"""
+        return span(
+            self.name, "llm",
+            provider=self.provider,
+            model=self._model_name(),
+            prompt_chars=len(system_prompt) + len(user_prompt),
+            streamed=streamed
+        )
+    
+    async def _astream_llm(self, pool: _LLMPool, sink, system_prompt: str, user_prompt: str) -> str:
+        """Stream the completion, forwarding each chunk to the token sink"""
+        stream_id = sink.start(self.name)
+        parts = []
         try:
             if self.provider == "gemini":
                 full_prompt = f"System: {system_prompt}\nUser: {user_prompt}"
-                response = self.model.generate_content(full_prompt)
-                return response.text
+                response = await self.model.generate_content_async(full_prompt, stream=True)
+                async for chunk in response:
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        sink.push(stream_id, text)
             else:
-                response = self.client.chat.completions.create(
-                    model="gpt-4o",
+                stream = await pool.openai_client.chat.completions.create(
+                    model=OPENAI_MODEL,
                     messages=[
                         {"role": "system", "content": system_prompt},
                         {"role": "user", "content": user_prompt}
                     ],
-                    temperature=0.7
+                    temperature=0.7,
+                    stream=True
                 )
-                return response.choices[0].message.content
-        except Exception as e:
-            self.log(f"Error calling LLM: {e}")
-            self.log(f"Traceback: {traceback.format_exc()}")
-            return "Error generating response."
+                async for chunk in stream:
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        parts.append(text)
+                        sink.push(stream_id, text)
+        finally:
+            sink.end(stream_id)
+        return "".join(parts)
+    
+    async def run_in_thread(self, func, *args, **kwargs):
+        """
+        Run blocking agent code in a worker thread
+        
+        LLM calls made from that thread are routed back to this event loop,
+        so they share the pooled async client and concurrency limits.
+        """
+        _agent_loop.set(asyncio.get_running_loop())
+        async with span(f"{self.name}.{func.__name__}", "agent"):
+            return await asyncio.to_thread(func, *args, **kwargs)
+    
+    @staticmethod
+    def _on_loop(loop) -> bool:
+        """Check whether the caller is running on the given event loop"""
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+    
+    def compact_inputs(self, sections: dict) -> dict:
+        """
+        Fit upstream agent results into this agent's prompt token budget
+        
+        Args:
+            sections: label -> upstream result dict (or plain text)
+        
+        Returns:
+            label -> verbatim report or digest, ready to paste into the prompt
+        """
+        return compact_sections(sections, agent_token_budget(self.name))
     
     def analyze(self, ticker: str) -> dict:
         """Override in subclasses"""
         raise NotImplementedError("Subclasses must implement analyze method")
     
+    async def aanalyze(self, *args, **kwargs) -> dict:
+        """
+        Async entry point for analyze()
+        
+        Runs the blocking data fetches and LLM call in a worker thread
+        so concurrent agents overlap and the event loop stays responsive.
+        """
+        return await self.run_in_thread(self.analyze, *args, **kwargs)
+    
     def log(self, message: str):
         """Log a message with agent name prefix"""
         print(f"[{self.name}] {message}")
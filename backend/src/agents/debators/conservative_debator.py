@@ -34,10 +34,13 @@ class ConservativeDebator(BaseAgent):
         """
         self.log(f"Presenting CONSERVATIVE/SAFE perspective for {ticker}...")
         
-        market_report = market_data.get("report_section", "")
-        fundamentals_report = fundamentals_data.get("report_section", "")
-        news_report = news_data.get("report_section", "")
-        risk_report = risk_data.get("report_section", "")
+        inputs = self.compact_inputs({
+            "market": market_data,
+            "fundamentals": fundamentals_data,
+            "news": news_data,
+            "risk": risk_data,
+            "risky": risky_argument,
+        })
         
         system_prompt = """You are a CONSERVATIVE/SAFE Analyst in a risk debate.
 Your role is to advocate for cautious, low-risk investment strategies.
@@ -59,13 +62,13 @@ Your perspective:
 คุณกำลังอภิปรายเรื่องความเสี่ยงในการลงทุน {ticker}
 
 ข้อมูลที่มี:
-- Market Analysis: {market_report[:800]}
-- Fundamentals: {fundamentals_report[:800]}
-- News: {news_report[:800]}
-- Risk Analysis: {risk_report[:800]}
+- Market Analysis: {inputs["market"]}
+- Fundamentals: {inputs["fundamentals"]}
+- News: {inputs["news"]}
+- Risk Analysis: {inputs["risk"]}
 
 ข้อโต้แย้งจากฝ่ายเสี่ยงสูง:
-{risky_argument[:500] if risky_argument else "ยังไม่มี"}
+{inputs["risky"] if risky_argument else "ยังไม่มี"}
 
 กรุณานำเสนอมุมมอง CONSERVATIVE/SAFE ของคุณ:
 1. ความเสี่ยงที่ต้องระวัง
@@ -85,3 +88,7 @@ Your perspective:
             "argument": response,
             "report_section": f"## 🛡️ นักวิเคราะห์ฝ่ายอนุรักษ์นิยม (Conservative Analyst)\n\n{response}"
         }
+    
+    async def adebate(self, *args, **kwargs) -> dict:
+        """Async variant of debate (runs in a worker thread)"""
+        return await self.run_in_thread(self.debate, *args, **kwargs)
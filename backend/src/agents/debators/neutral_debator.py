@@ -34,9 +34,13 @@ class NeutralDebator(BaseAgent):
         """
         self.log(f"Presenting NEUTRAL perspective for {ticker}...")
         
-        market_report = market_data.get("report_section", "")
-        fundamentals_report = fundamentals_data.get("report_section", "")
-        news_report = news_data.get("report_section", "")
+        inputs = self.compact_inputs({
+            "market": market_data,
+            "fundamentals": fundamentals_data,
+            "news": news_data,
+            "risky": risky_argument,
+            "safe": safe_argument,
+        })
         
         system_prompt = """You are a NEUTRAL/BALANCED Analyst in a risk debate.
 Your role is to advocate for moderate, balanced investment strategies.
@@ -58,15 +62,15 @@ Your perspective:
 คุณกำลังอภิปรายเรื่องความเสี่ยงในการลงทุน {ticker}
 
 ข้อมูลที่มี:
-- Market Analysis: {market_report[:800]}
-- Fundamentals: {fundamentals_report[:800]}
-- News: {news_report[:800]}
+- Market Analysis: {inputs["market"]}
+- Fundamentals: {inputs["fundamentals"]}
+- News: {inputs["news"]}
 
 ข้อโต้แย้งจากฝ่ายเสี่ยงสูง:
-{risky_argument[:500] if risky_argument else "ยังไม่มี"}
+{inputs["risky"] if risky_argument else "ยังไม่มี"}
 
 ข้อโต้แย้งจากฝ่ายอนุรักษ์นิยม:
-{safe_argument[:500] if safe_argument else "ยังไม่มี"}
+{inputs["safe"] if safe_argument else "ยังไม่มี"}
 
 กรุณานำเสนอมุมมอง NEUTRAL/BALANCED ของคุณ:
 1. จุดแข็งและจุดอ่อนของทั้งสองฝ่าย
@@ -85,3 +89,7 @@ Your perspective:
             "argument": response,
             "report_section": f"## ⚖️ นักวิเคราะห์สายกลาง (Neutral Analyst)\n\n{response}"
         }
+    
+    async def adebate(self, *args, **kwargs) -> dict:
+        """Async variant of debate (runs in a worker thread)"""
+        return await self.run_in_thread(self.debate, *args, **kwargs)
@@ -31,9 +31,11 @@ class RiskyDebator(BaseAgent):
         """
         self.log(f"Presenting RISKY perspective for {ticker}...")
         
-        market_report = market_data.get("report_section", "")
-        fundamentals_report = fundamentals_data.get("report_section", "")
-        news_report = news_data.get("report_section", "")
+        inputs = self.compact_inputs({
+            "market": market_data,
+            "fundamentals": fundamentals_data,
+            "news": news_data,
+        })
         
         system_prompt = """You are a RISKY/AGGRESSIVE Analyst in a risk debate.
 Your role is to advocate for high-risk, high-reward investment strategies.
@@ -55,9 +57,9 @@ Your perspective:
 คุณกำลังอภิปรายเรื่องความเสี่ยงในการลงทุน {ticker}
 
 ข้อมูลที่มี:
-- Market Analysis: {market_report[:1000]}
-- Fundamentals: {fundamentals_report[:1000]}
-- News: {news_report[:1000]}
+- Market Analysis: {inputs["market"]}
+- Fundamentals: {inputs["fundamentals"]}
+- News: {inputs["news"]}
 
 ประวัติการอภิปราย:
 {debate_history if debate_history else "ยังไม่มีการอภิปราย - คุณพูดก่อน"}
@@ -79,3 +81,7 @@ Your perspective:
             "argument": response,
             "report_section": f"## 🔥 นักวิเคราะห์ฝ่ายเสี่ยงสูง (Risky Analyst)\n\n{response}"
         }
+    
+    async def adebate(self, *args, **kwargs) -> dict:
+        """Async variant of debate (runs in a worker thread)"""
+        return await self.run_in_thread(self.debate, *args, **kwargs)
@@ -20,8 +20,7 @@ class DebateModerator(BaseAgent):
         """
         self.log(f"Moderating Bull vs Bear debate for {ticker}...")
         
-        bull_content = bull_report.get("report_section", "")
-        bear_content = bear_report.get("report_section", "")
+        inputs = self.compact_inputs({"bull": bull_report, "bear": bear_report})
         bull_confidence = bull_report.get("confidence", 0.5)
         bear_confidence = bear_report.get("confidence", 0.5)
         
@@ -40,12 +39,12 @@ and determine which side makes the stronger case.
 Review the Bull vs Bear debate for {ticker}:
 
 === 🐂 BULL RESEARCHER (Confidence: {bull_confidence:.2f}) ===
-{bull_content}
+{inputs["bull"]}
 
 ---
 
 === 🐻 BEAR RESEARCHER (Confidence: {bear_confidence:.2f}) ===
-{bear_content}
+{inputs["bear"]}
 
 ---
 
@@ -130,3 +129,7 @@ Format as Markdown starting with '## ⚖️ DEBATE MODERATOR REPORT'
                     pass
         
         return 0.5
+    
+    async def amoderate(self, *args, **kwargs) -> dict:
+        """Async variant of moderate (runs in a worker thread)"""
+        return await self.run_in_thread(self.moderate, *args, **kwargs)
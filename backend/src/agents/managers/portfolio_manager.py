@@ -13,17 +13,18 @@ class PortfolioManager(BaseAgent):
         """
         self.log(f"Reviewing all reports and debate results for {ticker}...")
         
-        # Extract report sections safely
-        market_report = market_data.get("report_section", "")
-        fundamentals_report = fundamentals_data.get("report_section", "")
-        news_report = news_data.get("report_section", "")
-        social_report = social_data.get("report_section", "")
-        risk_report = risk_data.get("report_section", "")
-        
-        bull_report = bull_data.get("report_section", "")
-        bear_report = bear_data.get("report_section", "")
-        debate_report = debate_data.get("report_section", "")
-        risk_judgment_report = risk_judgment_data.get("report_section", "")
+        # Every upstream report, compacted to this agent's prompt budget
+        inputs = self.compact_inputs({
+            "market": market_data,
+            "fundamentals": fundamentals_data,
+            "news": news_data,
+            "social": social_data,
+            "risk": risk_data,
+            "bull": bull_data,
+            "bear": bear_data,
+            "debate": debate_data,
+            "risk_judgment": risk_judgment_data,
+        })
         
         system_prompt = """You are a Portfolio Manager with final decision-making authority.
 Your goal is to synthesize ALL analysis, debates, and risk assessments to make a profitable yet prudent investment decision.
@@ -46,18 +47,19 @@ Your Task:
 Make your Final Decision for {ticker} based on this dossier:
 
 === 1. CORE ANALYSIS ===
-Market: {market_report[:500]}...
-Fundamentals: {fundamentals_report[:500]}...
-News/Social: {news_report[:300]}... {social_report[:300]}...
+Market: {inputs["market"]}
+Fundamentals: {inputs["fundamentals"]}
+News: {inputs["news"]}
+Social: {inputs["social"]}
 
 === 2. BULL VS BEAR DEBATE ===
-Bull Case: {bull_report[:500]}...
-Bear Case: {bear_report[:500]}...
-Moderator Verdict: {debate_report}
+Bull Case: {inputs["bull"]}
+Bear Case: {inputs["bear"]}
+Moderator Verdict: {inputs["debate"]}
 
 === 3. RISK ASSESSMENT ===
-Risk Report: {risk_report[:500]}...
-Risk Debate Judgment: {risk_judgment_report}
+Risk Report: {inputs["risk"]}
+Risk Debate Judgment: {inputs["risk_judgment"]}
 
 === YOUR DECISION ===
 Please provide:
@@ -84,3 +86,7 @@ Format the output as a clean Markdown section starting with '## 💼 PORTFOLIO M
             "decision": decision,
             "report_section": report
         }
+    
+    async def adecide(self, *args, **kwargs) -> dict:
+        """Async variant of decide (runs in a worker thread)"""
+        return await self.run_in_thread(self.decide, *args, **kwargs)
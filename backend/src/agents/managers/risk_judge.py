@@ -31,9 +31,11 @@ class RiskJudge(BaseAgent):
         """
         self.log(f"Judging risk debate for {ticker}...")
         
-        risky_argument = risky_result.get("argument", "")
-        neutral_argument = neutral_result.get("argument", "")
-        conservative_argument = conservative_result.get("argument", "")
+        inputs = self.compact_inputs({
+            "risky": risky_result.get("argument", ""),
+            "neutral": neutral_result.get("argument", ""),
+            "conservative": conservative_result.get("argument", ""),
+        })
         
         system_prompt = """You are the Risk Management Judge.
 Your role is to evaluate the debate between three risk analysts and make a CLEAR decision.
@@ -54,13 +56,13 @@ Rules:
 คุณเป็นผู้พิพากษาการอภิปรายเรื่องความเสี่ยงสำหรับ {ticker}
 
 === 🔥 ฝ่ายเสี่ยงสูง (Risky) ===
-{risky_argument}
+{inputs["risky"]}
 
 === ⚖️ ฝ่ายสายกลาง (Neutral) ===
-{neutral_argument}
+{inputs["neutral"]}
 
 === 🛡️ ฝ่ายอนุรักษ์นิยม (Conservative) ===
-{conservative_argument}
+{inputs["conservative"]}
 
 แผนเดิมจาก Trader: {trader_plan if trader_plan else "ยังไม่มี"}
 
@@ -136,3 +138,7 @@ Rules:
             "verdict": response,
             "report_section": f"## ⚖️ คำตัดสินของผู้พิพากษา (Risk Judge)\n\n{response}"
         }
+    
+    async def ajudge(self, *args, **kwargs) -> dict:
+        """Async variant of judge (runs in a worker thread)"""
+        return await self.run_in_thread(self.judge, *args, **kwargs)
@@ -0,0 +1,207 @@
+"""
+Prompt Compaction - Bounded digests of upstream agent reports
+Researchers, debators, the moderator, the risk judge and the portfolio
+manager receive signal / confidence / key figures / a short excerpt for
+each upstream report instead of its full markdown, within a token budget
+per agent (PROMPT_TOKEN_BUDGET, overridable via PROMPT_TOKEN_BUDGETS).
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from src.config import PROMPT_COMPACTION, PROMPT_TOKEN_BUDGET, PROMPT_TOKEN_BUDGETS
+
+# Result keys that carry an agent's conclusion, most specific first
+SIGNAL_KEYS = ("decision", "verdict", "signal", "sentiment", "stance", "risk_level")
+CONFIDENCE_KEYS = ("confidence", "debate_confidence")
+
+SIGNAL_WORDS = (
+    "STRONG BUY", "STRONG SELL", "BUY", "SELL", "HOLD",
+    "BULL_WINS", "BEAR_WINS", "DRAW",
+    "BULLISH", "BEARISH", "POSITIVE", "NEGATIVE", "NEUTRAL",
+    "HIGH RISK", "MEDIUM RISK", "LOW RISK",
+)
+_SIGNAL_RE = re.compile(r"\b(" + "|".join(re.escape(w) for w in SIGNAL_WORDS) + r")\b")
+_CONFIDENCE_RE = re.compile(r"(?:[Cc]onfidence|ความเชื่อมั่น)[:\s]+([0-9]*\.?[0-9]+)")
+_NUMBER_RE = re.compile(r"\d")
+_FIGURE_HINT_RE = re.compile(r"[%$฿]|\b(RSI|MACD|SMA|EMA|P/?E|EPS|ROE|ROA|PEG|Beta|Margin|Target|Stop|Entry)\b", re.I)
+_MARKDOWN_RE = re.compile(r"[*_`>#]+")
+_TABLE_RULE_RE = re.compile(r"^\|?\s*:?-{3,}")
+
+# Tokens reserved for the "signal / confidence / key figures" lines of a digest
+_HEADER_TOKENS = 60
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count: ~4 UTF-8 bytes per token
+    (about 4 chars for English, a bit over 1 char for Thai, which is 3 bytes/char)
+    """
+    return (len(text.encode("utf-8")) + 3) // 4 if text else 0
+
+
+def agent_token_budget(agent_name: str) -> int:
+    """Upstream-context budget (tokens) for an agent; 0 = no compaction"""
+    if not PROMPT_COMPACTION:
+        return 0
+    for entry in PROMPT_TOKEN_BUDGETS.split(","):
+        name, _, value = entry.partition("=")
+        if name.strip() == agent_name and value.strip().isdigit():
+            return int(value)
+    return PROMPT_TOKEN_BUDGET
+
+
+def _report_text(result: Any) -> str:
+    if isinstance(result, dict):
+        return str(result.get("report_section") or result.get("argument") or "")
+    return str(result or "")
+
+
+def extract_signal(result: Any) -> Optional[str]:
+    """Conclusion of an agent: from its result fields, else the last signal word in the text"""
+    if isinstance(result, dict):
+        for key in SIGNAL_KEYS:
+            value = result.get(key)
+            if isinstance(value, str) and value and len(value) <= 20:
+                return value.upper()
+    matches = _SIGNAL_RE.findall(_report_text(result).upper())
+    return matches[-1] if matches else None
+
+
+def extract_confidence(result: Any) -> Optional[float]:
+    """Confidence in [0, 1] from the result fields or a "Confidence: X" line"""
+    if isinstance(result, dict):
+        for key in CONFIDENCE_KEYS:
+            value = result.get(key)
+            if isinstance(value, (int, float)):
+                return round(float(value), 2)
+    match = _CONFIDENCE_RE.search(_report_text(result))
+    if match:
+        try:
+            value = float(match.group(1))
+        except ValueError:
+            return None
+        return round(min(max(value / 100 if value > 1 else value, 0.0), 1.0), 2)
+    return None
+
+
+def _clean_line(line: str) -> str:
+    """Markdown line -> plain text (table cells joined with ';')"""
+    line = line.strip()
+    if line.startswith("|"):
+        cells = [c.strip() for c in line.strip("|").split("|")]
+        line = "; ".join(c for c in cells if c)
+    line = _MARKDOWN_RE.sub("", line).strip(" -•:")
+    return re.sub(r"\s+", " ", line)
+
+
+def extract_key_figures(text: str, limit: int = 6, max_chars: int = 120) -> List[str]:
+    """Short lines that carry numbers (prices, ratios, percentages), in report order"""
+    figures = []
+    for raw in text.splitlines():
+        if _TABLE_RULE_RE.match(raw.strip()):
+            continue
+        line = _clean_line(raw)
+        if not line or len(line) > max_chars or not _NUMBER_RE.search(line):
+            continue
+        if _FIGURE_HINT_RE.search(line) or raw.lstrip().startswith(("|", "-", "*", "•")):
+            if line not in figures:
+                figures.append(line)
+        if len(figures) >= limit:
+            break
+    return figures
+
+
+def excerpt(text: str, max_tokens: int, skip: Optional[List[str]] = None) -> str:
+    """Prose of a report (headings, tables and `skip` lines dropped), cut to max_tokens at a word boundary"""
+    if max_tokens <= 0:
+        return ""
+    skip = set(skip or [])
+    parts = []
+    for raw in text.splitlines():
+        stripped = raw.strip()
+        if not stripped or stripped.startswith(("#", "|")) or _TABLE_RULE_RE.match(stripped):
+            continue
+        line = _clean_line(raw)
+        if line and line not in skip:
+            parts.append(line)
+    prose = " ".join(parts)
+    if estimate_tokens(prose) <= max_tokens:
+        return prose
+
+    # Binary search on characters for the byte budget, then back off to a word boundary
+    low, high = 0, len(prose)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(prose[:mid]) <= max_tokens - 1:
+            low = mid
+        else:
+            high = mid - 1
+    cut = prose[:low]
+    space = cut.rfind(" ")
+    if space > low * 0.7:
+        cut = cut[:space]
+    return cut.rstrip(" ,;") + " …"
+
+
+def summarize_report(result: Any, max_tokens: int) -> str:
+    """Digest of one agent result: signal, confidence, key figures and an excerpt"""
+    text = _report_text(result)
+    lines = []
+    signal = extract_signal(result)
+    confidence = extract_confidence(result)
+    if signal or confidence is not None:
+        head = f"signal: {signal or 'N/A'}"
+        if confidence is not None:
+            head += f" | confidence: {confidence:.2f}"
+        lines.append(head)
+
+    figures = extract_key_figures(text)
+    if figures:
+        lines.append("key figures: " + " | ".join(figures))
+    # Figures can't crowd out the excerpt entirely
+    while figures and estimate_tokens("\n".join(lines)) > max_tokens // 2:
+        figures.pop()
+        lines[-1] = "key figures: " + " | ".join(figures) if figures else ""
+    lines = [line for line in lines if line]
+
+    remaining = max_tokens - estimate_tokens("\n".join(lines)) - 4
+    summary = excerpt(text, remaining, skip=figures)
+    if summary:
+        lines.append(f"summary: {summary}")
+    return "\n".join(lines) if lines else "N/A"
+
+
+def compact_sections(sections: Dict[str, Any], budget: int) -> Dict[str, str]:
+    """
+    Fit several upstream results into one token budget
+
+    The budget is shared evenly; a report that fits its share is passed
+    verbatim and its unused share goes to the others, larger reports are
+    replaced by a digest (summarize_report) sized to their share.
+
+    Args:
+        sections: label -> agent result dict (or plain text)
+        budget: Total tokens for all sections; 0 passes everything verbatim
+
+    Returns:
+        label -> text to paste into the prompt (same order as `sections`)
+    """
+    texts = {label: _report_text(result).strip() for label, result in sections.items()}
+    if budget <= 0:
+        return {label: text or "N/A" for label, text in texts.items()}
+
+    compacted = {}
+    remaining = budget
+    pending = sorted(sections, key=lambda label: estimate_tokens(texts[label]))
+    for i, label in enumerate(pending):
+        share = remaining // (len(pending) - i)
+        text = texts[label]
+        if not text:
+            compacted[label] = "N/A"
+        elif estimate_tokens(text) <= share:
+            compacted[label] = text
+        else:
+            compacted[label] = summarize_report(sections[label], max(share, _HEADER_TOKENS))
+        remaining = max(remaining - estimate_tokens(compacted[label]), 0)
+    return {label: compacted[label] for label in sections}
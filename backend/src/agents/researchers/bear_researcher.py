@@ -21,11 +21,13 @@ class BearResearcher(BaseAgent):
         """
         self.log(f"Analyzing bearish case for {ticker}...")
         
-        # Extract relevant sections
-        market_report = market_data.get("report_section", "No market data available")
-        fundamentals_report = fundamentals_data.get("report_section", "No fundamentals data available")
-        news_report = news_data.get("report_section", "No news data available")
-        risk_report = risk_data.get("report_section", "No risk data available")
+        # Upstream reports, compacted to this agent's prompt budget
+        inputs = self.compact_inputs({
+            "market": market_data,
+            "fundamentals": fundamentals_data,
+            "news": news_data,
+            "risk": risk_data,
+        })
         
         system_prompt = """You are a Bear Analyst making the case AGAINST investing in this stock.
 Your task is to present well-reasoned bearish arguments.
@@ -43,16 +45,16 @@ Build the STRONGEST BEARISH CASE for {ticker}:
 
 === AVAILABLE DATA ===
 Market Analysis:
-{market_report}
+{inputs["market"]}
 
 Fundamentals:
-{fundamentals_report}
+{inputs["fundamentals"]}
 
 News:
-{news_report}
+{inputs["news"]}
 
 Risk Analysis:
-{risk_report}
+{inputs["risk"]}
 
 === YOUR BEARISH ARGUMENT ===
 Write a critical bearish thesis covering:
@@ -21,10 +21,12 @@ class BullResearcher(BaseAgent):
         """
         self.log(f"Analyzing bullish case for {ticker}...")
         
-        # Extract relevant sections
-        market_report = market_data.get("report_section", "No market data available")
-        fundamentals_report = fundamentals_data.get("report_section", "No fundamentals data available")
-        news_report = news_data.get("report_section", "No news data available")
+        # Upstream reports, compacted to this agent's prompt budget
+        inputs = self.compact_inputs({
+            "market": market_data,
+            "fundamentals": fundamentals_data,
+            "news": news_data,
+        })
         
         system_prompt = """You are a Bull Analyst advocating for investing in this stock.
 Your task is to build a strong, evidence-based bullish case.
@@ -42,13 +44,13 @@ Build the STRONGEST BULLISH CASE for {ticker}:
 
 === AVAILABLE DATA ===
 Market Analysis:
-{market_report}
+{inputs["market"]}
 
 Fundamentals:
-{fundamentals_report}
+{inputs["fundamentals"]}
 
 News:
-{news_report}
+{inputs["news"]}
 
 === YOUR BULLISH ARGUMENT ===
 Write a compelling bullish thesis covering:
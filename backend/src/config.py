@@ -20,10 +20,127 @@ ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
 # Database
 MONGODB_URL = os.getenv("MONGODB_URL")
 MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "trading-bot")
+# Create the indexes declared in src/db/indexes.py after connecting (idempotent)
+MONGODB_ENSURE_INDEXES = os.getenv("MONGODB_ENSURE_INDEXES", "true").lower() == "true"
+# Threads for pymongo calls made from async code; a bounded pool of its own so DB
+# round-trips neither block the event loop nor queue behind agent work
+MONGODB_EXECUTOR_THREADS = int(os.getenv("MONGODB_EXECUTOR_THREADS", "8"))
+# Write-behind buffer for chat messages, steps and analyses: writes are batched into
+# one bulk_write per collection when MAX_BATCH are queued or every FLUSH_INTERVAL seconds
+WRITE_BUFFER_ENABLED = os.getenv("WRITE_BUFFER_ENABLED", "true").lower() == "true"
+WRITE_BUFFER_MAX_BATCH = int(os.getenv("WRITE_BUFFER_MAX_BATCH", "100"))
+WRITE_BUFFER_FLUSH_INTERVAL = float(os.getenv("WRITE_BUFFER_FLUSH_INTERVAL", "0.5"))
+WRITE_BUFFER_MAX_QUEUE = int(os.getenv("WRITE_BUFFER_MAX_QUEUE", "10000"))  # oldest dropped beyond this
 
 # LLM Provider (gemini or openai)
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
 
+# Market data cache (seconds before yfinance data is refetched)
+MARKET_DATA_CACHE_TTL = float(os.getenv("MARKET_DATA_CACHE_TTL", "300"))
+# Entries kept before the least recently used unpinned ones are evicted (0 = no cap)
+MARKET_DATA_CACHE_MAX_ENTRIES = int(os.getenv("MARKET_DATA_CACHE_MAX_ENTRIES", "2000"))
+
+# On-disk OHLCV store (empty dir = disabled); the stored tail is
+# re-downloaded at most once per OHLCV_STORE_REFRESH seconds
+OHLCV_STORE_DIR = os.getenv(
+    "OHLCV_STORE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai-stock-analyst", "ohlcv")
+)
+OHLCV_STORE_REFRESH = float(os.getenv("OHLCV_STORE_REFRESH", "300"))
+
+# Analysis result cache (seconds a finished report is served as-is;
+# stale window keeps serving it while a background refresh runs, 0 = off)
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "900"))
+ANALYSIS_CACHE_STALE_TTL = float(os.getenv("ANALYSIS_CACHE_STALE_TTL", "0"))
+# Price move (%) that invalidates a cached analysis for the same trading day
+ANALYSIS_CACHE_PRICE_STEP = float(os.getenv("ANALYSIS_CACHE_PRICE_STEP", "1.0"))
+
+# Batch / watchlist analysis
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_MAX_TICKERS = int(os.getenv("BATCH_MAX_TICKERS", "200"))
+
+# Keep-alive connections per host for the Finnhub / Alpha Vantage clients
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+# Provider quotas (calls per minute / per UTC day, 0 = unlimited); defaults are the free tiers
+FINNHUB_RPM = int(os.getenv("FINNHUB_RPM", "60"))
+FINNHUB_DAILY_LIMIT = int(os.getenv("FINNHUB_DAILY_LIMIT", "0"))
+ALPHA_VANTAGE_RPM = int(os.getenv("ALPHA_VANTAGE_RPM", "5"))
+ALPHA_VANTAGE_DAILY_LIMIT = int(os.getenv("ALPHA_VANTAGE_DAILY_LIMIT", "25"))
+
+# RSI (Wilder) / MACD / SMA in the enhanced data are computed from LOCAL_INDICATOR_PERIOD
+# of cached price history. ALPHA_VANTAGE_CROSS_CHECK also fetches Alpha Vantage's values
+# (3 quota units per ticker) and flags differences above: RSI_POINTS (absolute RSI points),
+# MACD_PRICE_PCT (% of the share price) and TOLERANCE (% of the SMA)
+LOCAL_INDICATOR_PERIOD = os.getenv("LOCAL_INDICATOR_PERIOD", "1y")
+ALPHA_VANTAGE_CROSS_CHECK = os.getenv("ALPHA_VANTAGE_CROSS_CHECK", "false").lower() == "true"
+INDICATOR_CROSS_CHECK_TOLERANCE = float(os.getenv("INDICATOR_CROSS_CHECK_TOLERANCE", "5"))
+INDICATOR_CROSS_CHECK_RSI_POINTS = float(os.getenv("INDICATOR_CROSS_CHECK_RSI_POINTS", "2"))
+INDICATOR_CROSS_CHECK_MACD_PRICE_PCT = float(os.getenv("INDICATOR_CROSS_CHECK_MACD_PRICE_PCT", "0.1"))
+
+# LLM concurrency and per-provider rate limits (requests per minute, 0 = unlimited)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+
+# Forward agent LLM output token by token through the SSE stream
+STREAM_TOKENS = os.getenv("STREAM_TOKENS", "true").lower() == "true"
+
+# Prompt compaction: downstream agents get digests of upstream reports instead of
+# the full markdown, within a token budget per agent (0 = pass reports verbatim).
+# PROMPT_TOKEN_BUDGETS overrides per agent, e.g. "PortfolioManager=2000,RiskJudge=900"
+PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "true").lower() == "true"
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+PROMPT_TOKEN_BUDGETS = os.getenv("PROMPT_TOKEN_BUDGETS", "PortfolioManager=2000")
+
+# LLM response cache: "disk", "mongo", "memory" or "" (off). Entries expire after
+# LLM_CACHE_TTL seconds; numbers in prompts (decimals, and integers longer than this) are
+# rounded to LLM_CACHE_SIGNIFICANT_DIGITS significant figures before hashing (0 = exact) so
+# tiny relative changes still hit while small values (sub-cent prices, EPS 0.004 vs 0.001)
+# stay distinct. On by default: a new analysis may reuse an LLM response up to
+# LLM_CACHE_TTL old for an equivalent prompt; set LLM_CACHE_BACKEND="" to always call the model
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "disk").lower()
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "43200"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_DIR = os.getenv(
+    "LLM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai-stock-analyst", "llm")
+)
+LLM_CACHE_SIGNIFICANT_DIGITS = int(os.getenv("LLM_CACHE_SIGNIFICANT_DIGITS", "4"))
+
+# Uvicorn worker processes for `python -m api`. Per-minute limits
+# (FINNHUB_RPM, ALPHA_VANTAGE_RPM, GEMINI_RPM, OPENAI_RPM) are split evenly between
+# the workers; daily budgets are counted once in shared state (SHARED_STATE_BACKEND)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+
+# State shared by the server workers (cached analyses, sessions, in-flight run leases):
+# "local" (this process only), "file" (SHARED_STATE_DIR, workers on one host) or "mongo"
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "file" if SERVER_WORKERS > 1 else "local").lower()
+SHARED_STATE_DIR = os.getenv(
+    "SHARED_STATE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai-stock-analyst", "shared")
+)
+# A worker running a ticker's pipeline holds its lease this long (renewed while running);
+# other workers poll the shared analysis cache every SHARED_POLL_INTERVAL seconds meanwhile
+SHARED_RUN_LEASE_TTL = float(os.getenv("SHARED_RUN_LEASE_TTL", "120"))
+SHARED_POLL_INTERVAL = float(os.getenv("SHARED_POLL_INTERVAL", "1.0"))
+
+# Follow-up context per conversation: "memory", "shared" (SHARED_STATE_BACKEND) or "mongo".
+# Idle conversations expire after SESSION_TTL seconds; at most SESSION_MAX_ENTRIES
+# are kept in memory per process
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "shared" if SERVER_WORKERS > 1 else "memory").lower()
+SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "1000"))
+
+# Build the graph, agents and LLM client in the background right after server start
+# (startup itself no longer waits for them; off = build on the first request)
+PRELOAD_ON_STARTUP = os.getenv("PRELOAD_ON_STARTUP", "true").lower() == "true"
+
+# Worker threads for blocking data/LLM calls run from the async API
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "64"))
+
+# Tracing: spans are aggregated for /metrics; TRACE_FILE also appends them as JSON lines
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_WINDOW = int(os.getenv("TRACE_WINDOW", "1000"))  # recent samples kept per span for p50/p95
+
 # Validate required keys
 def validate_config():
     """Check if required configuration is present"""
@@ -42,6 +159,17 @@ def validate_config():
     return True
 
 
+def per_worker_limit(limit: int) -> int:
+    """
+    One worker's share of a per-minute limit
+    Each of the SERVER_WORKERS processes enforces its own token bucket, so
+    together they stay within the configured limit (0 = unlimited stays 0).
+    """
+    if limit <= 0 or SERVER_WORKERS <= 1:
+        return limit
+    return max(1, limit // SERVER_WORKERS)
+
+
 def get_config_summary():
     """Get a summary of current configuration"""
     return {
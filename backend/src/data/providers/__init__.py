@@ -5,13 +5,40 @@ Data Providers package - External API integrations
 from .data_providers import (
     FinnhubProvider,
     AlphaVantageProvider,
+    get_finnhub_provider,
+    get_alpha_vantage_provider,
+    aclose_http_clients,
     get_enhanced_data,
+    aget_enhanced_data,
     format_enhanced_report
 )
+from .local_indicators import LocalIndicatorService, get_indicator_service
+from .rate_limiter import (
+    QuotaLimiter,
+    get_rate_limiter,
+    get_rate_limiter_stats,
+    request_priority,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    PRIORITY_LOW
+)
 
 __all__ = [
     'FinnhubProvider',
     'AlphaVantageProvider',
+    'get_finnhub_provider',
+    'get_alpha_vantage_provider',
+    'aclose_http_clients',
     'get_enhanced_data',
-    'format_enhanced_report'
+    'aget_enhanced_data',
+    'format_enhanced_report',
+    'LocalIndicatorService',
+    'get_indicator_service',
+    'QuotaLimiter',
+    'get_rate_limiter',
+    'get_rate_limiter_stats',
+    'request_priority',
+    'PRIORITY_HIGH',
+    'PRIORITY_NORMAL',
+    'PRIORITY_LOW'
 ]
@@ -4,18 +4,73 @@ Finnhub and Alpha Vantage API integrations
 """
 
 import os
+import asyncio
+import contextvars
+import threading
+import time
+import weakref
+import httpx
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 
+from src.config import HTTP_POOL_SIZE, ALPHA_VANTAGE_CROSS_CHECK
+from src.data.providers.local_indicators import get_indicator_service, cross_check
+from src.data.providers.rate_limiter import get_rate_limiter
+from src.tracing import span
+
+
+# ============ Shared HTTP Sessions ============
+
+_session_lock = threading.Lock()
+_http_session = None
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _get_http_session() -> requests.Session:
+    """Get the process-wide keep-alive session used by all providers"""
+    global _http_session
+    with _session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Get the keep-alive async client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE,
+                                max_keepalive_connections=HTTP_POOL_SIZE)
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_http_clients():
+    """Close the async client bound to the running event loop (call on shutdown)"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
 
 class FinnhubProvider:
     """Finnhub API for real-time stock data and company info"""
     
     BASE_URL = "https://finnhub.io/api/v1"
+    TIMEOUT = 10
     
     def __init__(self):
         self.api_key = os.getenv("FINNHUB_API_KEY")
+        self.limiter = get_rate_limiter("finnhub")
         if not self.api_key:
             print("[Finnhub] API key not found")
     
@@ -27,17 +82,61 @@ class FinnhubProvider:
         params = params or {}
         params["token"] = self.api_key
         
-        try:
-            response = requests.get(f"{self.BASE_URL}/{endpoint}", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"[Finnhub] Error: {e}")
+        with span(f"finnhub.{endpoint}", "provider") as call_span:
+            queued = time.perf_counter()
+            granted = self.limiter.acquire()
+            call_span.add_queue_time(time.perf_counter() - queued)
+            if not granted:
+                call_span.set(quota="exhausted")
+                return None
+            try:
+                response = _get_http_session().get(f"{self.BASE_URL}/{endpoint}", params=params, timeout=self.TIMEOUT)
+                if response.status_code == 429:
+                    self.limiter.penalize()
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                call_span.error = str(e)
+                print(f"[Finnhub] Error: {e}")
+                return None
+    
+    async def _arequest(self, endpoint: str, params: dict = None) -> Optional[Dict]:
+        """Make API request on the shared async client"""
+        if not self.api_key:
             return None
+        
+        params = params or {}
+        params["token"] = self.api_key
+        
+        with span(f"finnhub.{endpoint}", "provider") as call_span:
+            queued = time.perf_counter()
+            granted = await self.limiter.aacquire()
+            call_span.add_queue_time(time.perf_counter() - queued)
+            if not granted:
+                call_span.set(quota="exhausted")
+                return None
+            try:
+                response = await _get_async_client().get(f"{self.BASE_URL}/{endpoint}", params=params, timeout=self.TIMEOUT)
+                if response.status_code == 429:
+                    self.limiter.penalize()
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                call_span.error = str(e)
+                print(f"[Finnhub] Error: {e}")
+                return None
     
-    def get_quote(self, symbol: str) -> Dict:
-        """Get real-time quote"""
-        data = self._request("quote", {"symbol": symbol})
+    @staticmethod
+    def _insider_params(symbol: str) -> Dict:
+        today = datetime.now()
+        return {
+            "symbol": symbol,
+            "from": (today - timedelta(days=90)).strftime("%Y-%m-%d"),
+            "to": today.strftime("%Y-%m-%d")
+        }
+    
+    @staticmethod
+    def _parse_quote(data) -> Dict:
         if data:
             return {
                 "current_price": data.get("c"),
@@ -51,9 +150,8 @@ class FinnhubProvider:
             }
         return {}
     
-    def get_company_profile(self, symbol: str) -> Dict:
-        """Get company profile"""
-        data = self._request("stock/profile2", {"symbol": symbol})
+    @staticmethod
+    def _parse_company_profile(data) -> Dict:
         if data:
             return {
                 "name": data.get("name"),
@@ -68,9 +166,8 @@ class FinnhubProvider:
             }
         return {}
     
-    def get_recommendation(self, symbol: str) -> Dict:
-        """Get analyst recommendations"""
-        data = self._request("stock/recommendation", {"symbol": symbol})
+    @staticmethod
+    def _parse_recommendation(data) -> Dict:
         if data and len(data) > 0:
             latest = data[0]
             return {
@@ -83,9 +180,8 @@ class FinnhubProvider:
             }
         return {}
     
-    def get_earnings(self, symbol: str) -> Dict:
-        """Get earnings surprises"""
-        data = self._request("stock/earnings", {"symbol": symbol})
+    @staticmethod
+    def _parse_earnings(data) -> Dict:
         if data and len(data) > 0:
             latest = data[0]
             return {
@@ -97,17 +193,8 @@ class FinnhubProvider:
             }
         return {}
     
-    def get_insider_sentiment(self, symbol: str) -> Dict:
-        """Get insider sentiment (MSPR)"""
-        today = datetime.now()
-        from_date = (today - timedelta(days=90)).strftime("%Y-%m-%d")
-        to_date = today.strftime("%Y-%m-%d")
-        
-        data = self._request("stock/insider-sentiment", {
-            "symbol": symbol,
-            "from": from_date,
-            "to": to_date
-        })
+    @staticmethod
+    def _parse_insider_sentiment(data) -> Dict:
         if data and "data" in data and len(data["data"]) > 0:
             latest = data["data"][-1]
             return {
@@ -117,15 +204,63 @@ class FinnhubProvider:
                 "year": latest.get("year")
             }
         return {}
+    
+    def get_quote(self, symbol: str) -> Dict:
+        """Get real-time quote"""
+        return self._parse_quote(self._request("quote", {"symbol": symbol}))
+    
+    def get_company_profile(self, symbol: str) -> Dict:
+        """Get company profile"""
+        return self._parse_company_profile(self._request("stock/profile2", {"symbol": symbol}))
+    
+    def get_recommendation(self, symbol: str) -> Dict:
+        """Get analyst recommendations"""
+        return self._parse_recommendation(self._request("stock/recommendation", {"symbol": symbol}))
+    
+    def get_earnings(self, symbol: str) -> Dict:
+        """Get earnings surprises"""
+        return self._parse_earnings(self._request("stock/earnings", {"symbol": symbol}))
+    
+    def get_insider_sentiment(self, symbol: str) -> Dict:
+        """Get insider sentiment (MSPR)"""
+        return self._parse_insider_sentiment(
+            self._request("stock/insider-sentiment", self._insider_params(symbol))
+        )
+    
+    # ============ Async API ============
+    
+    async def aget_quote(self, symbol: str) -> Dict:
+        """Async variant of get_quote"""
+        return self._parse_quote(await self._arequest("quote", {"symbol": symbol}))
+    
+    async def aget_company_profile(self, symbol: str) -> Dict:
+        """Async variant of get_company_profile"""
+        return self._parse_company_profile(await self._arequest("stock/profile2", {"symbol": symbol}))
+    
+    async def aget_recommendation(self, symbol: str) -> Dict:
+        """Async variant of get_recommendation"""
+        return self._parse_recommendation(await self._arequest("stock/recommendation", {"symbol": symbol}))
+    
+    async def aget_earnings(self, symbol: str) -> Dict:
+        """Async variant of get_earnings"""
+        return self._parse_earnings(await self._arequest("stock/earnings", {"symbol": symbol}))
+    
+    async def aget_insider_sentiment(self, symbol: str) -> Dict:
+        """Async variant of get_insider_sentiment"""
+        return self._parse_insider_sentiment(
+            await self._arequest("stock/insider-sentiment", self._insider_params(symbol))
+        )
 
 
 class AlphaVantageProvider:
     """Alpha Vantage API for technical indicators and fundamentals"""
     
     BASE_URL = "https://www.alphavantage.co/query"
+    TIMEOUT = 15
     
     def __init__(self):
         self.api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
+        self.limiter = get_rate_limiter("alpha_vantage")
         if not self.api_key:
             print("[AlphaVantage] API key not found")
     
@@ -136,29 +271,85 @@ class AlphaVantageProvider:
         
         params["apikey"] = self.api_key
         
-        try:
-            response = requests.get(self.BASE_URL, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            
-            if "Error Message" in data or "Note" in data:
-                print(f"[AlphaVantage] API limit or error: {data}")
+        with span(f"alpha_vantage.{params.get('function')}", "provider") as call_span:
+            queued = time.perf_counter()
+            granted = self.limiter.acquire()
+            call_span.add_queue_time(time.perf_counter() - queued)
+            if not granted:
+                call_span.set(quota="exhausted")
                 return None
-            
-            return data
-        except Exception as e:
-            print(f"[AlphaVantage] Error: {e}")
+            try:
+                response = _get_http_session().get(self.BASE_URL, params=params, timeout=self.TIMEOUT)
+                response.raise_for_status()
+                return self._check(response.json())
+            except Exception as e:
+                call_span.error = str(e)
+                print(f"[AlphaVantage] Error: {e}")
+                return None
+    
+    async def _arequest(self, params: dict) -> Optional[Dict]:
+        """Make API request on the shared async client"""
+        if not self.api_key:
             return None
+        
+        params["apikey"] = self.api_key
+        
+        with span(f"alpha_vantage.{params.get('function')}", "provider") as call_span:
+            queued = time.perf_counter()
+            granted = await self.limiter.aacquire()
+            call_span.add_queue_time(time.perf_counter() - queued)
+            if not granted:
+                call_span.set(quota="exhausted")
+                return None
+            try:
+                response = await _get_async_client().get(self.BASE_URL, params=params, timeout=self.TIMEOUT)
+                response.raise_for_status()
+                return self._check(response.json())
+            except Exception as e:
+                call_span.error = str(e)
+                print(f"[AlphaVantage] Error: {e}")
+                return None
     
-    def get_rsi(self, symbol: str, interval: str = "daily", period: int = 14) -> Dict:
-        """Get RSI indicator"""
-        data = self._request({
+    def _check(self, data: Dict) -> Optional[Dict]:
+        """Alpha Vantage reports limits/errors in a 200 response body"""
+        if "Note" in data or "Information" in data:
+            self.limiter.penalize()
+        if "Error Message" in data or "Note" in data or "Information" in data:
+            print(f"[AlphaVantage] API limit or error: {data}")
+            return None
+        return data
+    
+    @staticmethod
+    def _rsi_params(symbol: str, interval: str, period: int) -> Dict:
+        return {
             "function": "RSI",
             "symbol": symbol,
             "interval": interval,
             "time_period": period,
             "series_type": "close"
-        })
+        }
+    
+    @staticmethod
+    def _macd_params(symbol: str, interval: str) -> Dict:
+        return {
+            "function": "MACD",
+            "symbol": symbol,
+            "interval": interval,
+            "series_type": "close"
+        }
+    
+    @staticmethod
+    def _sma_params(symbol: str, interval: str, period: int) -> Dict:
+        return {
+            "function": "SMA",
+            "symbol": symbol,
+            "interval": interval,
+            "time_period": period,
+            "series_type": "close"
+        }
+    
+    @staticmethod
+    def _parse_rsi(data) -> Dict:
         if data and "Technical Analysis: RSI" in data:
             rsi_data = data["Technical Analysis: RSI"]
             latest_date = list(rsi_data.keys())[0]
@@ -168,14 +359,8 @@ class AlphaVantageProvider:
             }
         return {}
     
-    def get_macd(self, symbol: str, interval: str = "daily") -> Dict:
-        """Get MACD indicator"""
-        data = self._request({
-            "function": "MACD",
-            "symbol": symbol,
-            "interval": interval,
-            "series_type": "close"
-        })
+    @staticmethod
+    def _parse_macd(data) -> Dict:
         if data and "Technical Analysis: MACD" in data:
             macd_data = data["Technical Analysis: MACD"]
             latest_date = list(macd_data.keys())[0]
@@ -188,15 +373,8 @@ class AlphaVantageProvider:
             }
         return {}
     
-    def get_sma(self, symbol: str, interval: str = "daily", period: int = 50) -> Dict:
-        """Get SMA indicator"""
-        data = self._request({
-            "function": "SMA",
-            "symbol": symbol,
-            "interval": interval,
-            "time_period": period,
-            "series_type": "close"
-        })
+    @staticmethod
+    def _parse_sma(data, period: int) -> Dict:
         if data and "Technical Analysis: SMA" in data:
             sma_data = data["Technical Analysis: SMA"]
             latest_date = list(sma_data.keys())[0]
@@ -207,12 +385,8 @@ class AlphaVantageProvider:
             }
         return {}
     
-    def get_overview(self, symbol: str) -> Dict:
-        """Get company overview with fundamentals"""
-        data = self._request({
-            "function": "OVERVIEW",
-            "symbol": symbol
-        })
+    @staticmethod
+    def _parse_overview(data) -> Dict:
         if data and "Symbol" in data:
             return {
                 "pe_ratio": float(data.get("PERatio", 0) or 0),
@@ -231,42 +405,149 @@ class AlphaVantageProvider:
                 "analyst_target_price": float(data.get("AnalystTargetPrice", 0) or 0)
             }
         return {}
+    
+    def get_rsi(self, symbol: str, interval: str = "daily", period: int = 14) -> Dict:
+        """Get RSI indicator"""
+        return self._parse_rsi(self._request(self._rsi_params(symbol, interval, period)))
+    
+    def get_macd(self, symbol: str, interval: str = "daily") -> Dict:
+        """Get MACD indicator"""
+        return self._parse_macd(self._request(self._macd_params(symbol, interval)))
+    
+    def get_sma(self, symbol: str, interval: str = "daily", period: int = 50) -> Dict:
+        """Get SMA indicator"""
+        return self._parse_sma(self._request(self._sma_params(symbol, interval, period)), period)
+    
+    def get_overview(self, symbol: str) -> Dict:
+        """Get company overview with fundamentals"""
+        return self._parse_overview(self._request({"function": "OVERVIEW", "symbol": symbol}))
+    
+    # ============ Async API ============
+    
+    async def aget_rsi(self, symbol: str, interval: str = "daily", period: int = 14) -> Dict:
+        """Async variant of get_rsi"""
+        return self._parse_rsi(await self._arequest(self._rsi_params(symbol, interval, period)))
+    
+    async def aget_macd(self, symbol: str, interval: str = "daily") -> Dict:
+        """Async variant of get_macd"""
+        return self._parse_macd(await self._arequest(self._macd_params(symbol, interval)))
+    
+    async def aget_sma(self, symbol: str, interval: str = "daily", period: int = 50) -> Dict:
+        """Async variant of get_sma"""
+        return self._parse_sma(await self._arequest(self._sma_params(symbol, interval, period)), period)
+    
+    async def aget_overview(self, symbol: str) -> Dict:
+        """Async variant of get_overview"""
+        return self._parse_overview(await self._arequest({"function": "OVERVIEW", "symbol": symbol}))
 
 
-def get_enhanced_data(ticker: str) -> Dict:
-    """Get enhanced data from all providers"""
-    finnhub = FinnhubProvider()
-    alpha = AlphaVantageProvider()
+# Singleton instances
+_finnhub = None
+_alpha_vantage = None
+
+def get_finnhub_provider() -> FinnhubProvider:
+    """Get or create the Finnhub provider singleton"""
+    global _finnhub
+    if _finnhub is None:
+        _finnhub = FinnhubProvider()
+    return _finnhub
+
+def get_alpha_vantage_provider() -> AlphaVantageProvider:
+    """Get or create the Alpha Vantage provider singleton"""
+    global _alpha_vantage
+    if _alpha_vantage is None:
+        _alpha_vantage = AlphaVantageProvider()
+    return _alpha_vantage
+
+
+def _enhanced_calls(ticker: str, asynchronous: bool = False) -> Dict:
+    """
+    (source, field) -> bound provider call for every enhanced-data endpoint
+    
+    Technical indicators come from the local indicator service; Alpha Vantage
+    is asked for them only as a cross-check (ALPHA_VANTAGE_CROSS_CHECK).
+    """
+    finnhub = get_finnhub_provider()
+    alpha = get_alpha_vantage_provider()
+    prefix = "aget_" if asynchronous else "get_"
     
+    calls = {("local", "indicators"): (getattr(get_indicator_service(), prefix + "indicators"), (ticker,), {})}
+    if finnhub.api_key:
+        for field, method in [("quote", "quote"), ("profile", "company_profile"),
+                              ("recommendation", "recommendation"), ("earnings", "earnings"),
+                              ("insider_sentiment", "insider_sentiment")]:
+            calls[("finnhub", field)] = (getattr(finnhub, prefix + method), (ticker,), {})
+    if alpha.api_key:
+        endpoints = [("overview", "overview", {})]
+        if ALPHA_VANTAGE_CROSS_CHECK:
+            endpoints += [("rsi", "rsi", {}), ("macd", "macd", {}), ("sma50", "sma", {"period": 50})]
+        for field, method, kwargs in endpoints:
+            calls[("alpha_vantage", field)] = (getattr(alpha, prefix + method), (ticker,), kwargs)
+    return calls
+
+
+def _assemble_enhanced(ticker: str, calls: Dict, results) -> Dict:
+    """Group per-endpoint results back into the enhanced-data dict"""
     result = {
         "finnhub": {},
-        "alpha_vantage": {}
+        "alpha_vantage": {},
+        "local": {}
     }
-    
-    # Finnhub data
-    if finnhub.api_key:
-        result["finnhub"] = {
-            "quote": finnhub.get_quote(ticker),
-            "profile": finnhub.get_company_profile(ticker),
-            "recommendation": finnhub.get_recommendation(ticker),
-            "earnings": finnhub.get_earnings(ticker),
-            "insider_sentiment": finnhub.get_insider_sentiment(ticker)
-        }
+    for (source, field), value in zip(calls, results):
+        result[source][field] = value if isinstance(value, dict) else {}
+    result["indicators"] = result.pop("local").get("indicators", {})
+    if result["finnhub"]:
         print(f"[Finnhub] Fetched data for {ticker}")
-    
-    # Alpha Vantage data
-    if alpha.api_key:
-        result["alpha_vantage"] = {
-            "rsi": alpha.get_rsi(ticker),
-            "macd": alpha.get_macd(ticker),
-            "sma50": alpha.get_sma(ticker, period=50),
-            "overview": alpha.get_overview(ticker)
-        }
+    if result["alpha_vantage"]:
         print(f"[AlphaVantage] Fetched data for {ticker}")
     
+    checks = cross_check(result["indicators"], result["alpha_vantage"])
+    if checks:
+        result["indicators"]["cross_check"] = checks
+        for name, check in checks.items():
+            if not check["ok"]:
+                print(f"[Indicators] {ticker} {name} differs from Alpha Vantage: "
+                      f"{check['local']} vs {check['remote']} (diff {check['diff']} {check['unit']})")
     return result
 
 
+def get_enhanced_data(ticker: str) -> Dict:
+    """
+    Get enhanced data from all providers
+    All endpoints are requested concurrently over the shared session,
+    so the total wait is the slowest call rather than the sum.
+    """
+    calls = _enhanced_calls(ticker)
+    if not calls:
+        return _assemble_enhanced(ticker, calls, [])
+    
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        # copy_context keeps the caller's request priority in the worker threads
+        futures = [pool.submit(contextvars.copy_context().run, func, *args, **kwargs)
+                   for func, args, kwargs in calls.values()]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"[EnhancedData] Error: {e}")
+                results.append({})
+    return _assemble_enhanced(ticker, calls, results)
+
+
+async def aget_enhanced_data(ticker: str) -> Dict:
+    """Async variant of get_enhanced_data (all endpoints gathered on the event loop)"""
+    calls = _enhanced_calls(ticker, asynchronous=True)
+    results = await asyncio.gather(
+        *(func(*args, **kwargs) for func, args, kwargs in calls.values()),
+        return_exceptions=True
+    )
+    for value in results:
+        if isinstance(value, Exception):
+            print(f"[EnhancedData] Error: {value}")
+    return _assemble_enhanced(ticker, calls, results)
+
+
 def format_enhanced_report(data: Dict) -> str:
     """Format enhanced data into a report section"""
     report = "\n## 📡 Enhanced Data (Finnhub + Alpha Vantage)\n"
@@ -303,22 +584,31 @@ def format_enhanced_report(data: Dict) -> str:
 - **Surprise:** {e.get('surprise_percent', 'N/A')}%
 """
     
-    # Alpha Vantage section
+    # Technical indicators (local, falling back to Alpha Vantage's if history was unavailable)
     av = data.get("alpha_vantage", {})
-    if av.get("rsi") or av.get("macd"):
-        report += "\n### 📐 Technical Indicators (Alpha Vantage)\n"
-        if av.get("rsi"):
-            rsi_val = av["rsi"].get("rsi", 50)
+    ind = data.get("indicators") or {}
+    source = "computed from price history"
+    if not (ind.get("rsi") or ind.get("macd")) and (av.get("rsi") or av.get("macd")):
+        ind, source = av, "Alpha Vantage"
+    if ind.get("rsi") or ind.get("macd"):
+        report += f"\n### 📐 Technical Indicators ({source})\n"
+        if ind.get("rsi"):
+            rsi_val = ind["rsi"].get("rsi", 50)
             rsi_signal = "Oversold 🟢" if rsi_val < 30 else "Overbought 🔴" if rsi_val > 70 else "Neutral ⚪"
             report += f"- **RSI (14):** {rsi_val:.1f} ({rsi_signal})\n"
         
-        if av.get("macd"):
-            m = av["macd"]
+        if ind.get("macd"):
+            m = ind["macd"]
             macd_signal = "Bullish 🟢" if m.get("histogram", 0) > 0 else "Bearish 🔴"
             report += f"- **MACD:** {m.get('macd', 0):.2f} | Signal: {m.get('signal', 0):.2f} ({macd_signal})\n"
         
-        if av.get("sma50"):
-            report += f"- **SMA 50:** ${av['sma50'].get('sma', 0):.2f}\n"
+        if ind.get("sma50"):
+            report += f"- **SMA 50:** ${ind['sma50'].get('sma', 0):.2f}\n"
+        
+        mismatches = [name.upper() for name, check in ind.get("cross_check", {}).items() if not check["ok"]]
+        if ind.get("cross_check"):
+            report += (f"- **Alpha Vantage cross-check:** differs on {', '.join(mismatches)}\n" if mismatches
+                       else "- **Alpha Vantage cross-check:** consistent\n")
     
     if av.get("overview"):
         o = av["overview"]
@@ -0,0 +1,133 @@
+"""
+Local Indicator Service - RSI / MACD / SMA from locally held OHLCV
+Replaces the three Alpha Vantage indicator endpoints (one HTTP request and
+one unit of the 25/day quota each) with calculations over the cached price
+history: RSI with Wilder's smoothing (Alpha Vantage's definition) and the
+scorer's MACD / SMA. Results have the same shape as the parsed Alpha
+Vantage responses, so the enhanced-data report reads either.
+"""
+
+import asyncio
+from typing import Dict
+
+import pandas as pd
+
+from src.config import (
+    LOCAL_INDICATOR_PERIOD, INDICATOR_CROSS_CHECK_TOLERANCE,
+    INDICATOR_CROSS_CHECK_RSI_POINTS, INDICATOR_CROSS_CHECK_MACD_PRICE_PCT
+)
+from src.data.tools.data_tools import get_price_history
+from src.scoring.combined_scorer import calculate_macd, calculate_sma_position
+from src.tracing import span
+
+
+def wilder_rsi(prices: pd.Series, period: int = 14) -> float:
+    """
+    RSI with Wilder's smoothing, as Alpha Vantage and most charting tools report it
+    (the scorer's calculate_rsi uses a simple mean of the last `period` bars instead)
+    """
+    delta = prices.diff().dropna()
+    if len(delta) < period:
+        return 50.0
+    gains = delta.clip(lower=0).to_numpy()
+    losses = (-delta.clip(upper=0)).to_numpy()
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    return float(100 - 100 / (1 + avg_gain / avg_loss))
+
+
+class LocalIndicatorService:
+    """Technical indicators computed from the MarketDataCache / OHLCV store history"""
+
+    def __init__(self, period: str = LOCAL_INDICATOR_PERIOD):
+        # History fetched for the calculations; long enough for SMA 50 and for
+        # the MACD EMAs to settle
+        self.period = period
+
+    def get_indicators(self, symbol: str, rsi_period: int = 14, sma_period: int = 50) -> Dict:
+        """
+        RSI, MACD and SMA for the latest daily bar
+
+        Returns:
+            {"rsi": {...}, "macd": {...}, "sma50": {...}} in Alpha Vantage's parsed
+            format (keys with too little history are left out), or {} without data
+        """
+        with span("local_indicators", "data", ticker=symbol):
+            try:
+                hist = get_price_history(symbol, period=self.period)
+            except Exception as e:
+                print(f"[Indicators] Error loading history for {symbol}: {e}")
+                return {}
+            if hist is None or hist.empty:
+                return {}
+
+            close = hist["Close"].dropna()
+            date = close.index[-1].strftime("%Y-%m-%d")
+            indicators = {}
+            if len(close) > rsi_period:
+                indicators["rsi"] = {"rsi": wilder_rsi(close, rsi_period), "date": date}
+            if len(close) >= 26:
+                macd, signal, _ = calculate_macd(close)
+                indicators["macd"] = {"macd": macd, "signal": signal, "histogram": macd - signal,
+                                      "price": float(close.iloc[-1]), "date": date}
+            if len(close) >= sma_period:
+                pct_diff, _ = calculate_sma_position(close, sma_period)
+                indicators["sma50"] = {"sma": float(close.iloc[-1]) / (1 + pct_diff / 100),
+                                       "period": sma_period, "date": date}
+            return indicators
+
+    async def aget_indicators(self, symbol: str, rsi_period: int = 14, sma_period: int = 50) -> Dict:
+        """Async variant of get_indicators (history is loaded in a worker thread)"""
+        return await asyncio.to_thread(self.get_indicators, symbol, rsi_period, sma_period)
+
+
+# Indicator -> (value field, how the difference is measured) for the Alpha Vantage cross-check:
+# RSI in absolute points, MACD (which hovers around zero) relative to the share price,
+# SMA relative to its own value
+CROSS_CHECK_FIELDS = {"rsi": ("rsi", "points"), "macd": ("macd", "price_pct"), "sma50": ("sma", "pct")}
+
+
+def cross_check(local: Dict, remote: Dict,
+                tolerance_pct: float = INDICATOR_CROSS_CHECK_TOLERANCE,
+                rsi_points: float = INDICATOR_CROSS_CHECK_RSI_POINTS,
+                macd_price_pct: float = INDICATOR_CROSS_CHECK_MACD_PRICE_PCT) -> Dict:
+    """
+    Compare local indicators with Alpha Vantage's
+
+    Returns:
+        indicator -> {"local", "remote", "diff", "unit", "ok"} for indicators both sides have
+    """
+    limits = {"points": rsi_points, "price_pct": macd_price_pct, "pct": tolerance_pct}
+    price = (local.get("macd") or {}).get("price")
+    checks = {}
+    for name, (field, unit) in CROSS_CHECK_FIELDS.items():
+        mine = (local.get(name) or {}).get(field)
+        theirs = (remote.get(name) or {}).get(field)
+        if mine is None or theirs is None:
+            continue
+        if unit == "points":
+            diff = abs(mine - theirs)
+        elif unit == "price_pct":
+            if not price:
+                continue
+            diff = abs(mine - theirs) / price * 100
+        else:
+            diff = abs(mine - theirs) / max(abs(theirs), 1e-9) * 100
+        checks[name] = {"local": round(mine, 4), "remote": round(theirs, 4),
+                        "diff": round(diff, 2), "unit": unit, "ok": diff <= limits[unit]}
+    return checks
+
+
+# Singleton instance
+_indicator_service = None
+
+def get_indicator_service() -> LocalIndicatorService:
+    """Get or create the local indicator service singleton"""
+    global _indicator_service
+    if _indicator_service is None:
+        _indicator_service = LocalIndicatorService()
+    return _indicator_service
@@ -0,0 +1,268 @@
+"""
+Provider Rate Limiting - Token bucket + daily quota per external API
+Callers queue by priority and are released at the rate the quota allows,
+instead of firing requests that come back as rate-limit errors.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
+
+from src.config import (
+    FINNHUB_RPM, FINNHUB_DAILY_LIMIT,
+    ALPHA_VANTAGE_RPM, ALPHA_VANTAGE_DAILY_LIMIT,
+    per_worker_limit
+)
+
+# Lower value = served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+_request_priority: ContextVar = ContextVar("request_priority", default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Run provider calls made in this context at the given queue priority"""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class _Ticket:
+    """A queued caller; async tickets carry an event to wake their loop"""
+
+    __slots__ = ("priority", "seq", "loop", "event")
+
+    def __init__(self, priority: int, seq: int, loop=None):
+        self.priority = priority
+        self.seq = seq
+        self.loop = loop
+        self.event = asyncio.Event() if loop is not None else None
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class QuotaLimiter:
+    """
+    Token bucket (calls per minute) plus a per-day budget (UTC day)
+
+    Waiting callers form one priority queue shared by threads and event loops;
+    only the head of the queue may take a token. When the daily budget is
+    spent, acquire returns False immediately rather than blocking until tomorrow.
+    With a shared state backend the day budget is counted there, so it holds
+    across server workers.
+    """
+
+    def __init__(self, name: str, per_minute: int, per_day: int = 0, shared=None):
+        self.name = name
+        self.shared = shared
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self._rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._day = self._today()
+        self._day_used = 0
+        self._queue: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.granted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.penalties = 0
+        self._wait_total = 0.0
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def is_limited(self) -> bool:
+        return self.per_minute > 0 or self.per_day > 0
+
+    def acquire(self, priority: Optional[int] = None) -> bool:
+        """Block until a call may be made; False if the daily budget is spent"""
+        if not self.is_limited():
+            return True
+        ticket = _Ticket(self._priority(priority), next(self._seq))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    result = self._poll(ticket)
+                    if isinstance(result, bool):
+                        return self._finish(result, started)
+                    self._cond.wait(timeout=result)
+            except BaseException:
+                self._discard(ticket)
+                raise
+
+    async def aacquire(self, priority: Optional[int] = None) -> bool:
+        """Async variant of acquire (waits without holding a worker thread)"""
+        if not self.is_limited():
+            return True
+        ticket = _Ticket(self._priority(priority), next(self._seq), asyncio.get_running_loop())
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+        try:
+            while True:
+                with self._cond:
+                    ticket.event.clear()
+                    result = self._poll(ticket)
+                    if isinstance(result, bool):
+                        return self._finish(result, started)
+                try:
+                    await asyncio.wait_for(ticket.event.wait(), timeout=result)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._cond:
+                self._discard(ticket)
+            raise
+
+    def penalize(self):
+        """The API reported a rate limit anyway: drain the bucket so everyone backs off"""
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+            self.penalties += 1
+
+    def stats(self) -> Dict:
+        """Budget and queue metrics"""
+        with self._cond:
+            self._refill()
+            self._roll_day()
+            day_used = self._day_used
+            if self._shared_day():
+                day_used = self.shared.get(self._day_key()) or 0
+            calls = self.granted + self.rejected
+            return {
+                "provider": self.name,
+                "per_minute": self.per_minute,
+                "per_day": self.per_day,
+                "tokens_available": round(max(self._tokens, 0.0), 2),
+                "day_used": day_used,
+                "day_remaining": max(self.per_day - day_used, 0) if self.per_day else None,
+                "queued": len(self._queue),
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+                "penalties": self.penalties,
+                "avg_wait_ms": round(self._wait_total / calls * 1000, 1) if calls else 0.0,
+            }
+
+    # ---- internals (call with self._cond held) ----
+
+    def _priority(self, priority: Optional[int]) -> int:
+        return _request_priority.get() if priority is None else priority
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.per_minute > 0:
+            self._tokens = min(float(self.per_minute), self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._day_used = 0
+
+    def _poll(self, ticket: _Ticket) -> Union[bool, float]:
+        """True = granted, False = rejected, float = seconds to wait"""
+        self._roll_day()
+        if self.per_day and self._day_used >= self.per_day:
+            self._discard(ticket)
+            return False
+
+        if self._queue[0] is not ticket:
+            return 1.0  # woken early when the head changes
+
+        self._refill()
+        if self.per_minute <= 0 or self._tokens >= 1:
+            if self.per_day and self._shared_day() and \
+                    self.shared.incr(self._day_key(), self.per_day, 2 * 86400) is None:
+                self._day_used = self.per_day  # spent by the workers together
+                self._discard(ticket)
+                return False
+            heapq.heappop(self._queue)
+            if self.per_minute > 0:
+                self._tokens -= 1
+            self._day_used += 1
+            self._wake_head()
+            return True
+        return (1 - self._tokens) / self._rate
+
+    def _shared_day(self) -> bool:
+        return self.shared is not None and self.shared.is_shared()
+
+    def _day_key(self) -> str:
+        return f"quota:{self.name}:{self._day}"
+
+    def _finish(self, granted: bool, started: float) -> bool:
+        waited = time.monotonic() - started
+        self._wait_total += waited
+        if granted:
+            self.granted += 1
+            if waited > 0.001:
+                self.throttled += 1
+        else:
+            self.rejected += 1
+            print(f"[RateLimiter] {self.name} daily budget ({self.per_day}) spent")
+        return granted
+
+    def _discard(self, ticket: _Ticket):
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._wake_head()
+
+    def _wake_head(self):
+        self._cond.notify_all()
+        if self._queue:
+            head = self._queue[0]
+            if head.loop is not None and not head.loop.is_closed():
+                head.loop.call_soon_threadsafe(head.event.set)
+
+
+_limiters: Dict[str, QuotaLimiter] = {}
+_limiters_lock = threading.Lock()
+
+_LIMITS = {
+    "finnhub": (FINNHUB_RPM, FINNHUB_DAILY_LIMIT),
+    "alpha_vantage": (ALPHA_VANTAGE_RPM, ALPHA_VANTAGE_DAILY_LIMIT),
+}
+
+
+def get_rate_limiter(provider: str) -> QuotaLimiter:
+    """
+    Get the process-wide limiter for a provider ("finnhub", "alpha_vantage")
+    The per-minute rate is this worker's share (see per_worker_limit); the
+    daily budget is counted in shared state across workers.
+    """
+    from src.db.shared_state import get_shared_state
+
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            per_minute, per_day = _LIMITS.get(provider, (0, 0))
+            limiter = QuotaLimiter(provider, per_worker_limit(per_minute), per_day, get_shared_state())
+            _limiters[provider] = limiter
+        return limiter
+
+
+def get_rate_limiter_stats() -> List[Dict]:
+    """Metrics for every configured provider"""
+    return [get_rate_limiter(name).stats() for name in _LIMITS]
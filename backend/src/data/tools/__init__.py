@@ -4,22 +4,42 @@ Data Tools package - Utilities for data fetching and processing
 
 from .data_tools import (
     get_stock_data,
+    get_price_history,
+    get_ticker_info,
+    prefetch_price_history,
     get_financials,
     get_detailed_financials,
     get_news,
+    aget_stock_data,
+    aget_financials,
+    aget_news,
+    aget_detailed_financials,
     normalize_ticker,
     extract_ticker,
     is_crypto,
     CRYPTO_SYMBOLS
 )
+from .market_data_cache import MarketDataCache, get_market_data_cache
+from .ohlcv_store import OHLCVStore, get_ohlcv_store
 
 __all__ = [
     'get_stock_data',
+    'get_price_history',
+    'get_ticker_info',
+    'prefetch_price_history',
     'get_financials', 
     'get_detailed_financials',
     'get_news',
+    'aget_stock_data',
+    'aget_financials',
+    'aget_news',
+    'aget_detailed_financials',
     'normalize_ticker',
     'extract_ticker',
     'is_crypto',
-    'CRYPTO_SYMBOLS'
+    'CRYPTO_SYMBOLS',
+    'MarketDataCache',
+    'get_market_data_cache',
+    'OHLCVStore',
+    'get_ohlcv_store'
 ]
@@ -1,7 +1,30 @@
-import yfinance as yf
+import asyncio
+import importlib
 import pandas as pd
 import re
 
+from src.config import PROMPT_COMPACTION
+from src.data.tools.market_data_cache import get_market_data_cache
+from src.data.tools.ohlcv_store import get_ohlcv_store, period_start, slice_period
+from src.tracing import traced
+
+
+class _LazyModule:
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# yfinance (and the HTTP stack under it) is imported on the first fetch, not at server start
+yf = _LazyModule("yfinance")
+
 
 def extract_ticker(message: str) -> str:
     """
@@ -119,15 +142,87 @@ def is_crypto(ticker: str) -> bool:
     # Check direct match or -USD suffix
     return ticker_upper in CRYPTO_SYMBOLS or ticker_upper.endswith('-USD')
 
+def _fetch_price_history(ticker, period):
+    """Reads through the on-disk OHLCV store when enabled, else hits yfinance"""
+    store = get_ohlcv_store()
+    if store is None:
+        return yf.Ticker(ticker).history(period=period)
+    return store.get_history(ticker, period, yf.Ticker(ticker).history)
+
+@traced("data")
+def get_price_history(ticker, period="1mo"):
+    """
+    Fetches historical OHLCV data through the shared market data cache
+    (backed by the on-disk OHLCV store).
+    Raises on network errors; callers decide how to degrade.
+    """
+    return get_market_data_cache().get_or_fetch(
+        ticker, "history", period,
+        lambda: _fetch_price_history(ticker, period)
+    )
+
+@traced("data")
+def get_ticker_info(ticker):
+    """
+    Fetches the yfinance info dict through the shared market data cache.
+    Raises on network errors; callers decide how to degrade.
+    """
+    return get_market_data_cache().get_or_fetch(
+        ticker, "info", "",
+        lambda: yf.Ticker(ticker).info
+    )
+
+@traced("data")
+def prefetch_price_history(tickers, period="1mo", extra_periods=()):
+    """
+    Bulk-downloads OHLCV for many tickers in one yf.download call
+    and seeds the market data cache, so later per-ticker lookups are hits.
+    With extra_periods, the longest period is downloaded and the others
+    are seeded as slices of it.
+    Returns the list of tickers that got data.
+    """
+    periods = list(dict.fromkeys([period, *extra_periods]))
+    if len(periods) > 1:
+        # Day-based periods ("5d") can't be sliced out of a longer download
+        periods = [p for p in periods if period_start(p) is not None] or [period]
+        period = min(periods, key=period_start)
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t))
+    if not tickers:
+        return []
+    try:
+        data = yf.download(tickers, period=period, group_by="ticker",
+                           auto_adjust=True, threads=True, progress=False)
+    except Exception as e:
+        print(f"Error bulk-downloading price data: {e}")
+        return []
+    
+    cache = get_market_data_cache()
+    store = get_ohlcv_store()
+    loaded = []
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(0):
+                continue
+            hist = data[ticker]
+        else:
+            hist = data
+        hist = hist.dropna(how="all")
+        if not hist.empty:
+            for seeded in periods:
+                cache.put(ticker, "history", seeded, slice_period(hist, seeded))
+            if store is not None:
+                store.merge(ticker, hist, period)
+            loaded.append(ticker)
+    return loaded
+
 def get_stock_data(ticker):
     """
     Fetches 1-month historical price data for the given ticker.
     Returns a DataFrame with OHLCV data.
     """
     try:
-        stock = yf.Ticker(ticker)
         # Fetch 1 month of data
-        hist = stock.history(period="1mo")
+        hist = get_price_history(ticker, period="1mo")
         return hist
     except Exception as e:
         print(f"Error fetching stock data for {ticker}: {e}")
@@ -139,8 +234,7 @@ def get_financials(ticker):
     Returns a dictionary of metrics.
     """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_ticker_info(ticker)
         
         metrics = {
             "Market Cap": info.get("marketCap", "N/A"),
@@ -168,6 +262,7 @@ def get_financials(ticker):
         print(f"Error fetching financials for {ticker}: {e}")
         return {}
 
+@traced("data")
 def get_news(ticker):
     """
     Fetches recent news for the given ticker using yfinance.
@@ -190,6 +285,49 @@ def get_news(ticker):
         print(f"Error fetching news for {ticker}: {e}")
         return []
 
+# Statement lines passed to the LLM when prompt compaction is on (yfinance row labels)
+KEY_STATEMENT_ROWS = {
+    "income_statement": [
+        "Total Revenue", "Gross Profit", "Operating Income", "EBITDA",
+        "Net Income", "Diluted EPS"
+    ],
+    "balance_sheet": [
+        "Total Assets", "Total Liabilities Net Minority Interest", "Stockholders Equity",
+        "Current Assets", "Current Liabilities", "Cash And Cash Equivalents", "Total Debt"
+    ],
+    "cash_flow": [
+        "Operating Cash Flow", "Capital Expenditure", "Free Cash Flow",
+        "Repurchase Of Capital Stock", "Cash Dividends Paid"
+    ],
+}
+
+def _format_amount(value):
+    """Statement value -> short string ($391.04 B, $12.30 M, 6.11)"""
+    if pd.isna(value):
+        return "N/A"
+    if abs(value) >= 1e9:
+        return f"${value/1e9:.2f} B"
+    if abs(value) >= 1e6:
+        return f"${value/1e6:.2f} M"
+    return f"{value:.2f}"
+
+def _format_statement(statement, rows):
+    """
+    Key rows of a statement with readable amounts, instead of the full
+    to_string() dump (dozens of rows in scientific notation)
+    """
+    if statement.empty:
+        return "N/A"
+    if not PROMPT_COMPACTION:
+        return statement.to_string()
+    selected = statement.loc[[row for row in rows if row in statement.index]]
+    if selected.empty:
+        selected = statement.head(len(rows))
+    selected = selected.apply(lambda column: column.map(_format_amount))
+    selected.columns = [c.strftime("%Y-%m-%d") if hasattr(c, "strftime") else str(c) for c in selected.columns]
+    return selected.to_string()
+
+@traced("data")
 def get_detailed_financials(ticker):
     """
     Fetches detailed financial statements (Income, Balance Sheet, Cash Flow).
@@ -204,14 +342,34 @@ def get_detailed_financials(ticker):
         cashflow = stock.cashflow.iloc[:, :2] if not stock.cashflow.empty else pd.DataFrame()
         
         return {
-            "income_statement": income.to_string(),
-            "balance_sheet": balance.to_string(),
-            "cash_flow": cashflow.to_string()
+            "income_statement": _format_statement(income, KEY_STATEMENT_ROWS["income_statement"]),
+            "balance_sheet": _format_statement(balance, KEY_STATEMENT_ROWS["balance_sheet"]),
+            "cash_flow": _format_statement(cashflow, KEY_STATEMENT_ROWS["cash_flow"])
         }
     except Exception as e:
         print(f"Error fetching detailed financials for {ticker}: {e}")
         return {}
 
+# ============ Async API ============
+# yfinance is blocking, so these run the sync fetchers in worker threads
+# and keep the event loop free for other requests.
+
+async def aget_stock_data(ticker):
+    """Async variant of get_stock_data"""
+    return await asyncio.to_thread(get_stock_data, ticker)
+
+async def aget_financials(ticker):
+    """Async variant of get_financials"""
+    return await asyncio.to_thread(get_financials, ticker)
+
+async def aget_news(ticker):
+    """Async variant of get_news"""
+    return await asyncio.to_thread(get_news, ticker)
+
+async def aget_detailed_financials(ticker):
+    """Async variant of get_detailed_financials"""
+    return await asyncio.to_thread(get_detailed_financials, ticker)
+
 def normalize_ticker(ticker):
     """
     Corrects common ticker typos and normalizes input.
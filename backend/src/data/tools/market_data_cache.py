@@ -0,0 +1,193 @@
+"""
+Market Data Cache - Process-wide cache for yfinance lookups
+Shares price history and ticker info between agents and the scorer
+so one analysis makes one upstream round-trip per dataset.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from src.config import MARKET_DATA_CACHE_TTL, MARKET_DATA_CACHE_MAX_ENTRIES
+from src.tracing import annotate
+
+
+CacheKey = Tuple[str, str, str]
+
+
+def _is_empty(value: Any) -> bool:
+    """Empty frames/dicts usually mean a failed fetch - don't pin them in the cache"""
+    if value is None:
+        return True
+    empty = getattr(value, "empty", None)
+    if isinstance(empty, bool):
+        return empty
+    if isinstance(value, (dict, list)):
+        return len(value) == 0
+    return False
+
+
+class MarketDataCache:
+    """
+    TTL cache keyed by (ticker, dataset, period).
+    Concurrent requests for the same key wait on a single in-flight fetch.
+    Pinned keys don't expire until every pin() is matched by an unpin().
+    Inserts sweep out expired, unpinned entries and, past max_entries,
+    evict the least recently used unpinned ones.
+    """
+
+    def __init__(self, ttl_seconds: float = MARKET_DATA_CACHE_TTL,
+                 max_entries: int = MARKET_DATA_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, Future] = {}
+        self._pinned: Dict[CacheKey, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._next_sweep = 0.0
+
+    @staticmethod
+    def make_key(ticker: str, dataset: str, period: str = "") -> CacheKey:
+        """Normalize a cache key"""
+        return (ticker.strip().upper(), dataset, period or "")
+
+    def get_or_fetch(self, ticker: str, dataset: str, period: str,
+                     fetch: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for the key, or run fetch() once and cache it
+
+        Args:
+            ticker: Stock/crypto symbol
+            dataset: Dataset name (e.g. "history", "info")
+            period: Period for the dataset ("" when not applicable)
+            fetch: Zero-argument callable that hits the network
+
+        Returns:
+            The cached or freshly fetched value (treat as read-only)
+        """
+        key = self.make_key(ticker, dataset, period)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] > time.monotonic() or key in self._pinned):
+                self.hits += 1
+                self._entries.move_to_end(key)
+                annotate(cache="hit")
+                return entry[1]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = Future()
+                self._inflight[key] = future
+                owner = True
+
+        if not owner:
+            annotate(cache="coalesced")
+            return future.result()
+        annotate(cache="miss")
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            if not _is_empty(value):
+                self._insert(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def put(self, ticker: str, dataset: str, period: str, value: Any):
+        """Seed the cache with data fetched elsewhere (e.g. a bulk download)"""
+        if _is_empty(value):
+            return
+        key = self.make_key(ticker, dataset, period)
+        with self._lock:
+            self._insert(key, value)
+
+    def pin(self, keys: Iterable[CacheKey]):
+        """Keep these entries (present or seeded later) past their TTL until unpin()"""
+        with self._lock:
+            for key in keys:
+                self._pinned[key] = self._pinned.get(key, 0) + 1
+
+    def unpin(self, keys: Iterable[CacheKey]):
+        """Release pins taken by pin(); entries then expire on their normal TTL"""
+        with self._lock:
+            for key in keys:
+                count = self._pinned.get(key, 0) - 1
+                if count > 0:
+                    self._pinned[key] = count
+                else:
+                    self._pinned.pop(key, None)
+
+    def _insert(self, key: CacheKey, value: Any):
+        """Store an entry (caller holds the lock), evicting stale and excess ones"""
+        now = time.monotonic()
+        self._entries[key] = (now + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        if now >= self._next_sweep:
+            # At most one full scan per TTL; expired entries are unreachable anyway
+            self._next_sweep = now + self.ttl_seconds
+            for stale in [k for k, (expires, _) in self._entries.items()
+                          if expires <= now and k not in self._pinned]:
+                del self._entries[stale]
+                self.evictions += 1
+
+        if self.max_entries and len(self._entries) > self.max_entries:
+            for old in [k for k in self._entries if k not in self._pinned and k != key]:
+                if len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[old]
+                self.evictions += 1
+
+    def invalidate(self, ticker: str = None):
+        """Drop cached entries for one ticker, or everything"""
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+                return
+            symbol = ticker.strip().upper()
+            for key in [k for k in self._entries if k[0] == symbol]:
+                del self._entries[key]
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+                "inflight": len(self._inflight),
+                "pinned": len(self._pinned),
+            }
+
+
+# Singleton instance
+_market_data_cache = None
+
+def get_market_data_cache() -> MarketDataCache:
+    """Get or create the process-wide market data cache"""
+    global _market_data_cache
+    if _market_data_cache is None:
+        _market_data_cache = MarketDataCache()
+    return _market_data_cache
@@ -0,0 +1,239 @@
+"""
+OHLCV Store - Persistent per-symbol price history on local disk
+Each symbol is one .npz file (UTC datetime64 index + one float column per field).
+Only the bars after the last stored one are downloaded; any period is
+then sliced from disk, so repeat analyses and restarts skip the network.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import OHLCV_STORE_DIR, OHLCV_STORE_REFRESH
+from src.tracing import annotate
+
+
+# yfinance period -> calendar offset back from today
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Seed at least this much history so later, longer lookbacks are covered
+MIN_SEED_PERIOD = "6mo"
+
+# Columns that signal a back-adjustment of earlier (auto-adjusted) bars
+ADJUSTMENT_COLUMNS = ("Dividends", "Stock Splits")
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """
+    First UTC date covered by a yfinance period string
+    Returns Timestamp.min for "max", None if the period isn't supported
+    (day-based periods count trading days, so they go straight to yfinance).
+    """
+    now = (now or pd.Timestamp.now(tz="UTC")).normalize()
+    if period == "max":
+        return pd.Timestamp.min.tz_localize("UTC")
+    if period == "ytd":
+        return now.replace(month=1, day=1)
+    offset = PERIOD_OFFSETS.get(period)
+    return now - offset if offset is not None else None
+
+
+def _align_tz(ts: pd.Timestamp, index: pd.DatetimeIndex) -> pd.Timestamp:
+    """Make a UTC timestamp comparable with a (possibly tz-naive) index"""
+    return ts.tz_convert(index.tz) if index.tz is not None else ts.tz_localize(None)
+
+
+def slice_period(hist: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Bars of a longer history that fall within `period` (unchanged if unsupported)"""
+    start = period_start(period)
+    if start is None or hist.empty:
+        return hist
+    return hist[hist.index >= _align_tz(start, hist.index)]
+
+
+class OHLCVStore:
+    """Per-symbol OHLCV files with tail-only refresh"""
+
+    def __init__(self, root: str = OHLCV_STORE_DIR,
+                 refresh_seconds: float = OHLCV_STORE_REFRESH):
+        self.root = root
+        self.refresh_seconds = refresh_seconds
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def get_history(self, ticker: str, period: str,
+                    download: Callable[..., pd.DataFrame]) -> pd.DataFrame:
+        """
+        Price history for `period`, served from disk after topping up the tail
+
+        Args:
+            ticker: Stock/crypto symbol
+            period: yfinance period string ("1mo", "3mo", "1y", ...)
+            download: download(period=...) or download(start=...) -> DataFrame,
+                      e.g. yf.Ticker(ticker).history
+
+        Returns:
+            OHLCV DataFrame (same shape as yfinance history)
+        """
+        start = period_start(period)
+        if start is None:
+            return download(period=period)
+
+        symbol = ticker.strip().upper()
+        with self._lock_for(symbol):
+            hist, meta = self._load(symbol)
+
+            if hist is None or meta["covered_from"] > start:
+                seed = period if start < period_start(MIN_SEED_PERIOD) else MIN_SEED_PERIOD
+                annotate(ohlcv_store="seed")
+                fresh = download(period=seed)
+                if fresh.empty:
+                    return fresh
+                hist = fresh if hist is None else self._merge(hist, fresh)
+                self._save(symbol, hist, min(period_start(seed), meta.get("covered_from", start)))
+            elif time.time() - meta["fetched_at"] > self.refresh_seconds:
+                annotate(ohlcv_store="tail")
+                hist = self._refresh_tail(symbol, hist, meta, download)
+            else:
+                annotate(ohlcv_store="disk")
+
+        return slice_period(hist, period)
+
+    def merge(self, ticker: str, fresh: pd.DataFrame, period: str):
+        """Fold bars fetched elsewhere (e.g. a bulk download) into the store"""
+        start = period_start(period)
+        if fresh is None or fresh.empty or start is None:
+            return
+        symbol = ticker.strip().upper()
+        with self._lock_for(symbol):
+            hist, meta = self._load(symbol)
+            if hist is None:
+                self._save(symbol, fresh, start)
+            else:
+                self._save(symbol, self._merge(hist, fresh), min(start, meta["covered_from"]))
+
+    def _refresh_tail(self, symbol: str, hist: pd.DataFrame, meta: Dict,
+                      download: Callable[..., pd.DataFrame]) -> pd.DataFrame:
+        """Download bars from the last stored day onward (re-fetching that day's partial bar)"""
+        try:
+            tail = download(start=hist.index[-1].strftime("%Y-%m-%d"))
+        except Exception as e:
+            print(f"[OHLCVStore] Tail refresh failed for {symbol}: {e}")
+            return hist
+
+        if tail.empty:
+            self._save(symbol, hist, meta["covered_from"])
+            return hist
+
+        merged = self._merge(hist, tail)
+
+        # A dividend or split re-adjusts every earlier bar: refetch the whole range
+        new_bars = merged[merged.index > hist.index[-1]]
+        adjusted = any(
+            col in new_bars.columns and (new_bars[col].fillna(0) != 0).any()
+            for col in ADJUSTMENT_COLUMNS
+        )
+        if adjusted:
+            covered_from = meta["covered_from"]
+            full = download(period="max") if covered_from.year < 1900 \
+                else download(start=covered_from.strftime("%Y-%m-%d"))
+            if not full.empty:
+                merged = full
+
+        self._save(symbol, merged, meta["covered_from"])
+        return merged
+
+    @staticmethod
+    def _merge(hist: pd.DataFrame, fresh: pd.DataFrame) -> pd.DataFrame:
+        """Newer download wins for overlapping bars"""
+        fresh = fresh.copy()
+        if hist.index.tz is None:
+            fresh.index = fresh.index.tz_localize(None) if fresh.index.tz is not None else fresh.index
+        elif fresh.index.tz is None:
+            fresh.index = fresh.index.tz_localize(hist.index.tz)
+        else:
+            fresh.index = fresh.index.tz_convert(hist.index.tz)
+        merged = pd.concat([hist[hist.index < fresh.index[0]], fresh])
+        return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+    def _path(self, symbol: str) -> str:
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in symbol)
+        return os.path.join(self.root, f"{safe}.npz")
+
+    def _lock_for(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _load(self, symbol: str):
+        """Read a symbol's history and metadata; (None, {}) if not stored"""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None, {}
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                columns = [str(c) for c in data["columns"]]
+                tz = str(data["tz"])
+                index = pd.DatetimeIndex(data["index"]).tz_localize("UTC")
+                hist = pd.DataFrame(data["values"], index=index, columns=columns)
+                meta = {
+                    "covered_from": pd.Timestamp(int(data["covered_from"]), tz="UTC"),
+                    "fetched_at": float(data["fetched_at"]),
+                }
+        except Exception as e:
+            print(f"[OHLCVStore] Error reading {path}: {e}")
+            return None, {}
+
+        hist.index = hist.index.tz_convert(tz) if tz else hist.index.tz_localize(None)
+        hist.index.name = "Date"
+        return hist, meta
+
+    def _save(self, symbol: str, hist: pd.DataFrame, covered_from: pd.Timestamp):
+        """Atomically write a symbol's history (numeric columns only)"""
+        numeric = hist.select_dtypes(include="number")
+        index = numeric.index
+        tz = str(index.tz) if index.tz is not None else ""
+        utc = (index.tz_convert("UTC").tz_localize(None) if tz else index).to_numpy(dtype="datetime64[ns]")
+        if covered_from.tzinfo is None:
+            covered_from = covered_from.tz_localize("UTC")
+
+        path = self._path(symbol)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        try:
+            np.savez(
+                tmp,
+                index=utc,
+                values=numeric.to_numpy(dtype=float),
+                columns=np.array(numeric.columns, dtype=str),
+                tz=np.array(tz),
+                covered_from=np.array(covered_from.value),
+                fetched_at=np.array(time.time()),
+            )
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"[OHLCVStore] Error writing {path}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+# Singleton instance
+_ohlcv_store = None
+
+def get_ohlcv_store() -> Optional[OHLCVStore]:
+    """Get or create the OHLCV store (None when OHLCV_STORE_DIR is empty)"""
+    global _ohlcv_store
+    if _ohlcv_store is None and OHLCV_STORE_DIR:
+        _ohlcv_store = OHLCVStore()
+    return _ohlcv_store
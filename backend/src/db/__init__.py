@@ -3,5 +3,19 @@ Database package - Data persistence layer
 """
 
 from .mongodb import MongoDBClient, get_mongo_client
+from .indexes import ensure_indexes, verify_query_plans, check_indexes
+from .analysis_search import build_search_text, backfill_search_text
+from .write_buffer import WriteBehindBuffer, write_buffer_stats, flush_write_buffers
+from .analysis_cache import AnalysisCache, get_analysis_cache
+from .llm_cache import LLMResponseCache, get_llm_cache
+from .shared_state import get_shared_state, WORKER_ID
+from .session_store import SessionStore, get_session_store, derive_session_id
 
-__all__ = ['MongoDBClient', 'get_mongo_client']
+__all__ = ['MongoDBClient', 'get_mongo_client',
+           'ensure_indexes', 'verify_query_plans', 'check_indexes',
+           'build_search_text', 'backfill_search_text',
+           'WriteBehindBuffer', 'write_buffer_stats', 'flush_write_buffers',
+           'AnalysisCache', 'get_analysis_cache',
+           'LLMResponseCache', 'get_llm_cache',
+           'get_shared_state', 'WORKER_ID',
+           'SessionStore', 'get_session_store', 'derive_session_id']
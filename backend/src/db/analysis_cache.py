@@ -0,0 +1,180 @@
+"""
+Analysis Cache - Finished reports served in front of the LangGraph run
+In-memory tier backed by shared state (other server workers) and the
+MongoDB analyses collection
+"""
+
+import asyncio
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src.config import (
+    ANALYSIS_CACHE_TTL, ANALYSIS_CACHE_STALE_TTL, ANALYSIS_CACHE_PRICE_STEP, SHARED_RUN_LEASE_TTL
+)
+from src.data.tools.data_tools import get_price_history
+from src.db.mongodb import MongoDBClient, get_mongo_client
+from src.db.shared_state import get_shared_state
+from src.tracing import span
+
+
+def market_fingerprint(hist) -> str:
+    """
+    Summarize price history as "<last bar date>:<price bucket>"
+    A new trading day or a move larger than ANALYSIS_CACHE_PRICE_STEP % changes it.
+    """
+    if hist is None or hist.empty:
+        return ""
+    last_date = hist.index[-1].strftime("%Y-%m-%d")
+    close = float(hist["Close"].iloc[-1])
+    if close <= 0 or ANALYSIS_CACHE_PRICE_STEP <= 0:
+        return last_date
+    bucket = math.floor(math.log(close) / math.log1p(ANALYSIS_CACHE_PRICE_STEP / 100))
+    return f"{last_date}:{bucket}"
+
+
+class AnalysisCache:
+    """Cache of finished analyses keyed on ticker + market-data fingerprint"""
+
+    def __init__(self, ttl_seconds: float = ANALYSIS_CACHE_TTL,
+                 stale_seconds: float = ANALYSIS_CACHE_STALE_TTL,
+                 mongo: Optional[MongoDBClient] = None):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.mongo = mongo or get_mongo_client()
+        self.shared = get_shared_state()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._refreshing = set()
+
+    def is_enabled(self) -> bool:
+        """Check if caching is turned on"""
+        return self.ttl_seconds > 0
+
+    def fingerprint(self, ticker: str) -> str:
+        """Fingerprint current market data (shares the MarketDataCache fetch)"""
+        try:
+            return market_fingerprint(get_price_history(ticker, period="1mo"))
+        except Exception as e:
+            print(f"[AnalysisCache] Fingerprint error for {ticker}: {e}")
+            return ""
+
+    def get(self, ticker: str) -> Tuple[Optional[Dict], str]:
+        """
+        Look up a cached analysis for the current market data
+
+        Args:
+            ticker: Normalized ticker symbol
+
+        Returns:
+            (entry or None, fingerprint). entry["status"] is "fresh" or "stale".
+        """
+        if not self.is_enabled():
+            return None, ""
+
+        with span("analysis_cache", "cache", ticker=ticker) as lookup:
+            fingerprint = self.fingerprint(ticker)
+            entry = self._entries.get(ticker)
+            if not entry or entry["fingerprint"] != fingerprint:
+                # Another worker may have stored a newer analysis
+                entry = self._load(ticker) or entry
+            if not entry or entry["fingerprint"] != fingerprint:
+                lookup.set(cache="miss")
+                return None, fingerprint
+
+            age = time.time() - entry["created_at"]
+            if age <= self.ttl_seconds:
+                status = "fresh"
+            elif age <= self.ttl_seconds + self.stale_seconds:
+                status = "stale"
+            else:
+                lookup.set(cache="expired")
+                return None, fingerprint
+            lookup.set(cache=status)
+            return {**entry, "status": status, "age": age}, fingerprint
+
+    async def aget(self, ticker: str) -> Tuple[Optional[Dict], str]:
+        """Async variant of get"""
+        return await asyncio.to_thread(self.get, ticker)
+
+    def store(self, ticker: str, fingerprint: str, report: str, decision: str):
+        """Save a finished analysis to memory, shared state and MongoDB"""
+        self._store_local(ticker, fingerprint, report, decision)
+        if self.mongo.is_connected():
+            self.mongo.save_analysis(ticker=ticker, final_decision=decision,
+                                     report_content=report, fingerprint=fingerprint)
+
+    async def astore(self, ticker: str, fingerprint: str, report: str, decision: str):
+        """Async variant of store (the MongoDB write goes through the MongoDB executor)"""
+        await asyncio.to_thread(self._store_local, ticker, fingerprint, report, decision)
+        if self.mongo.is_connected():
+            await self.mongo.asave_analysis(ticker=ticker, final_decision=decision,
+                                            report_content=report, fingerprint=fingerprint)
+
+    def _store_local(self, ticker: str, fingerprint: str, report: str, decision: str):
+        """Memory and shared-state part of store"""
+        entry = {
+            "ticker": ticker,
+            "fingerprint": fingerprint,
+            "report": report,
+            "decision": decision,
+            "created_at": time.time(),
+        }
+        with self._lock:
+            self._entries[ticker] = entry
+        if self.shared.is_shared():
+            self.shared.set(f"analysis:{ticker}", entry, self.ttl_seconds + self.stale_seconds)
+
+    def start_refresh(self, ticker: str) -> bool:
+        """Claim a background refresh for ticker; False if one is already running (in any worker)"""
+        with self._lock:
+            if ticker in self._refreshing:
+                return False
+            self._refreshing.add(ticker)
+        if not self.shared.acquire(f"refresh:{ticker}", SHARED_RUN_LEASE_TTL):
+            self.finish_refresh(ticker, release=False)
+            return False
+        return True
+
+    def finish_refresh(self, ticker: str, release: bool = True):
+        """Release the background refresh claim"""
+        with self._lock:
+            self._refreshing.discard(ticker)
+        if release:
+            self.shared.release(f"refresh:{ticker}")
+
+    def _load(self, ticker: str) -> Optional[Dict]:
+        """Warm the memory tier from shared state, else the latest MongoDB analysis"""
+        shared = self.shared.get(f"analysis:{ticker}") if self.shared.is_shared() else None
+        if shared:
+            entry = shared
+        else:
+            doc = self.mongo.get_latest_analysis(ticker)
+            if not doc or not doc.get("fingerprint"):
+                return None
+            # analysis_date is the saving process's local time (naive), hence timestamp()
+            analysis_date = doc.get("analysis_date")
+            entry = {
+                "ticker": ticker,
+                "fingerprint": doc["fingerprint"],
+                "report": doc.get("report_content", ""),
+                "decision": doc.get("final_decision", "N/A"),
+                "created_at": analysis_date.timestamp() if analysis_date else 0.0,
+            }
+        with self._lock:
+            current = self._entries.get(ticker)
+            if current is None or current["created_at"] < entry["created_at"]:
+                self._entries[ticker] = entry
+        return entry
+
+
+# Singleton instance
+_analysis_cache = None
+
+def get_analysis_cache() -> AnalysisCache:
+    """Get or create the analysis cache singleton"""
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache()
+    return _analysis_cache
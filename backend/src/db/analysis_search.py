@@ -0,0 +1,158 @@
+"""
+Analysis Search - Full-text search over stored analyses
+Reports are mostly Thai, which has no spaces between words, so MongoDB's
+text tokenizer cannot split them. Each analysis therefore stores a
+search_text field: Latin words / numbers lowercased as-is, and every run of
+Thai script as overlapping character bigrams, encoded as ASCII tokens
+("th" + code point offsets). A text index on search_text serves the
+queries; each query word becomes a phrase, so all of them must match and
+Thai words match only where their bigrams are contiguous.
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[\u0e00-\u0e7f]+", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Characters of context on each side of the first match in a snippet
+SNIPPET_CONTEXT = 80
+
+
+def _is_thai(word: str) -> bool:
+    return "\u0e00" <= word[0] <= "\u0e7f"
+
+
+def _thai_token(chars: str) -> str:
+    return "th" + "".join(f"{ord(c) - 0x0E00:02x}" for c in chars)
+
+
+def tokenize(text: str) -> List[List[str]]:
+    """
+    Index tokens per word of text
+
+    Returns:
+        one token list per word: [word] for Latin / digits, character bigrams
+        (a single unigram for one-character runs) for Thai
+    """
+    words = []
+    for word in _WORD_RE.findall(text or ""):
+        if _is_thai(word):
+            if len(word) == 1:
+                words.append([_thai_token(word)])
+            else:
+                words.append([_thai_token(word[i:i + 2]) for i in range(len(word) - 1)])
+        else:
+            words.append([word.lower()])
+    return words
+
+
+def build_search_text(ticker: str, final_decision: str, report_content: str) -> str:
+    """Value of the search_text field stored with an analysis"""
+    text = f"{ticker or ''} {final_decision or ''} {report_content or ''}"
+    return " ".join(" ".join(tokens) for tokens in tokenize(text))
+
+
+def build_text_query(query: str) -> str:
+    """$text $search string: every query word as a quoted phrase (all must match)"""
+    return " ".join(f'"{" ".join(tokens)}"' for tokens in tokenize(query))
+
+
+def make_snippet(content: str, query: str, context: int = SNIPPET_CONTEXT) -> str:
+    """Whitespace-collapsed excerpt around the first query word found, match in **bold**"""
+    content = _WHITESPACE_RE.sub(" ", content or "").strip()
+    lowered = content.lower()
+    found = [(lowered.find(word.lower()), word) for word in _WORD_RE.findall(query or "")]
+    found = [(pos, word) for pos, word in found if pos >= 0]
+    if not found:
+        return content[:context * 2] + ("…" if len(content) > context * 2 else "")
+
+    pos, word = min(found)
+    start, end = max(0, pos - context), min(len(content), pos + len(word) + context)
+    return (("…" if start > 0 else "") + content[start:pos]
+            + f"**{content[pos:pos + len(word)]}**"
+            + content[pos + len(word):end] + ("…" if end < len(content) else ""))
+
+
+def _as_datetime(value: Union[str, datetime, None]) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def build_filter(query: str = "", ticker: Optional[str] = None, decision: Optional[str] = None,
+                 date_from: Union[str, datetime, None] = None,
+                 date_to: Union[str, datetime, None] = None) -> Dict:
+    """
+    MongoDB filter for a search (date bounds accept datetimes or ISO strings;
+    date_to given as a bare date includes the whole day)
+    """
+    criteria = {}
+    text_query = build_text_query(query)
+    if text_query:
+        criteria["$text"] = {"$search": text_query}
+    if ticker:
+        criteria["ticker"] = ticker.upper()
+    if decision:
+        criteria["final_decision"] = decision.upper()
+    date_range = {}
+    if date_from:
+        date_range["$gte"] = _as_datetime(date_from)
+    if date_to:
+        if isinstance(date_to, str) and len(date_to.strip()) == 10:
+            # A bare YYYY-MM-DD includes that whole day
+            date_range["$lt"] = _as_datetime(date_to.strip()) + timedelta(days=1)
+        else:
+            date_range["$lte"] = _as_datetime(date_to)
+    if date_range:
+        criteria["analysis_date"] = date_range
+    return criteria
+
+
+def to_hit(doc: Dict, query: str) -> Dict:
+    """Search result for one analysis document"""
+    return {
+        "id": str(doc["_id"]),
+        "ticker": doc.get("ticker"),
+        "analysis_date": doc.get("analysis_date"),
+        "final_decision": doc.get("final_decision"),
+        "score": round(doc.get("score", 0.0), 3),
+        "snippet": make_snippet(doc.get("report_content", ""), query),
+    }
+
+
+def backfill_search_text(db, batch_size: int = 500) -> int:
+    """
+    Add search_text to analyses saved before it existed
+
+    Returns:
+        number of documents updated
+    """
+    from pymongo import UpdateOne
+
+    updated = 0
+    cursor = db.analyses.find({"search_text": {"$exists": False}},
+                              {"ticker": 1, "final_decision": 1, "report_content": 1})
+    ops = []
+    for doc in cursor:
+        text = build_search_text(doc.get("ticker", ""), doc.get("final_decision", ""),
+                                 doc.get("report_content", ""))
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_text": text}}))
+        if len(ops) >= batch_size:
+            updated += db.analyses.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += db.analyses.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+if __name__ == "__main__":
+    import sys
+    from src.db.mongodb import get_mongo_client
+
+    mongo = get_mongo_client()
+    if not mongo.wait_until_ready():
+        print("[MongoDB] Not connected (set MONGODB_URL)")
+        sys.exit(2)
+    print(f"Backfilled search_text on {backfill_search_text(mongo.db)} analyses")
@@ -1,6 +1,8 @@
 """
 Chainlit MongoDB Data Layer
 Custom data layer for storing threads and messages in MongoDB
+pymongo calls run on the MongoDB executor so a slow round-trip never
+stalls the event loop shared by every open chat stream.
 """
 
 from typing import Dict, List, Optional
@@ -15,6 +17,11 @@ from pymongo import MongoClient
 from bson import ObjectId
 import os
 
+from src.config import MONGODB_ENSURE_INDEXES
+from src.db.indexes import ensure_indexes
+from src.db.mongodb import run_in_db_executor
+from src.db.write_buffer import WriteBehindBuffer
+
 
 class MongoDBDataLayer(BaseDataLayer):
     """MongoDB data layer for Chainlit persistence"""
@@ -24,22 +31,26 @@ class MongoDBDataLayer(BaseDataLayer):
         self.db_name = os.getenv("MONGODB_DB_NAME", "trading-bot")
         self.client = None
         self.db = None
+        # Steps are written behind the request; reads and deletes flush first
+        self.writes = WriteBehindBuffer(lambda: self.db, name="chainlit")
         
         if self.mongodb_url:
             try:
                 self.client = MongoClient(self.mongodb_url, serverSelectionTimeoutMS=5000)
                 self.client.admin.command('ping')
                 self.db = self.client[self.db_name]
+                if MONGODB_ENSURE_INDEXES:
+                    ensure_indexes(self.db)
                 print(f"[ChainlitDataLayer] Connected to MongoDB: {self.db_name}")
             except Exception as e:
                 print(f"[ChainlitDataLayer] MongoDB connection failed: {e}")
     
     async def get_user(self, identifier: str) -> Optional[PersistedUser]:
         """Get user by identifier"""
-        if not self.db:
+        if self.db is None:
             return None
         
-        user_doc = self.db.users.find_one({"identifier": identifier})
+        user_doc = await run_in_db_executor(self.db.users.find_one, {"identifier": identifier})
         if user_doc:
             return PersistedUser(
                 id=str(user_doc["_id"]),
@@ -51,7 +62,7 @@ class MongoDBDataLayer(BaseDataLayer):
     
     async def create_user(self, user: User) -> Optional[PersistedUser]:
         """Create a new user"""
-        if not self.db:
+        if self.db is None:
             return None
         
         user_doc = {
@@ -59,7 +70,7 @@ class MongoDBDataLayer(BaseDataLayer):
             "metadata": user.metadata or {},
             "created_at": datetime.now()
         }
-        result = self.db.users.insert_one(user_doc)
+        result = await run_in_db_executor(self.db.users.insert_one, user_doc)
         
         return PersistedUser(
             id=str(result.inserted_id),
@@ -77,7 +88,7 @@ class MongoDBDataLayer(BaseDataLayer):
         tags: Optional[List[str]] = None,
     ):
         """Update or create a thread"""
-        if not self.db:
+        if self.db is None:
             return
         
         update_doc = {"updated_at": datetime.now()}
@@ -90,7 +101,8 @@ class MongoDBDataLayer(BaseDataLayer):
         if tags:
             update_doc["tags"] = tags
         
-        self.db.threads.update_one(
+        await run_in_db_executor(
+            self.db.threads.update_one,
             {"thread_id": thread_id},
             {
                 "$set": update_doc,
@@ -101,16 +113,13 @@ class MongoDBDataLayer(BaseDataLayer):
     
     async def get_thread(self, thread_id: str) -> Optional[ThreadDict]:
         """Get a thread by ID"""
-        if not self.db:
+        if self.db is None:
             return None
         
-        thread_doc = self.db.threads.find_one({"thread_id": thread_id})
+        thread_doc, steps = await run_in_db_executor(self._load_thread, thread_id)
         if not thread_doc:
             return None
         
-        # Get steps for this thread
-        steps = list(self.db.steps.find({"thread_id": thread_id}).sort("created_at", 1))
-        
         return ThreadDict(
             id=thread_doc["thread_id"],
             name=thread_doc.get("name", "Untitled"),
@@ -124,33 +133,33 @@ class MongoDBDataLayer(BaseDataLayer):
     
     async def get_thread_author(self, thread_id: str) -> str:
         """Get the author of a thread"""
-        if not self.db:
+        if self.db is None:
             return ""
         
-        thread_doc = self.db.threads.find_one({"thread_id": thread_id})
+        thread_doc = await run_in_db_executor(self.db.threads.find_one, {"thread_id": thread_id})
         return thread_doc.get("user_id", "") if thread_doc else ""
     
     async def delete_thread(self, thread_id: str):
         """Delete a thread and its steps"""
-        if not self.db:
+        if self.db is None:
             return
         
-        self.db.threads.delete_one({"thread_id": thread_id})
-        self.db.steps.delete_many({"thread_id": thread_id})
+        await run_in_db_executor(self._delete_thread, thread_id)
     
     async def list_threads(
         self, pagination: Pagination, filters: Dict
     ) -> PaginatedResponse[ThreadDict]:
         """List threads with pagination"""
-        if not self.db:
+        if self.db is None:
             return PaginatedResponse(data=[], pageInfo={"hasNextPage": False})
         
         query = {}
         if "userId" in filters:
             query["user_id"] = filters["userId"]
         
-        cursor = self.db.threads.find(query).sort("updated_at", -1).limit(pagination.first + 1)
-        threads = list(cursor)
+        threads = await run_in_db_executor(
+            lambda: list(self.db.threads.find(query).sort("updated_at", -1).limit(pagination.first + 1))
+        )
         
         has_next = len(threads) > pagination.first
         if has_next:
@@ -176,7 +185,7 @@ class MongoDBDataLayer(BaseDataLayer):
     
     async def create_step(self, step_dict: StepDict):
         """Create a step"""
-        if not self.db:
+        if self.db is None:
             return
         
         step_doc = {
@@ -192,14 +201,16 @@ class MongoDBDataLayer(BaseDataLayer):
             "end_time": step_dict.get("endTime"),
             "metadata": step_dict.get("metadata", {})
         }
-        self.db.steps.insert_one(step_doc)
+        await self._queue(self.writes.insert, "steps", step_doc)
     
     async def update_step(self, step_dict: StepDict):
         """Update a step"""
-        if not self.db:
+        if self.db is None:
             return
         
-        self.db.steps.update_one(
+        await self._queue(
+            self.writes.update,
+            "steps",
             {"step_id": step_dict.get("id")},
             {"$set": {
                 "output": step_dict.get("output"),
@@ -210,10 +221,18 @@ class MongoDBDataLayer(BaseDataLayer):
     
     async def delete_step(self, step_id: str):
         """Delete a step"""
-        if not self.db:
+        if self.db is None:
             return
         
-        self.db.steps.delete_one({"step_id": step_id})
+        await run_in_db_executor(self._delete_step, step_id)
+    
+    async def get_favorite_steps(self, user_id: str) -> List[StepDict]:
+        """Get steps the user marked as favorite"""
+        if self.db is None:
+            return []
+        
+        steps = await run_in_db_executor(self._load_favorite_steps, user_id)
+        return [self._step_doc_to_dict(s) for s in steps]
     
     async def create_element(self, element: ElementDict):
         """Create an element"""
@@ -229,10 +248,11 @@ class MongoDBDataLayer(BaseDataLayer):
     
     async def upsert_feedback(self, feedback: Feedback) -> str:
         """Upsert feedback"""
-        if not self.db:
+        if self.db is None:
             return ""
         
-        result = self.db.feedback.update_one(
+        result = await run_in_db_executor(
+            self.db.feedback.update_one,
             {"step_id": feedback.forId},
             {"$set": {"value": feedback.value, "comment": feedback.comment}},
             upsert=True
@@ -241,12 +261,43 @@ class MongoDBDataLayer(BaseDataLayer):
     
     async def delete_feedback(self, feedback_id: str) -> bool:
         """Delete feedback"""
-        if not self.db:
+        if self.db is None:
             return False
         
-        result = self.db.feedback.delete_one({"_id": ObjectId(feedback_id)})
+        result = await run_in_db_executor(self.db.feedback.delete_one, {"_id": ObjectId(feedback_id)})
         return result.deleted_count > 0
     
+    async def _queue(self, method, *args):
+        """Queue a write; with the buffer disabled it is written through on the MongoDB executor"""
+        if self.writes.enabled:
+            method(*args)
+        else:
+            await run_in_db_executor(method, *args)
+    
+    def _load_thread(self, thread_id: str):
+        """Thread document and its steps in one executor hop"""
+        self.writes.flush()
+        thread_doc = self.db.threads.find_one({"thread_id": thread_id})
+        if not thread_doc:
+            return None, []
+        return thread_doc, list(self.db.steps.find({"thread_id": thread_id}).sort("created_at", 1))
+    
+    def _delete_thread(self, thread_id: str):
+        self.writes.flush()
+        self.db.threads.delete_one({"thread_id": thread_id})
+        self.db.steps.delete_many({"thread_id": thread_id})
+    
+    def _delete_step(self, step_id: str):
+        self.writes.flush()
+        self.db.steps.delete_one({"step_id": step_id})
+    
+    def _load_favorite_steps(self, user_id: str) -> List[Dict]:
+        self.writes.flush()
+        thread_ids = self.db.threads.distinct("thread_id", {"user_id": user_id})
+        return list(self.db.steps.find(
+            {"thread_id": {"$in": thread_ids}, "metadata.favorite": True}
+        ).sort("created_at", -1))
+    
     def _step_doc_to_dict(self, step_doc: Dict) -> StepDict:
         """Convert MongoDB document to StepDict"""
         return StepDict(
@@ -268,6 +319,7 @@ class MongoDBDataLayer(BaseDataLayer):
     
     async def close(self):
         """Close the connection"""
+        await run_in_db_executor(self.writes.close)
         if self.client:
-            self.client.close()
+            await run_in_db_executor(self.client.close)
             print("[ChainlitDataLayer] MongoDB connection closed")
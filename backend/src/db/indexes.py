@@ -0,0 +1,150 @@
+"""
+MongoDB Indexes - Declared indexes for every hot query, created at startup
+ensure_indexes() creates them idempotently; verify_query_plans() runs
+explain() on each hot query and reports any that scan the collection or
+sort in memory. Run `python -m src.db.indexes` to create and verify
+against MONGODB_URL (exit code 1 if a query is not index-backed).
+"""
+
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+# collection -> [(keys, options)]
+INDEXES = {
+    # MongoDBClient: latest / history by ticker, global history, AnalysisCache warm-up
+    "analyses": [
+        ([("ticker", ASCENDING), ("analysis_date", DESCENDING)], {"name": "ticker_date"}),
+        ([("analysis_date", DESCENDING)], {"name": "date"}),
+        # search_analyses: Thai is pre-tokenized into search_text (see analysis_search.py)
+        ([("search_text", "text")], {"name": "search_text", "default_language": "none",
+                                     "language_override": "search_language"}),
+    ],
+    # MongoDBClient: conversation history by session or ticker, oldest first
+    "chat_messages": [
+        ([("session_id", ASCENDING), ("timestamp", ASCENDING)], {"name": "session_time"}),
+        ([("ticker", ASCENDING), ("timestamp", ASCENDING)], {"name": "ticker_time"}),
+    ],
+    # MongoDBDataLayer (Chainlit persistence)
+    "threads": [
+        ([("thread_id", ASCENDING)], {"name": "thread_id"}),
+        ([("user_id", ASCENDING), ("updated_at", DESCENDING)], {"name": "user_updated"}),
+        ([("updated_at", DESCENDING)], {"name": "updated"}),
+    ],
+    "steps": [
+        ([("thread_id", ASCENDING), ("created_at", ASCENDING)], {"name": "thread_created"}),
+        ([("step_id", ASCENDING)], {"name": "step_id"}),
+    ],
+    "users": [
+        ([("identifier", ASCENDING)], {"name": "identifier"}),
+    ],
+    "feedback": [
+        ([("step_id", ASCENDING)], {"name": "step_id"}),
+    ],
+}
+
+# Hot queries checked by verify_query_plans: (name, collection, filter, sort)
+HOT_QUERIES = [
+    ("latest_analysis", "analyses", {"ticker": "AAPL"}, [("analysis_date", DESCENDING)]),
+    ("analyses_history", "analyses", {}, [("analysis_date", DESCENDING)]),
+    ("search_analyses", "analyses", {"$text": {"$search": '"aapl"'}}, None),
+    ("chat_history", "chat_messages", {"session_id": "s"}, [("timestamp", ASCENDING)]),
+    ("ticker_chat_history", "chat_messages", {"ticker": "AAPL"}, [("timestamp", ASCENDING)]),
+    ("thread", "threads", {"thread_id": "t"}, None),
+    ("user_threads", "threads", {"user_id": "u"}, [("updated_at", DESCENDING)]),
+    ("all_threads", "threads", {}, [("updated_at", DESCENDING)]),
+    ("thread_steps", "steps", {"thread_id": "t"}, [("created_at", ASCENDING)]),
+    ("step", "steps", {"step_id": "s"}, None),
+    ("user", "users", {"identifier": "u"}, None),
+    ("feedback", "feedback", {"step_id": "s"}, None),
+]
+
+# Plan stages that mean the query is not served by an index
+_UNINDEXED_STAGES = {"COLLSCAN", "SORT"}
+
+
+def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+    Create every declared index (existing ones are left as they are)
+
+    Args:
+        db: pymongo Database
+
+    Returns:
+        collection -> names of the indexes ensured
+    """
+    created = {}
+    for collection, specs in INDEXES.items():
+        for keys, options in specs:
+            try:
+                created.setdefault(collection, []).append(db[collection].create_index(keys, **options))
+            except OperationFailure as e:
+                # e.g. an index on the same keys already exists under another name
+                print(f"[MongoDB] Index {collection}.{options.get('name')} not created: {e}")
+    return created
+
+
+def plan_stages(plan) -> List[str]:
+    """Every stage name in an explain() plan tree (classic and SBE formats)"""
+    stages = []
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages += plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            stages += plan_stages(item)
+    return stages
+
+
+def verify_query_plans(db) -> List[Dict]:
+    """
+    explain() every hot query
+
+    Returns:
+        one dict per query: name, collection, stages of the winning plan and
+        index_backed (False if it scans the collection or sorts in memory)
+    """
+    results = []
+    for name, collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query).limit(50)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = plan_stages(winning)
+        results.append({
+            "name": name,
+            "collection": collection,
+            "stages": stages,
+            "index_backed": any(stage.endswith("IXSCAN") or stage == "IDHACK" for stage in stages)
+                            and not _UNINDEXED_STAGES & set(stages),
+        })
+    return results
+
+
+def check_indexes(db):
+    """Ensure indexes, then raise RuntimeError if any hot query is not index-backed"""
+    ensure_indexes(db)
+    failing = [r for r in verify_query_plans(db) if not r["index_backed"]]
+    if failing:
+        details = ", ".join(f"{r['name']} ({'/'.join(r['stages'])})" for r in failing)
+        raise RuntimeError(f"Queries not backed by an index: {details}")
+
+
+if __name__ == "__main__":
+    import sys
+    from src.db.mongodb import get_mongo_client
+
+    mongo = get_mongo_client()
+    if not mongo.wait_until_ready():
+        print("[MongoDB] Not connected (set MONGODB_URL)")
+        sys.exit(2)
+    print(f"Indexes: {ensure_indexes(mongo.db)}")
+    ok = True
+    for result in verify_query_plans(mongo.db):
+        ok &= result["index_backed"]
+        status = "ok  " if result["index_backed"] else "FAIL"
+        print(f"  {status} {result['collection']:<14} {result['name']:<20} {' > '.join(result['stages'])}")
+    sys.exit(0 if ok else 1)
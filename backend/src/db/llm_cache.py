@@ -0,0 +1,319 @@
+"""
+LLM Response Cache - Reuse completions for unchanged prompts
+Keyed on provider + model + agent + normalized prompt hash. An in-memory
+LRU tier sits in front of a persistent tier (local disk or MongoDB), so
+repeat analyses of unchanged inputs skip the LLM across restarts.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from src.config import (
+    LLM_CACHE_BACKEND, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_DIR, LLM_CACHE_SIGNIFICANT_DIGITS
+)
+
+_WHITESPACE_RE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+_DECIMAL_RE = re.compile(r"(?<![\w.])(-?\d+\.\d+)(?![\w.])")
+# Standalone integers; parts of dates, times, versions and exponents are left alone
+_INTEGER_RE = re.compile(r"(?<![\w.:/+-])(?<!\d,)(-?[1-9]\d*)(?![\w:/-])(?![.,]\d)")
+
+# Responses that signal a failed call - never cached
+_ERROR_RESPONSES = {"Error generating response."}
+
+
+def _round_integer(number: str, digits: int) -> str:
+    length = len(number.lstrip("-"))
+    return str(round(int(number), digits - length)) if length > digits else number
+
+
+def normalize_prompt(text: str, digits: int = LLM_CACHE_SIGNIFICANT_DIGITS) -> str:
+    """
+    Canonical form of a prompt for cache keys
+
+    Unicode NFC, trimmed lines, collapsed runs of spaces and blank lines,
+    and (digits > 0) numbers rounded to that many significant figures, so
+    54.2313 and 54.2318 match while 0.004 and 0.001 do not. Integers are
+    rounded the same way (12345678 and 12345679 both become 12350000);
+    ones with at most `digits` digits (years, periods, counts) are exact.
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    text = "\n".join(_WHITESPACE_RE.sub(" ", line).strip() for line in text.strip().splitlines())
+    text = _BLANK_LINES_RE.sub("\n\n", text)
+    if digits > 0:
+        text = _DECIMAL_RE.sub(lambda m: f"{float(m.group(1)):.{digits}g}", text)
+        text = _INTEGER_RE.sub(lambda m: _round_integer(m.group(1), digits), text)
+    return text
+
+
+def make_cache_key(provider: str, model: str, agent: str,
+                   system_prompt: str, user_prompt: str) -> str:
+    """sha256 over the call identity and the normalized prompts"""
+    digest = hashlib.sha256()
+    for part in (provider, model, agent, normalize_prompt(system_prompt), normalize_prompt(user_prompt)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class _DiskTier:
+    """One JSON file per entry under <root>/<key[:2]>/<key>.json"""
+
+    PRUNE_EVERY = 100  # writes between expiry / size sweeps
+
+    def __init__(self, root: str, max_entries: int, ttl_seconds: float):
+        self.root = root
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._writes = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[LLMCache] Error reading {path}: {e}")
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            self._remove(path)
+            return None
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"[LLMCache] Error writing {path}: {e}")
+            self._remove(tmp)
+            return
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop expired entries, then the least recently written beyond max_entries"""
+        now = time.time()
+        files = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        files.append((os.path.getmtime(path), path))
+                    except OSError:
+                        pass
+        files.sort()
+        excess = max(len(files) - self.max_entries, 0)
+        for i, (mtime, path) in enumerate(files):
+            if i < excess or mtime + self.ttl_seconds < now:
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class _MongoTier:
+    """llm_cache collection; MongoDB's TTL monitor deletes expired documents"""
+
+    COLLECTION = "llm_cache"
+
+    def __init__(self, mongo):
+        self.mongo = mongo
+        self._indexed = False
+
+    def _collection(self):
+        if not self.mongo.is_connected():
+            return None
+        collection = self.mongo.db[self.COLLECTION]
+        if not self._indexed:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            collection = self._collection()
+            doc = collection.find_one({"_id": key}) if collection is not None else None
+        except Exception as e:
+            print(f"[LLMCache] MongoDB read error: {e}")
+            return None
+        if not doc:
+            return None
+        # pymongo returns naive UTC datetimes; .timestamp() would read them as local time
+        expires_at = doc["expires_at"].replace(tzinfo=timezone.utc)
+        if expires_at < datetime.now(timezone.utc):
+            return None
+        doc["expires_at"] = expires_at.timestamp()
+        return doc
+
+    def put(self, key: str, entry: Dict):
+        try:
+            collection = self._collection()
+            if collection is not None:
+                doc = {**entry, "_id": key, "expires_at": datetime.fromtimestamp(entry["expires_at"], timezone.utc)}
+                collection.replace_one({"_id": key}, doc, upsert=True)
+        except Exception as e:
+            print(f"[LLMCache] MongoDB write error: {e}")
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM responses
+
+    The memory tier is an LRU bounded by max_entries; the persistent tier
+    ("disk" or "mongo") survives restarts and is shared by processes that
+    point at the same directory / database.
+    """
+
+    def __init__(self, backend: str = LLM_CACHE_BACKEND, ttl_seconds: float = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, cache_dir: str = LLM_CACHE_DIR):
+        self.backend = backend if ttl_seconds > 0 else ""
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        self._store = None
+        if self.backend == "disk":
+            self._store = _DiskTier(cache_dir, max_entries, ttl_seconds)
+        elif self.backend == "mongo":
+            from src.db.mongodb import get_mongo_client
+            self._store = _MongoTier(get_mongo_client())
+
+    def is_enabled(self) -> bool:
+        """Check if caching is turned on (backend "memory", "disk" or "mongo")"""
+        return bool(self.backend)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for a key, or None"""
+        if not self.is_enabled():
+            return None
+        entry = self._memory_get(key)
+        if entry is None and self._store is not None:
+            entry = self._store.get(key)
+            if entry is not None:
+                self._memory_put(key, entry)
+        return self._count(entry)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async variant of get (the persistent tier is read in a worker thread)"""
+        if not self.is_enabled():
+            return None
+        entry = self._memory_get(key)
+        if entry is None and self._store is not None:
+            entry = await asyncio.to_thread(self._store.get, key)
+            if entry is not None:
+                self._memory_put(key, entry)
+        return self._count(entry)
+
+    def put(self, key: str, response: str, **meta):
+        """Cache a response (errors and empty responses are skipped)"""
+        entry = self._entry(response, meta)
+        if entry is None:
+            return
+        self.stores += 1
+        self._memory_put(key, entry)
+        if self._store is not None:
+            self._store.put(key, entry)
+
+    async def aput(self, key: str, response: str, **meta):
+        """Async variant of put"""
+        entry = self._entry(response, meta)
+        if entry is None:
+            return
+        self.stores += 1
+        self._memory_put(key, entry)
+        if self._store is not None:
+            await asyncio.to_thread(self._store.put, key, entry)
+
+    def clear_memory(self):
+        """Drop the in-memory tier (the persistent tier is kept)"""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend or "off",
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._memory),
+            }
+
+    # ---- internals ----
+
+    def _entry(self, response: str, meta: Dict) -> Optional[Dict]:
+        if not self.is_enabled() or not response or not response.strip() or response in _ERROR_RESPONSES:
+            return None
+        now = time.time()
+        return {"response": response, "created_at": now, "expires_at": now + self.ttl_seconds, **meta}
+
+    def _memory_get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry
+
+    def _memory_put(self, key: str, entry: Dict):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _count(self, entry: Optional[Dict]) -> Optional[str]:
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["response"]
+
+
+# Singleton instance
+_llm_cache = None
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get or create the LLM response cache singleton"""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -3,17 +3,46 @@ MongoDB Client for Chat History Storage
 Stores analyses and chat messages for retrieval
 """
 
+import asyncio
+import functools
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Any, Callable, Optional, List, Dict, Union
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
+from bson import ObjectId
 from dotenv import load_dotenv
 
+from src.config import MONGODB_ENSURE_INDEXES, MONGODB_EXECUTOR_THREADS
+from src.db.analysis_search import build_filter, build_search_text, to_hit
+from src.db.indexes import ensure_indexes
+from src.db.write_buffer import WriteBehindBuffer
+
 # Load environment from project root (.env in Ai-project/)
 _project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 load_dotenv(os.path.join(_project_root, '.env'))
 
+_db_executor = None
+_db_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Get or create the bounded thread pool that runs pymongo calls for async callers"""
+    global _db_executor
+    with _db_executor_lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(max_workers=MONGODB_EXECUTOR_THREADS,
+                                              thread_name_prefix="mongodb")
+        return _db_executor
+
+
+async def run_in_db_executor(fn: Callable, *args, **kwargs) -> Any:
+    """Await a blocking pymongo call without holding up the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(fn, *args, **kwargs))
+
 
 class MongoDBClient:
     """MongoDB client for storing and retrieving chat history"""
@@ -23,28 +52,52 @@ class MongoDBClient:
         self.db_name = os.getenv("MONGODB_DB_NAME", "chat-ui")
         self.client = None
         self.db = None
+        self._ready = threading.Event()
+        # Analyses and chat messages are written behind the request
+        self.writes = WriteBehindBuffer(lambda: self.db, name="mongodb")
         
         if self.mongodb_url:
-            try:
-                self.client = MongoClient(self.mongodb_url, serverSelectionTimeoutMS=5000)
-                # Test connection
-                self.client.admin.command('ping')
-                self.db = self.client[self.db_name]
-                print(f"[MongoDB] Connected to database: {self.db_name}")
-            except Exception as e:
-                print(f"[MongoDB] Connection failed: {e}")
-                print("[MongoDB] Continuing without database persistence")
-                self.client = None
-                self.db = None
+            # Connect in the background: an unreachable server must not hold up startup.
+            # Until the ping succeeds is_connected() is False and callers skip persistence.
+            threading.Thread(target=self._connect, name="mongodb-connect", daemon=True).start()
         else:
             print("[MongoDB] MONGODB_URL not found in environment")
+            self._ready.set()
+    
+    def _connect(self):
+        try:
+            client = MongoClient(self.mongodb_url, serverSelectionTimeoutMS=5000)
+            # Test connection
+            client.admin.command('ping')
+            db = client[self.db_name]
+            if MONGODB_ENSURE_INDEXES:
+                ensure_indexes(db)
+            self.client = client
+            self.db = db
+            print(f"[MongoDB] Connected to database: {self.db_name}")
+        except Exception as e:
+            print(f"[MongoDB] Connection failed: {e}")
+            print("[MongoDB] Continuing without database persistence")
+        finally:
+            self._ready.set()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the background connection attempt has finished
+        
+        Returns:
+            True if MongoDB is connected
+        """
+        self._ready.wait(timeout)
+        return self.is_connected()
     
     def is_connected(self) -> bool:
         """Check if MongoDB is connected"""
         return self.db is not None
     
     def save_analysis(self, ticker: str, final_decision: str, report_content: str, 
-                      sections: Optional[Dict] = None) -> Optional[str]:
+                      sections: Optional[Dict] = None,
+                      fingerprint: Optional[str] = None) -> Optional[str]:
         """
         Save stock analysis to MongoDB
         
@@ -53,6 +106,7 @@ class MongoDBClient:
             final_decision: BUY/SELL/HOLD
             report_content: Full report content
             sections: Optional dict with individual sections
+            fingerprint: Optional market-data fingerprint used by the analysis cache
             
         Returns:
             Inserted document ID or None if failed
@@ -66,16 +120,26 @@ class MongoDBClient:
                 "analysis_date": datetime.now(),
                 "final_decision": final_decision,
                 "report_content": report_content,
-                "sections": sections or {}
+                "sections": sections or {},
+                "fingerprint": fingerprint,
+                "search_text": build_search_text(ticker.upper(), final_decision, report_content)
             }
             
-            result = self.db.analyses.insert_one(doc)
-            print(f"[MongoDB] Saved analysis for {ticker}: {result.inserted_id}")
-            return str(result.inserted_id)
+            doc["_id"] = ObjectId()
+            self.writes.insert("analyses", doc)
+            print(f"[MongoDB] Queued analysis for {ticker}: {doc['_id']}")
+            return str(doc["_id"])
         except Exception as e:
             print(f"[MongoDB] Error saving analysis: {e}")
             return None
     
+    async def asave_analysis(self, ticker: str, final_decision: str, report_content: str,
+                             sections: Optional[Dict] = None,
+                             fingerprint: Optional[str] = None) -> Optional[str]:
+        """Async variant of save_analysis (runs on the MongoDB executor)"""
+        return await run_in_db_executor(self.save_analysis, ticker, final_decision, report_content,
+                                        sections, fingerprint)
+    
     def get_latest_analysis(self, ticker: str) -> Optional[Dict]:
         """
         Get the most recent analysis for a ticker
@@ -90,8 +154,15 @@ class MongoDBClient:
             return None
         
         try:
+            # An analysis still in the write buffer is newer than anything stored
+            queued = self.writes.pending("analyses", lambda d: d.get("ticker") == ticker.upper())
+            if queued:
+                doc = dict(max(queued, key=lambda d: d["analysis_date"]))
+                doc.pop("search_text", None)
+                return doc
             doc = self.db.analyses.find_one(
                 {"ticker": ticker.upper()},
+                {"search_text": 0},
                 sort=[("analysis_date", -1)]
             )
             return doc
@@ -99,6 +170,10 @@ class MongoDBClient:
             print(f"[MongoDB] Error getting analysis: {e}")
             return None
     
+    async def aget_latest_analysis(self, ticker: str) -> Optional[Dict]:
+        """Async variant of get_latest_analysis"""
+        return await run_in_db_executor(self.get_latest_analysis, ticker)
+    
     def get_analyses_history(self, ticker: Optional[str] = None, limit: int = 10) -> List[Dict]:
         """
         Get analysis history
@@ -115,12 +190,16 @@ class MongoDBClient:
         
         try:
             query = {"ticker": ticker.upper()} if ticker else {}
-            cursor = self.db.analyses.find(query).sort("analysis_date", -1).limit(limit)
+            cursor = self.db.analyses.find(query, {"search_text": 0}).sort("analysis_date", -1).limit(limit)
             return list(cursor)
         except Exception as e:
             print(f"[MongoDB] Error getting history: {e}")
             return []
     
+    async def aget_analyses_history(self, ticker: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """Async variant of get_analyses_history"""
+        return await run_in_db_executor(self.get_analyses_history, ticker, limit)
+    
     def save_message(self, session_id: str, ticker: str, role: str, content: str) -> Optional[str]:
         """
         Save a chat message
@@ -146,12 +225,17 @@ class MongoDBClient:
                 "timestamp": datetime.now()
             }
             
-            result = self.db.chat_messages.insert_one(doc)
-            return str(result.inserted_id)
+            doc["_id"] = ObjectId()
+            self.writes.insert("chat_messages", doc)
+            return str(doc["_id"])
         except Exception as e:
             print(f"[MongoDB] Error saving message: {e}")
             return None
     
+    async def asave_message(self, session_id: str, ticker: str, role: str, content: str) -> Optional[str]:
+        """Async variant of save_message"""
+        return await run_in_db_executor(self.save_message, session_id, ticker, role, content)
+    
     def get_chat_history(self, session_id: str, limit: int = 50) -> List[Dict]:
         """
         Get chat history for a session
@@ -174,6 +258,10 @@ class MongoDBClient:
         except Exception as e:
             print(f"[MongoDB] Error getting chat history: {e}")
             return []
+    
+    async def aget_chat_history(self, session_id: str, limit: int = 50) -> List[Dict]:
+        """Async variant of get_chat_history"""
+        return await run_in_db_executor(self.get_chat_history, session_id, limit)
 
     def get_chat_history_by_ticker(self, ticker: str, limit: int = 50) -> List[Dict]:
         """
@@ -192,30 +280,59 @@ class MongoDBClient:
             print(f"[MongoDB] Error getting ticker chat history: {e}")
             return []
     
-    def search_analyses(self, query: str, limit: int = 5) -> List[Dict]:
+    async def aget_chat_history_by_ticker(self, ticker: str, limit: int = 50) -> List[Dict]:
+        """Async variant of get_chat_history_by_ticker"""
+        return await run_in_db_executor(self.get_chat_history_by_ticker, ticker, limit)
+    
+    def search_analyses(self, query: str = "", limit: int = 5, page: int = 1,
+                        ticker: Optional[str] = None, decision: Optional[str] = None,
+                        date_from: Union[str, datetime, None] = None,
+                        date_to: Union[str, datetime, None] = None) -> Dict:
         """
-        Search analyses by text
+        Full-text search over analyses (text index on search_text)
         
         Args:
-            query: Search query
-            limit: Max results
+            query: Search words, Thai or English; all must match (empty = filters only)
+            limit: Hits per page
+            page: 1-based page number
+            ticker: Optional ticker to filter by
+            decision: Optional BUY/SELL/HOLD to filter by
+            date_from: Optional earliest analysis date (datetime or ISO string)
+            date_to: Optional latest analysis date (datetime or ISO string)
             
         Returns:
-            List of matching analyses
+            {"hits": [...], "page", "page_size", "has_next"}; hits are ranked by
+            relevance, then newest first, each with a snippet around the match
         """
+        result = {"hits": [], "page": page, "page_size": limit, "has_next": False}
         if not self.is_connected():
-            return []
+            return result
         
         try:
-            # Simple text search in report content
-            cursor = self.db.analyses.find(
-                {"report_content": {"$regex": query, "$options": "i"}}
-            ).sort("analysis_date", -1).limit(limit)
-            return list(cursor)
+            criteria = build_filter(query, ticker, decision, date_from, date_to)
+            projection = {"ticker": 1, "analysis_date": 1, "final_decision": 1, "report_content": 1}
+            sort = [("analysis_date", -1)]
+            if "$text" in criteria:
+                projection["score"] = {"$meta": "textScore"}
+                sort.insert(0, ("score", {"$meta": "textScore"}))
+            # One extra document tells whether there is a next page
+            cursor = self.db.analyses.find(criteria, projection).sort(sort) \
+                .skip((max(page, 1) - 1) * limit).limit(limit + 1)
+            docs = list(cursor)
+            result["has_next"] = len(docs) > limit
+            result["hits"] = [to_hit(doc, query) for doc in docs[:limit]]
+            return result
         except Exception as e:
             print(f"[MongoDB] Error searching: {e}")
-            return []
-
+            return result
+    
+    async def asearch_analyses(self, query: str = "", limit: int = 5, page: int = 1,
+                               ticker: Optional[str] = None, decision: Optional[str] = None,
+                               date_from: Union[str, datetime, None] = None,
+                               date_to: Union[str, datetime, None] = None) -> Dict:
+        """Async variant of search_analyses"""
+        return await run_in_db_executor(self.search_analyses, query, limit, page,
+                                        ticker, decision, date_from, date_to)
 
 # Singleton instance
 _mongo_client = None
@@ -0,0 +1,215 @@
+"""
+Session Store - Per-conversation context for follow-up questions
+Each conversation keeps its last analysis (ticker, decision, report and the
+full final graph state). An in-memory LRU tier with TTL sits in front of an
+optional shared tier (shared state or MongoDB), so follow-ups work across
+workers and restarts.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.config import SESSION_BACKEND, SESSION_TTL, SESSION_MAX_ENTRIES
+
+
+def derive_session_id(messages: Iterable[Tuple[str, str]], explicit: Optional[str] = None,
+                      user: Optional[str] = None) -> Optional[str]:
+    """
+    Conversation ID for a chat request
+
+    An explicit ID (header / request field) wins. With only the client's user
+    field, the ID hashes it with the system prompt and first user message,
+    which OpenAI-style clients resend unchanged on every turn. Without either
+    there is no way to tell two users' conversations apart (both may open with
+    "AAPL"), so the request gets no ID and no follow-up context.
+
+    Args:
+        messages: (role, content) pairs of the request, oldest first
+        explicit: Conversation ID supplied by the client, if any
+        user: OpenAI "user" field, if any
+
+    Returns:
+        session ID, or None when the client identifies neither
+    """
+    if explicit and explicit.strip():
+        return explicit.strip()
+    if not user or not user.strip():
+        return None
+    system = next((content for role, content in messages if role == "system"), "")
+    first = next((content for role, content in messages if role == "user"), "")
+    digest = hashlib.sha256()
+    for part in (user.strip(), system, first):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:32]
+
+
+def _to_document(value: Any) -> Any:
+    """Graph state -> BSON-safe structure (numpy scalars, timestamps etc. become strings)"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+class SessionStore:
+    """
+    Last analysis per conversation
+
+    The memory tier is an LRU bounded by max_entries with a sliding TTL;
+    with backend "shared" or "mongo" every write also goes to the shared
+    state / sessions collection, which other workers read on a local miss.
+    """
+
+    COLLECTION = "sessions"
+
+    def __init__(self, backend: str = SESSION_BACKEND, ttl_seconds: float = SESSION_TTL,
+                 max_entries: int = SESSION_MAX_ENTRIES, mongo=None):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._indexed = False
+
+        self.mongo = None
+        self.shared = None
+        if backend == "mongo":
+            if mongo is None:
+                from src.db.mongodb import get_mongo_client
+                mongo = get_mongo_client()
+            self.mongo = mongo
+        elif backend == "shared":
+            from src.db.shared_state import get_shared_state
+            self.shared = get_shared_state()
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """
+        Last analysis of a conversation
+
+        Returns:
+            dict with ticker, decision, report, state (None for cached reports)
+            and updated_at, or None
+        """
+        session = self._memory_get(session_id)
+        if session is None and self._has_tier():
+            session = self._tier_get(session_id)
+            if session is not None:
+                self._memory_put(session_id, session)
+        return session
+
+    async def aget(self, session_id: str) -> Optional[Dict]:
+        """Async variant of get (the shared tier is read in a worker thread)"""
+        session = self._memory_get(session_id)
+        if session is None and self._has_tier():
+            session = await asyncio.to_thread(self._tier_get, session_id)
+            if session is not None:
+                self._memory_put(session_id, session)
+        return session
+
+    def save(self, session_id: str, ticker: str, report: str, decision: str = "N/A",
+             state: Optional[Dict] = None):
+        """Record the latest analysis of a conversation"""
+        session = self._session(ticker, report, decision, state)
+        self._memory_put(session_id, session)
+        if self._has_tier():
+            self._tier_put(session_id, session)
+
+    async def asave(self, session_id: str, ticker: str, report: str, decision: str = "N/A",
+                    state: Optional[Dict] = None):
+        """Async variant of save"""
+        session = self._session(ticker, report, decision, state)
+        self._memory_put(session_id, session)
+        if self._has_tier():
+            await asyncio.to_thread(self._tier_put, session_id, session)
+
+    def stats(self) -> Dict:
+        """Get store size"""
+        with self._lock:
+            return {"backend": self.backend, "entries": len(self._memory)}
+
+    # ---- internals ----
+
+    @staticmethod
+    def _session(ticker: str, report: str, decision: str, state: Optional[Dict]) -> Dict:
+        return {"ticker": ticker, "decision": decision, "report": report,
+                "state": state, "updated_at": time.time()}
+
+    def _memory_get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._memory.get(session_id)
+            if entry is None:
+                return None
+            if entry["expires_at"] < time.time():
+                del self._memory[session_id]
+                return None
+            # Sliding expiry: an active conversation stays alive
+            entry["expires_at"] = time.time() + self.ttl_seconds
+            self._memory.move_to_end(session_id)
+            return entry["session"]
+
+    def _memory_put(self, session_id: str, session: Dict):
+        with self._lock:
+            self._memory[session_id] = {"session": session, "expires_at": time.time() + self.ttl_seconds}
+            self._memory.move_to_end(session_id)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _has_tier(self) -> bool:
+        return self.mongo is not None or self.shared is not None
+
+    def _tier_get(self, session_id: str) -> Optional[Dict]:
+        if self.shared is not None:
+            return self.shared.get(f"session:{session_id}")
+        return self._mongo_get(session_id)
+
+    def _tier_put(self, session_id: str, session: Dict):
+        if self.shared is not None:
+            self.shared.set(f"session:{session_id}", _to_document(session), self.ttl_seconds)
+        else:
+            self._mongo_put(session_id, session)
+
+    def _collection(self):
+        if not self.mongo.is_connected():
+            return None
+        collection = self.mongo.db[self.COLLECTION]
+        if not self._indexed:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def _mongo_get(self, session_id: str) -> Optional[Dict]:
+        try:
+            collection = self._collection()
+            doc = collection.find_one({"_id": session_id}) if collection is not None else None
+        except Exception as e:
+            print(f"[SessionStore] MongoDB read error: {e}")
+            return None
+        # pymongo returns naive UTC datetimes
+        if not doc or doc["expires_at"].replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
+            return None
+        return {key: doc.get(key) for key in ("ticker", "decision", "report", "state", "updated_at")}
+
+    def _mongo_put(self, session_id: str, session: Dict):
+        try:
+            collection = self._collection()
+            if collection is not None:
+                doc = {**_to_document(session), "_id": session_id,
+                       "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)}
+                collection.replace_one({"_id": session_id}, doc, upsert=True)
+        except Exception as e:
+            print(f"[SessionStore] MongoDB write error: {e}")
+
+
+# Singleton instance
+_session_store = None
+
+def get_session_store() -> SessionStore:
+    """Get or create the session store singleton"""
+    global _session_store
+    if _session_store is None:
+        _session_store = SessionStore()
+    return _session_store
@@ -0,0 +1,328 @@
+"""
+Shared State - Key/value entries and leases visible to every server worker
+Backs the cross-worker parts of the API: cached analyses, conversation
+sessions and the "one pipeline run per ticker" lease. "local" keeps them in
+this process (single worker), "file" in a directory shared by the workers of
+one host, and "mongo" in a collection shared by every host.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from src.config import SHARED_STATE_BACKEND, SHARED_STATE_DIR
+
+# Identifies this process as a lease owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _utc_expiry(ttl_seconds: float) -> datetime:
+    """expires_at for MongoDB: the TTL monitor compares against UTC, so naive local times expire early/late"""
+    return datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+
+
+class LocalSharedState:
+    """In-process stand-in: correct for one worker, nothing is shared"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, Dict] = {}
+
+    def is_shared(self) -> bool:
+        return False
+
+    def get(self, key: str) -> Optional[Any]:
+        """Value of key, or None when missing / expired"""
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry["expires_at"] < time.time():
+                return None
+            return entry["value"]
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        with self._lock:
+            self._values[key] = {"value": value, "expires_at": time.time() + ttl_seconds}
+
+    def delete(self, key: str):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def acquire(self, key: str, ttl_seconds: float, owner: str = WORKER_ID) -> bool:
+        """
+        Take (or extend) the lease on key
+
+        Returns:
+            True if owner now holds the lease, False if someone else does
+        """
+        with self._lock:
+            entry = self._values.get(key)
+            if entry and entry["expires_at"] >= time.time() and entry["value"] != owner:
+                return False
+            self._values[key] = {"value": owner, "expires_at": time.time() + ttl_seconds}
+            return True
+
+    def release(self, key: str, owner: str = WORKER_ID):
+        """Drop the lease if owner holds it"""
+        with self._lock:
+            entry = self._values.get(key)
+            if entry and entry["value"] == owner:
+                del self._values[key]
+
+    def incr(self, key: str, limit: int, ttl_seconds: float) -> Optional[int]:
+        """
+        Count one more use of key unless limit is reached (counter expires after ttl_seconds)
+
+        Returns:
+            the new count, or None if the counter is already at limit
+        """
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry["expires_at"] < time.time():
+                entry = {"value": 0, "expires_at": time.time() + ttl_seconds}
+            if entry["value"] >= limit:
+                return None
+            entry["value"] += 1
+            self._values[key] = entry
+            return entry["value"]
+
+
+class FileSharedState(LocalSharedState):
+    """
+    One JSON file per key in a directory shared by the workers of one host
+    Read-modify-write is serialized with a lock on <root>/.lock (flock on
+    POSIX, msvcrt.locking on Windows).
+    """
+
+    def __init__(self, root: str):
+        super().__init__()
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock_path = os.path.join(root, ".lock")
+
+    def is_shared(self) -> bool:
+        return True
+
+    def _path(self, key: str) -> str:
+        safe = "".join(c if c.isalnum() or c in "-_." else f"%{ord(c):02x}" for c in key)
+        return os.path.join(self.root, f"{safe}.json")
+
+    def _read(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[SharedState] Error reading {key}: {e}")
+            return None
+        return entry if entry.get("expires_at", 0) >= time.time() else None
+
+    def _write(self, key: str, entry: Dict):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, default=str)
+        for attempt in range(50):
+            try:
+                os.replace(tmp, path)
+                return
+            except PermissionError:
+                # Windows refuses to replace a file another worker has open for reading
+                if attempt == 49:
+                    raise
+                time.sleep(0.01)
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    @contextmanager
+    def _flock(self):
+        """Exclusive inter-process lock on <root>/.lock (fcntl on POSIX, msvcrt on Windows)"""
+        with open(self._lock_path, "a+b") as handle:
+            if os.name == "nt":
+                import msvcrt
+
+                handle.seek(0)
+                while True:
+                    try:
+                        # LK_LOCK retries for ~10s before raising; keep waiting like flock does
+                        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+                try:
+                    yield
+                finally:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                yield  # closing the handle releases the lock
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._read(key)
+        return entry["value"] if entry else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        try:
+            self._write(key, {"value": value, "expires_at": time.time() + ttl_seconds})
+        except Exception as e:
+            print(f"[SharedState] Error writing {key}: {e}")
+
+    def delete(self, key: str):
+        self._remove(key)
+
+    def acquire(self, key: str, ttl_seconds: float, owner: str = WORKER_ID) -> bool:
+        with self._lock, self._flock():
+            entry = self._read(key)
+            if entry and entry["value"] != owner:
+                return False
+            self._write(key, {"value": owner, "expires_at": time.time() + ttl_seconds})
+            return True
+
+    def release(self, key: str, owner: str = WORKER_ID):
+        with self._lock, self._flock():
+            entry = self._read(key)
+            if entry and entry["value"] == owner:
+                self._remove(key)
+
+    def incr(self, key: str, limit: int, ttl_seconds: float) -> Optional[int]:
+        with self._lock, self._flock():
+            entry = self._read(key) or {"value": 0, "expires_at": time.time() + ttl_seconds}
+            if entry["value"] >= limit:
+                return None
+            entry["value"] += 1
+            self._write(key, entry)
+            return entry["value"]
+
+
+class MongoSharedState(LocalSharedState):
+    """shared_state collection; MongoDB's TTL monitor deletes expired documents"""
+
+    COLLECTION = "shared_state"
+
+    def __init__(self, mongo=None):
+        super().__init__()
+        if mongo is None:
+            from src.db.mongodb import get_mongo_client
+            mongo = get_mongo_client()
+        self.mongo = mongo
+        self._indexed = False
+
+    def is_shared(self) -> bool:
+        return self.mongo.is_connected()
+
+    def _collection(self):
+        collection = self.mongo.db[self.COLLECTION]
+        if not self._indexed:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.mongo.is_connected():
+            return super().get(key)
+        try:
+            doc = self._collection().find_one({"_id": key, "expires_at": {"$gte": datetime.now(timezone.utc)}})
+        except Exception as e:
+            print(f"[SharedState] MongoDB read error: {e}")
+            return None
+        return doc["value"] if doc else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        if not self.mongo.is_connected():
+            return super().set(key, value, ttl_seconds)
+        try:
+            value = json.loads(json.dumps(value, ensure_ascii=False, default=str))
+            self._collection().replace_one(
+                {"_id": key},
+                {"_id": key, "value": value, "expires_at": _utc_expiry(ttl_seconds)},
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"[SharedState] MongoDB write error: {e}")
+
+    def delete(self, key: str):
+        if not self.mongo.is_connected():
+            return super().delete(key)
+        try:
+            self._collection().delete_one({"_id": key})
+        except Exception as e:
+            print(f"[SharedState] MongoDB delete error: {e}")
+
+    def acquire(self, key: str, ttl_seconds: float, owner: str = WORKER_ID) -> bool:
+        if not self.mongo.is_connected():
+            return super().acquire(key, ttl_seconds, owner)
+        from pymongo.errors import DuplicateKeyError
+
+        now = datetime.now(timezone.utc)
+        try:
+            # Matches a lease we hold or one that expired; upsert creates a missing one
+            self._collection().update_one(
+                {"_id": key, "$or": [{"value": owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"value": owner, "expires_at": _utc_expiry(ttl_seconds)}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False  # held by another worker
+        except Exception as e:
+            print(f"[SharedState] MongoDB lease error: {e}")
+            return True  # fail open: a duplicate run beats a stuck request
+
+    def release(self, key: str, owner: str = WORKER_ID):
+        if not self.mongo.is_connected():
+            return super().release(key, owner)
+        try:
+            self._collection().delete_one({"_id": key, "value": owner})
+        except Exception as e:
+            print(f"[SharedState] MongoDB release error: {e}")
+
+    def incr(self, key: str, limit: int, ttl_seconds: float) -> Optional[int]:
+        if not self.mongo.is_connected():
+            return super().incr(key, limit, ttl_seconds)
+        from pymongo import ReturnDocument
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            # Matches only a counter below limit; at limit the upsert collides with it
+            doc = self._collection().find_one_and_update(
+                {"_id": key, "value": {"$lt": limit}},
+                {"$inc": {"value": 1},
+                 "$setOnInsert": {"expires_at": _utc_expiry(ttl_seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return doc["value"]
+        except DuplicateKeyError:
+            return None
+        except Exception as e:
+            print(f"[SharedState] MongoDB counter error: {e}")
+            return super().incr(key, limit, ttl_seconds)  # fall back to this worker's count
+
+
+# Singleton instance
+_shared_state = None
+
+def get_shared_state() -> LocalSharedState:
+    """Get or create the shared state backend selected by SHARED_STATE_BACKEND"""
+    global _shared_state
+    if _shared_state is None:
+        if SHARED_STATE_BACKEND == "file":
+            _shared_state = FileSharedState(SHARED_STATE_DIR)
+        elif SHARED_STATE_BACKEND == "mongo":
+            _shared_state = MongoSharedState()
+        else:
+            _shared_state = LocalSharedState()
+        print(f"[SharedState] Backend: {SHARED_STATE_BACKEND} (worker {WORKER_ID})")
+    return _shared_state
@@ -0,0 +1,271 @@
+"""
+Write-Behind Buffer - Batched MongoDB writes off the request path
+Chat messages, Chainlit steps and analyses are queued in memory and written
+by a background thread as one ordered bulk_write per collection, whenever
+max_batch operations are waiting or flush_interval has passed. Pending
+writes are flushed on shutdown (server shutdown hook and atexit).
+"""
+
+import atexit
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import AutoReconnect, BulkWriteError, ConnectionFailure
+
+from src.config import (
+    WRITE_BUFFER_ENABLED, WRITE_BUFFER_MAX_BATCH, WRITE_BUFFER_FLUSH_INTERVAL, WRITE_BUFFER_MAX_QUEUE
+)
+from src.tracing import span
+
+# Every buffer created in this process, for /metrics and shutdown
+_buffers = weakref.WeakSet()
+
+# Back-off after a network error before the requeued ops are retried (doubles up to the max)
+_RETRY_MIN_SECONDS = 0.5
+_RETRY_MAX_SECONDS = 30.0
+# Attempts close() makes to write out what is left while the database is unreachable
+_CLOSE_ATTEMPTS = 3
+
+
+class WriteBehindBuffer:
+    """
+    Queue of pending writes for one database
+
+    Operations keep their order within a collection (bulk writes are
+    ordered), so an update queued after an insert of the same document
+    applies after it. Reads of just-written documents may lag by up to
+    flush_interval unless the reader calls flush() first, or looks up the
+    documents still queued for insert with pending().
+
+    Network errors put the unwritten ops back at the head of the queue and
+    retry with back-off. An op the server rejects (BulkWriteError) is
+    dropped; the ops queued after it are retried.
+    """
+
+    def __init__(self, get_db: Callable, name: str = "mongodb",
+                 max_batch: int = WRITE_BUFFER_MAX_BATCH,
+                 flush_interval: float = WRITE_BUFFER_FLUSH_INTERVAL,
+                 max_queue: int = WRITE_BUFFER_MAX_QUEUE,
+                 enabled: bool = WRITE_BUFFER_ENABLED):
+        # get_db returns the pymongo Database, or None while disconnected
+        self.get_db = get_db
+        self.name = name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.enabled = enabled
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        # Batch taken off the queue and being written right now
+        self._writing: List = []
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._retry_at = 0.0
+        self._backoff = _RETRY_MIN_SECONDS
+        self._stats = {"queued": 0, "written": 0, "batches": 0, "errors": 0, "dropped": 0, "retries": 0,
+                       "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0}
+        _buffers.add(self)
+
+    def insert(self, collection: str, doc: Dict):
+        """Queue insert_one(doc); set doc["_id"] first if the caller needs the ID"""
+        self._enqueue(collection, InsertOne(doc), doc)
+
+    def update(self, collection: str, filter: Dict, update: Dict, upsert: bool = False):
+        """Queue update_one(filter, update)"""
+        self._enqueue(collection, UpdateOne(filter, update, upsert=upsert))
+
+    def depth(self) -> int:
+        """Operations waiting to be written"""
+        return len(self._queue)
+
+    def pending(self, collection: str, match: Callable[[Dict], bool]) -> List[Dict]:
+        """Documents queued for insert into collection (not yet written) for which match(doc) is true"""
+        with self._cond:
+            items = list(self._writing) + list(self._queue)
+        return [doc for name, _, doc in items if name == collection and doc is not None and match(doc)]
+
+    def flush(self) -> int:
+        """
+        Write everything queued so far (blocking); stops early on a network
+        error, leaving the rest queued for the retry
+
+        Returns:
+            number of operations written
+        """
+        written = 0
+        with self._flush_lock:
+            while self._queue:
+                batch = self._take(self.max_batch * 10)
+                written += self._write(batch)
+                if self._retry_at:
+                    break
+        return written
+
+    def close(self):
+        """Stop the background thread after a final flush"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=30)
+        for _ in range(_CLOSE_ATTEMPTS):
+            self.flush()
+            if not self._queue:
+                return
+            time.sleep(max(0.0, self._retry_at - time.time()))
+        with self._cond:
+            lost = len(self._queue)
+            self._queue.clear()
+            self._stats["dropped"] += lost
+        print(f"[WriteBuffer] {self.name}: database unreachable at shutdown, {lost} writes lost")
+
+    def stats(self) -> Dict:
+        """Queue depth, throughput and flush latency"""
+        stats = dict(self._stats)
+        total_ms = stats.pop("total_flush_ms")
+        stats["avg_flush_ms"] = round(total_ms / stats["batches"], 1) if stats["batches"] else 0.0
+        stats["depth"] = self.depth()
+        stats["enabled"] = self.enabled
+        return stats
+
+    # ---- internals ----
+
+    def _enqueue(self, collection: str, op, doc: Optional[Dict] = None):
+        if not self.enabled or self._closed:
+            # Write-through, same as before the buffer existed
+            with self._flush_lock:
+                self._write([(collection, op, doc)])
+            return
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                # Database unreachable or far behind: shed the oldest write rather than the request
+                self._queue.popleft()
+                self._stats["dropped"] += 1
+            self._queue.append((collection, op, doc))
+            self._stats["queued"] += 1
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name=f"write-buffer-{self.name}",
+                                                daemon=True)
+                self._thread.start()
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify()
+
+    def _take(self, limit: int) -> List:
+        with self._cond:
+            self._writing = [self._queue.popleft() for _ in range(min(limit, len(self._queue)))]
+            return self._writing
+
+    def _requeue(self, items: List):
+        """Put unwritten ops back at the head of the queue, in their original order"""
+        with self._cond:
+            self._queue.extendleft(reversed(items))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                backoff = self._retry_at - time.time()
+                if not self._closed and (backoff > 0 or len(self._queue) < self.max_batch):
+                    self._cond.wait(max(backoff, self.flush_interval))
+                if self._closed:
+                    return  # close() does the final flush
+                if self._retry_at > time.time():
+                    continue
+            with self._flush_lock:
+                batch = self._take(self.max_batch)
+                if batch:
+                    self._write(batch)
+
+    def _write(self, batch: List) -> int:
+        """One ordered bulk_write per collection; returns operations written"""
+        try:
+            return self._write_batch(batch)
+        finally:
+            with self._cond:
+                self._writing = []
+
+    def _write_batch(self, batch: List) -> int:
+        db = self.get_db()
+        if db is None:
+            self._stats["dropped"] += len(batch)
+            print(f"[WriteBuffer] {self.name}: no database connection, {len(batch)} writes dropped")
+            return 0
+        by_collection: Dict[str, List] = {}
+        for item in batch:
+            by_collection.setdefault(item[0], []).append(item)
+
+        written = 0
+        retry, rest = [], []
+        started = time.perf_counter()
+        with span("write_buffer_flush", "db", buffer=self.name, ops=len(batch)):
+            for collection, items in by_collection.items():
+                if retry:
+                    # Database already failed this round: keep the rest for the retry
+                    retry += items
+                    continue
+                ops = [op for _, op, _ in items]
+                try:
+                    db[collection].bulk_write(ops, ordered=True)
+                    written += len(ops)
+                except BulkWriteError as e:
+                    # Ordered: ops before the failing one were applied, the rest never ran
+                    error = (e.details.get("writeErrors") or [{}])[0]
+                    failed = error.get("index", len(ops))
+                    written += failed
+                    rest += items[failed + 1:]
+                    if failed < len(ops) and error.get("code") == 11000 and isinstance(ops[failed], InsertOne):
+                        # Insert retried after a network error had already applied it
+                        written += 1
+                    elif failed < len(ops):
+                        self._stats["errors"] += 1
+                        self._stats["dropped"] += 1
+                        print(f"[WriteBuffer] {collection}: op {failed} of {len(ops)} rejected, dropped: "
+                              f"{error.get('errmsg', e)}")
+                except (AutoReconnect, ConnectionFailure) as e:
+                    self._stats["errors"] += 1
+                    retry += items
+                    print(f"[WriteBuffer] Network error writing {len(ops)} ops to {collection}, "
+                          f"retrying in {self._backoff:.1f}s: {e}")
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    self._stats["dropped"] += len(ops)
+                    print(f"[WriteBuffer] Error writing {len(ops)} ops to {collection}, dropped: {e}")
+        if retry or rest:
+            self._requeue(rest + retry)
+        if retry:
+            self._stats["retries"] += 1
+            self._retry_at = time.time() + self._backoff
+            self._backoff = min(self._backoff * 2, _RETRY_MAX_SECONDS)
+        else:
+            self._retry_at = 0.0
+            self._backoff = _RETRY_MIN_SECONDS
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats["written"] += written
+        self._stats["batches"] += 1
+        self._stats["last_flush_ms"] = round(elapsed_ms, 1)
+        self._stats["max_flush_ms"] = round(max(self._stats["max_flush_ms"], elapsed_ms), 1)
+        self._stats["total_flush_ms"] += elapsed_ms
+        return written
+
+
+def write_buffer_stats() -> Dict[str, Dict]:
+    """Stats of every write buffer, by name"""
+    return {buffer.name: buffer.stats() for buffer in list(_buffers)}
+
+
+def flush_write_buffers() -> int:
+    """Flush every write buffer (blocking); returns operations written"""
+    return sum(buffer.flush() for buffer in list(_buffers))
+
+
+def close_write_buffers():
+    """Final flush and stop of every write buffer"""
+    for buffer in list(_buffers):
+        buffer.close()
+
+
+atexit.register(close_write_buffers)
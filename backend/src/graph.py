@@ -1,6 +1,6 @@
 import asyncio
+import threading
 from typing import TypedDict, Dict, Any, List
-from langgraph.graph import StateGraph, END
 
 # Import existing agents
 from src.agents.analysts import (
@@ -13,22 +13,41 @@ from src.agents.managers.portfolio_manager import PortfolioManager
 from src.agents.managers.risk_judge import RiskJudge
 from src.agents.debators import RiskyDebator, NeutralDebator, ConservativeDebator
 from src.data.tools import is_crypto
-
-# Initialize agents securely
-market_analyst = MarketAnalyst()
-fundamentals_analyst = FundamentalsAnalyst()
-news_analyst = NewsAnalyst()
-social_analyst = SocialAnalyst()
-risk_analyst = RiskAnalyst()
-bull_researcher = BullResearcher()
-bear_researcher = BearResearcher()
-debate_moderator = DebateModerator()
-portfolio_manager = PortfolioManager()
-risky_debator = RiskyDebator()
-neutral_debator = NeutralDebator()
-conservative_debator = ConservativeDebator()
-risk_judge = RiskJudge()
-crypto_analyst = CryptoAnalyst()
+from src.tracing import traced
+
+class _LazyAgent:
+    """Agent built on first use, so importing the graph (server start, worker respawn) stays cheap"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._agent = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._agent is None:
+            with self._lock:
+                if self._agent is None:
+                    self._agent = self._factory()
+        return self._agent
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+# Initialize agents securely (on first use)
+market_analyst = _LazyAgent(MarketAnalyst)
+fundamentals_analyst = _LazyAgent(FundamentalsAnalyst)
+news_analyst = _LazyAgent(NewsAnalyst)
+social_analyst = _LazyAgent(SocialAnalyst)
+risk_analyst = _LazyAgent(RiskAnalyst)
+bull_researcher = _LazyAgent(BullResearcher)
+bear_researcher = _LazyAgent(BearResearcher)
+debate_moderator = _LazyAgent(DebateModerator)
+portfolio_manager = _LazyAgent(PortfolioManager)
+risky_debator = _LazyAgent(RiskyDebator)
+neutral_debator = _LazyAgent(NeutralDebator)
+conservative_debator = _LazyAgent(ConservativeDebator)
+risk_judge = _LazyAgent(RiskJudge)
+crypto_analyst = _LazyAgent(CryptoAnalyst)
 
 class AgentState(TypedDict):
     ticker: str
@@ -42,10 +61,26 @@ class AgentState(TypedDict):
     bull_analysis: Dict[str, Any]
     bear_analysis: Dict[str, Any]
     debate_outcome: Dict[str, Any]
+    risky_view: Dict[str, Any]
+    conservative_view: Dict[str, Any]
+    neutral_view: Dict[str, Any]
     risk_judgment: Dict[str, Any]
     final_decision: Dict[str, Any]
     final_report: str
 
+def make_initial_state(ticker: str, crypto_flag: bool) -> AgentState:
+    """Build an empty state for a new analysis run"""
+    return {
+        "ticker": ticker,
+        "is_crypto": crypto_flag,
+        "market_data": {}, "fundamentals_data": {}, "news_data": {},
+        "social_data": {}, "risk_data": {}, "crypto_data": {},
+        "bull_analysis": {}, "bear_analysis": {},
+        "debate_outcome": {}, "risky_view": {}, "conservative_view": {}, "neutral_view": {},
+        "risk_judgment": {}, "final_decision": {},
+        "final_report": ""
+    }
+
 def safe_get(result, key: str, default: str = "") -> str:
     """Safely get a value from result which could be dict or string"""
     if isinstance(result, dict):
@@ -64,79 +99,88 @@ def ensure_report_dict(result) -> Dict:
     }
 
 async def analyze_market(state: AgentState):
-    return {"market_data": market_analyst.analyze(state["ticker"])}
+    return {"market_data": await market_analyst.aanalyze(state["ticker"])}
 
 async def analyze_fundamentals(state: AgentState):
-    return {"fundamentals_data": fundamentals_analyst.analyze(state["ticker"])}
+    return {"fundamentals_data": await fundamentals_analyst.aanalyze(state["ticker"])}
 
 async def analyze_news(state: AgentState):
-    return {"news_data": news_analyst.analyze(state["ticker"])}
+    return {"news_data": await news_analyst.aanalyze(state["ticker"])}
 
 async def analyze_social(state: AgentState):
-    return {"social_data": social_analyst.analyze(state["ticker"])}
+    return {"social_data": await social_analyst.aanalyze(state["ticker"])}
 
 async def analyze_risk(state: AgentState):
-    return {"risk_data": risk_analyst.analyze(state["ticker"])}
+    return {"risk_data": await risk_analyst.aanalyze(state["ticker"])}
 
 async def analyze_crypto(state: AgentState):
-    return {"crypto_data": crypto_analyst.analyze(state["ticker"])}
+    return {"crypto_data": await crypto_analyst.aanalyze(state["ticker"])}
 
 async def conduct_research(state: AgentState):
     """Run Bull and Bear researchers in parallel"""
-    bull_task = asyncio.to_thread(
-        bull_researcher.analyze, state["ticker"],
+    bull_task = bull_researcher.aanalyze(
+        state["ticker"],
         state["market_data"], state["fundamentals_data"], state["news_data"]
     )
-    bear_task = asyncio.to_thread(
-        bear_researcher.analyze, state["ticker"],
+    bear_task = bear_researcher.aanalyze(
+        state["ticker"],
         state["market_data"], state["fundamentals_data"], state["news_data"], state["risk_data"]
     )
     bull, bear = await asyncio.gather(bull_task, bear_task)
     return {"bull_analysis": bull, "bear_analysis": bear}
 
 async def moderate_debate(state: AgentState):
-    decision = debate_moderator.moderate(
+    decision = await debate_moderator.amoderate(
         state["ticker"],
         ensure_report_dict(state["bull_analysis"]),
         ensure_report_dict(state["bear_analysis"])
     )
     return {"debate_outcome": decision}
 
-async def judge_risk(state: AgentState):
-    """Run Risk Debators sequence"""
-    # 1. Risky Debator
-    risky_result = risky_debator.debate(
+# Risk branch - one node per debator so each step overlaps with the debate branch
+async def debate_risky(state: AgentState):
+    """1. Risky Debator"""
+    risky_result = await risky_debator.adebate(
         state["ticker"], 
         state["market_data"], state["fundamentals_data"], state["news_data"], 
         ""
     )
-    risky_arg = safe_get(risky_result, "argument", "")
+    return {"risky_view": risky_result}
 
-    # 2. Conservative Debator
-    conservative_result = conservative_debator.debate(
+async def debate_conservative(state: AgentState):
+    """2. Conservative Debator (answers the risky argument)"""
+    risky_arg = safe_get(state["risky_view"], "argument", "")
+    conservative_result = await conservative_debator.adebate(
         state["ticker"], 
         state["market_data"], state["fundamentals_data"], state["news_data"], state["risk_data"],
         risky_arg, ""
     )
-    safe_arg = safe_get(conservative_result, "argument", "")
+    return {"conservative_view": conservative_result}
 
-    # 3. Neutral Debator
-    neutral_result = neutral_debator.debate(
+async def debate_neutral(state: AgentState):
+    """3. Neutral Debator (weighs both sides)"""
+    risky_arg = safe_get(state["risky_view"], "argument", "")
+    safe_arg = safe_get(state["conservative_view"], "argument", "")
+    neutral_result = await neutral_debator.adebate(
         state["ticker"], 
         state["market_data"], state["fundamentals_data"], state["news_data"],
         risky_arg, safe_arg, ""
     )
+    return {"neutral_view": neutral_result}
 
-    # 4. Risk Judge
-    judgment = risk_judge.judge(
+async def judge_risk(state: AgentState):
+    """4. Risk Judge"""
+    judgment = await risk_judge.ajudge(
         state["ticker"],
-        risky_result, conservative_result, neutral_result
+        ensure_report_dict(state["risky_view"]),
+        ensure_report_dict(state["neutral_view"]),
+        ensure_report_dict(state["conservative_view"])
     )
     
     return {"risk_judgment": judgment}
 
 async def make_final_decision(state: AgentState):
-    decision = portfolio_manager.decide(
+    decision = await portfolio_manager.adecide(
         state["ticker"],
         state["market_data"], state["fundamentals_data"], state["news_data"], 
         state["social_data"], state["risk_data"],
@@ -146,7 +190,6 @@ async def make_final_decision(state: AgentState):
     return {"final_decision": decision}
 
 def build_report_node(state: AgentState):
-    from backend.api.openai_server import build_report # Import helper to reuse logic or we can move it
     # Re-implementing build_report logic briefly here to avoid circular imports if possible, 
     # but reusing is better. For now let's duplicate the simple string formatting or import if we move it to utils.
     # We will assume we move build_report to a shared util or keep it here.
@@ -189,62 +232,14 @@ def build_report_node(state: AgentState):
     ]
     return {"final_report": "\n".join(sections)}
 
-# Define Graph
-workflow = StateGraph(AgentState)
-
-# Nodes
-workflow.add_node("market_analyst", analyze_market)
-workflow.add_node("fundamentals_analyst", analyze_fundamentals)
-workflow.add_node("news_analyst", analyze_news)
-workflow.add_node("social_analyst", analyze_social)
-workflow.add_node("risk_analyst", analyze_risk)
-workflow.add_node("crypto_analyst", analyze_crypto)
-
-workflow.add_node("researchers", conduct_research)
-workflow.add_node("debate_moderator", moderate_debate)
-workflow.add_node("risk_judge", judge_risk)
-workflow.add_node("portfolio_manager", make_final_decision)
-workflow.add_node("report_builder", build_report_node)
-
-# Edges
-def route_start(state):
+# Re-route start
+def route_start_v2(state):
     if state["is_crypto"]:
-        return "crypto_flow"
-    return "stock_flow"
-
-workflow.set_conditional_entry_point(
-    route_start,
-    {
-        "crypto_flow": "crypto_analyst",
-        "stock_flow": "market_analyst"
-    }
-)
+        return "crypto_analyst"
+    return "run_analysts_parallel"
 
-# Stock Flow - Parallel Analysis
-workflow.add_edge("market_analyst", "researchers")
-workflow.add_edge("fundamentals_analyst", "researchers")
-workflow.add_edge("news_analyst", "researchers")
-workflow.add_edge("social_analyst", "portfolio_manager") # Social goes direct to PM in original? No, let's check.
-# Original: market, fund, news -> researchers
-# Original: market, fund, news, risk -> bear
-# Original: social IS used in PM.
-
-# To simplify parallel execution in LangGraph without complex barriers:
-# We can have a "gather_data" node that calls them all, OR use LangGraph's parallel support.
-# LangGraph runs nodes in parallel if they share same start node.
-# Let's make a "start_stock" node that fans out.
-# Actually, set_conditional_entry_point can fan out if we mapped to multiple? No, it returns one.
-# We will use a dummy start node for stock.
-
-# Revised Edges for Parallelism:
-# We need a "router" or just manual edges from start.
-# LangGraph doesn't auto-parallelize unless we use a fan-out pattern.
-# Simple way: "router" -> [mkt, fund, news, social, risk]
-# Then all of them -> "aggregator" (or implementation-wise checking if all done? LangGraph handles this if we join)
-# Actually, LangGraph waits for all incoming edges? No.
-# We can make a single node "run_analysts" that runs asyncio.gather inside it, which is safer given the existing async code.
+# We make a single node "run_analysts" that runs asyncio.gather inside it, which is safer given the existing async code.
 # This keeps the graph simpler and avoids race conditions in state updates if not handled carefully.
-
 async def run_analysts_parallel(state: AgentState):
     results = await asyncio.gather(
         analyze_market(state),
@@ -259,77 +254,17 @@ async def run_analysts_parallel(state: AgentState):
         new_state.update(r)
     return new_state
 
-workflow.add_node("run_analysts_parallel", run_analysts_parallel)
-
-# Re-route start
-def route_start_v2(state):
-    if state["is_crypto"]:
-        return "crypto_analyst"
-    return "run_analysts_parallel"
-
-workflow.set_conditional_entry_point(
-    route_start_v2,
-    {
-        "crypto_analyst": "crypto_analyst",
-        "run_analysts_parallel": "run_analysts_parallel"
-    }
-)
-
-# Stock flow continuation
-workflow.add_edge("run_analysts_parallel", "researchers")
-workflow.add_edge("run_analysts_parallel", "risk_judge") # Risk debate needs data
-
-# Researchers -> Debate
-workflow.add_edge("researchers", "debate_moderator")
-
-# Debate & Risk Judge -> PM
-# We need to join them.
-# Create a join node? Or just chain them?
-# Researchers/Debate and RiskJudge are independent after Analysis.
-# Let's serialize them to ensure state is fully populated for PM.
-# Analysts -> Researchers -> Debate -> Risk Judge -> PM
-# (Original: Risk debate also runs in parallel with others? No, original had Phase 1 (Data), Phase 2 (Bull/Bear), Phase 3 (Mod), Phase 4 (Risk), Phase 5 (PM))
-# Original Phase 4 (Risk) comes AFTER Moderation?
-# Let's check original code.
-# Phase 1: Gather Data
-# Phase 2: Bull/Bear (needs data)
-# Phase 3: Debate Mod (needs Bull/Bear)
-# Phase 4: Risk Debate (needs Data, independent of Bull/Bear)
-# Phase 5: PM (needs Everything)
-
-# So we can run Debate Branch and Risk Branch in parallel?
-# Yes.
-# Analysts -> [Debate Branch, Risk Branch] -> PM
-# Debate Branch: Researchers -> Moderator
-# Risk Branch: RiskJudge (which runs 3 debators inside)
-
-# LangGraph join:
-# PM needs input from Moderator and RiskJudge.
-# If we add edges: Moderator -> PM, RiskJudge -> PM.
-# PM will run when BOTH are done? LangGraph behavior: It might run twice if not configured to wait.
-# We can use a "joiner" or make it sequential for safety and simplicity (as in original code it was sequential phases).
-# Original code: await Phase 2, await Phase 3, await Phase 4.
-# So it WAS sequential.
-# Let's keep it sequential to match original exactly and avoid complexity.
-# Data -> Researchers -> Moderator -> Risk Judge -> PM
-
-workflow.add_edge("debate_moderator", "risk_judge")
-workflow.add_edge("risk_judge", "portfolio_manager")
-workflow.add_edge("portfolio_manager", "report_builder")
-workflow.add_edge("report_builder", END)
-
 # Crypto Flow
 # Crypto Analyst -> News -> Social -> Report
 # Original Crypto: Crypto -> News -> Social -> Report
 async def run_crypto_rest(state: AgentState):
-    # original: crypto done, then news, then social
-    n = news_analyst.analyze(state["ticker"])
-    s = social_analyst.analyze(state["ticker"])
+    # original: crypto done, then news, then social (independent, so run together)
+    n, s = await asyncio.gather(
+        news_analyst.aanalyze(state["ticker"]),
+        social_analyst.aanalyze(state["ticker"])
+    )
     return {"news_data": n, "social_data": s}
 
-workflow.add_node("crypto_enrichment", run_crypto_rest)
-workflow.add_edge("crypto_analyst", "crypto_enrichment")
-
 def build_crypto_report_node(state: AgentState):
     from datetime import datetime
     ticker = state["ticker"]
@@ -352,8 +287,99 @@ def build_crypto_report_node(state: AgentState):
     ]
     return {"final_report": "\n".join(sections), "final_decision": {"decision": sentiment}}
 
-workflow.add_node("crypto_report", build_crypto_report_node)
-workflow.add_edge("crypto_enrichment", "crypto_report")
-workflow.add_edge("crypto_report", END)
+def build_graph():
+    """Wire and compile the analysis graph (imports LangGraph)"""
+    from langgraph.graph import StateGraph, END
+
+    # Define Graph
+    workflow = StateGraph(AgentState)
+
+    # Nodes
+    # (Stock analysts run inside the "run_analysts_parallel" node)
+    workflow.add_node("crypto_analyst", traced("node", "crypto_analyst")(analyze_crypto))
+
+    workflow.add_node("researchers", traced("node", "researchers")(conduct_research))
+    workflow.add_node("debate_moderator", traced("node", "debate_moderator")(moderate_debate))
+    workflow.add_node("risky_debator", traced("node", "risky_debator")(debate_risky))
+    workflow.add_node("conservative_debator", traced("node", "conservative_debator")(debate_conservative))
+    workflow.add_node("neutral_debator", traced("node", "neutral_debator")(debate_neutral))
+    workflow.add_node("risk_judge", traced("node", "risk_judge")(judge_risk))
+    workflow.add_node("portfolio_manager", traced("node", "portfolio_manager")(make_final_decision))
+    workflow.add_node("report_builder", traced("node", "report_builder")(build_report_node))
+    workflow.add_node("run_analysts_parallel", traced("node", "run_analysts_parallel")(run_analysts_parallel))
+
+    workflow.set_conditional_entry_point(
+        route_start_v2,
+        {
+            "crypto_analyst": "crypto_analyst",
+            "run_analysts_parallel": "run_analysts_parallel"
+        }
+    )
 
-app = workflow.compile()
+    # Stock flow continuation
+    workflow.add_edge("run_analysts_parallel", "researchers")
+    workflow.add_edge("run_analysts_parallel", "risky_debator") # Risk branch runs alongside the debate branch
+
+    # Risk Branch: Risky -> Conservative -> Neutral -> Risk Judge
+    workflow.add_edge("risky_debator", "conservative_debator")
+    workflow.add_edge("conservative_debator", "neutral_debator")
+    workflow.add_edge("neutral_debator", "risk_judge")
+
+    # Researchers -> Debate
+    workflow.add_edge("researchers", "debate_moderator")
+
+    # Debate & Risk Judge -> PM
+    # Phase 1: Gather Data
+    # Phase 2: Bull/Bear (needs data)
+    # Phase 3: Debate Mod (needs Bull/Bear)
+    # Phase 4: Risk Debate (needs Data, independent of Bull/Bear)
+    # Phase 5: PM (needs Everything)
+    # Debate Branch: Researchers -> Moderator
+    # Risk Branch: Risky -> Conservative -> Neutral -> RiskJudge (one node each, so every
+    # superstep pairs a debate-branch node with a risk-branch node)
+
+    # LangGraph join:
+    # PM needs input from Moderator and RiskJudge.
+    # A list of start keys makes PM a barrier: it runs once, after BOTH branches finish.
+    # Data -> [Researchers -> Moderator, Risk Judge] -> PM
+    workflow.add_edge(["debate_moderator", "risk_judge"], "portfolio_manager")
+    workflow.add_edge("portfolio_manager", "report_builder")
+    workflow.add_edge("report_builder", END)
+
+    # Crypto Flow
+    workflow.add_node("crypto_enrichment", traced("node", "crypto_enrichment")(run_crypto_rest))
+    workflow.add_edge("crypto_analyst", "crypto_enrichment")
+    workflow.add_node("crypto_report", traced("node", "crypto_report")(build_crypto_report_node))
+    workflow.add_edge("crypto_enrichment", "crypto_report")
+    workflow.add_edge("crypto_report", END)
+
+    return workflow.compile()
+
+_app = None
+_app_lock = threading.Lock()
+
+def get_app():
+    """Compiled analysis graph, built on first use"""
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = build_graph()
+    return _app
+
+def preload():
+    """Build the graph, every agent and the LLM client ahead of the first request"""
+    from src.agents.base_agent import preload_llm_client
+
+    get_app()
+    for value in list(globals().values()):
+        if isinstance(value, _LazyAgent):
+            value.get()
+    preload_llm_client()
+    import yfinance  # noqa: F401 - data_tools imports it on the first fetch
+
+def __getattr__(name: str):
+    # `from src.graph import app` keeps working; the graph is compiled on that first access
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,6 +2,14 @@
 Scoring package - Quantitative metrics scoring system
 """
 
-from .combined_scorer import get_combined_score, format_metrics_report
+from .combined_scorer import (
+    get_combined_score, format_metrics_report,
+    calculate_technical_scores, screen_technical_scores
+)
+from .indicators import TechnicalState
 
-__all__ = ['get_combined_score', 'format_metrics_report']
+__all__ = [
+    'get_combined_score', 'format_metrics_report',
+    'calculate_technical_scores', 'screen_technical_scores',
+    'TechnicalState'
+]
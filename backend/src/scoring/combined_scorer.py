@@ -3,11 +3,12 @@ Quantitative Metrics Scorer
 Calculates objective confidence scores from real market data
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from typing import Dict, Tuple
 
+from src.data.tools.data_tools import get_price_history, get_ticker_info, prefetch_price_history
+
 
 def calculate_rsi(prices: pd.Series, period: int = 14) -> float:
     """
@@ -105,61 +106,169 @@ def calculate_volume_trend(volume: pd.Series, period: int = 20) -> Tuple[float,
     return float(pct_change), signal
 
 
+# ============ Vectorized Multi-Ticker Engine ============
+
+def _right_align(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Shift each column's valid values to the bottom rows
+    so every ticker's latest bar sits on the last row.
+    Returns: (aligned matrix, valid count per column)
+    """
+    valid = ~np.isnan(matrix)
+    order = np.argsort(valid, axis=0, kind="stable")
+    return np.take_along_axis(matrix, order, axis=0), valid.sum(axis=0)
+
+
+def _ewm(matrix: np.ndarray, span: int) -> np.ndarray:
+    """Column-wise EMA, same recursion as pandas ewm(span, adjust=False)"""
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(matrix)
+    prev = np.full(matrix.shape[1], np.nan)
+    for i, row in enumerate(matrix):
+        prev = np.where(np.isnan(prev), row, (1 - alpha) * prev + alpha * row)
+        out[i] = prev
+    return out
+
+
+def _signal_labels(bullish: np.ndarray, bearish: np.ndarray,
+                   labels: Tuple[str, str, str] = ("BULLISH", "BEARISH", "NEUTRAL")) -> np.ndarray:
+    """Map boolean masks to signal strings"""
+    return np.where(bullish, labels[0], np.where(bearish, labels[1], labels[2]))
+
+
+def calculate_technical_scores(close: pd.DataFrame, volume: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculate RSI, MACD, SMA50 position, volume trend and the weighted
+    technical score for every ticker at once.
+    
+    Args:
+        close: Close prices, dates x tickers
+        volume: Volumes, dates x tickers (same columns as close)
+    
+    Returns:
+        DataFrame indexed by ticker with one column per indicator/score
+    """
+    tickers = list(close.columns)
+    prices, n_prices = _right_align(close[tickers].to_numpy(dtype=float))
+    vols, n_vols = _right_align(volume.reindex(columns=tickers).to_numpy(dtype=float))
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # RSI (14)
+        delta = np.diff(prices[-15:], axis=0)
+        gain = np.where(delta > 0, delta, 0.0).mean(axis=0)
+        loss = np.where(delta < 0, -delta, 0.0).mean(axis=0)
+        rsi = 100 - (100 / (1 + gain / loss))
+        rsi = np.where((n_prices >= 15) & ~np.isnan(rsi), rsi, 50.0)
+        
+        # MACD (12, 26, 9)
+        macd_line = _ewm(prices, 12) - _ewm(prices, 26)
+        macd_val = macd_line[-1]
+        signal_val = _ewm(macd_line, 9)[-1]
+        has_macd = n_prices >= 26
+        macd_val = np.where(has_macd, macd_val, 0.0)
+        signal_val = np.where(has_macd, signal_val, 0.0)
+        
+        # Price vs SMA50
+        sma = prices[-50:].mean(axis=0)
+        sma_pct = np.where(n_prices >= 50, (prices[-1] - sma) / sma * 100, 0.0)
+        
+        # Volume trend: last 5 days vs the 20-day average ending 20 bars ago
+        recent_avg = vols[-5:].mean(axis=0)
+        historical_avg = vols[-39:-19].mean(axis=0) if len(vols) >= 39 else np.full(len(tickers), np.nan)
+        vol_pct = (recent_avg - historical_avg) / historical_avg * 100
+        vol_pct = np.where((n_vols >= 20) & np.isfinite(vol_pct), vol_pct, 0.0)
+    
+    return pd.DataFrame(_technical_components(rsi, macd_val, signal_val, sma_pct, vol_pct,
+                                              has_data=n_prices > 0), index=tickers)
+
+
+def _technical_components(rsi, macd_val, signal_val, sma_pct, vol_pct, has_data=True) -> Dict:
+    """
+    Turn raw indicator values into signals and 0-100 scores
+    Works on scalars or arrays (one element per ticker).
+    """
+    rsi, macd_val, signal_val, sma_pct, vol_pct = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (rsi, macd_val, signal_val, sma_pct, vol_pct))
+    )
+    
+    rsi_score = np.clip(np.where(rsi < 30, 80 + (30 - rsi),
+                                 np.where(rsi > 70, 20 - (rsi - 70), 50.0)), 0, 100)
+    
+    spread = np.minimum(30, np.abs(macd_val - signal_val) * 10)
+    macd_score = np.clip(np.where(macd_val > signal_val, 70 + spread,
+                                  np.where(macd_val < signal_val, 30 - spread, 50.0)), 0, 100)
+    
+    sma_score = np.clip(50 + sma_pct * 2, 0, 100)
+    vol_score = np.clip(50 + vol_pct / 4, 0, 100)
+    
+    total_score = (rsi_score * 0.25 + macd_score * 0.25 +
+                   sma_score * 0.25 + vol_score * 0.25)
+    
+    return {
+        "score": total_score,
+        "rsi": rsi,
+        "rsi_score": rsi_score,
+        "macd_signal": _signal_labels(macd_val > signal_val, macd_val < signal_val),
+        "macd_score": macd_score,
+        "sma_pct": sma_pct,
+        "sma_signal": _signal_labels(sma_pct > 2, sma_pct < -2),
+        "sma_score": sma_score,
+        "vol_pct": vol_pct,
+        "vol_signal": _signal_labels(vol_pct > 20, vol_pct < -20, ("INCREASING", "DECREASING", "STABLE")),
+        "vol_score": vol_score,
+        "has_data": np.broadcast_to(has_data, rsi.shape),
+    }
+
+
+def _technical_details(row) -> Dict:
+    """Convert one row of calculate_technical_scores() to the per-ticker dict format"""
+    if not row["has_data"]:
+        return {"score": 50, "details": "No data available"}
+    return {
+        "score": round(float(row["score"]), 1),
+        "rsi": {"value": round(float(row["rsi"]), 1), "score": round(float(row["rsi_score"]), 1)},
+        "macd": {"signal": row["macd_signal"], "score": round(float(row["macd_score"]), 1)},
+        "sma50": {"pct": round(float(row["sma_pct"]), 2), "signal": row["sma_signal"], "score": round(float(row["sma_score"]), 1)},
+        "volume": {"pct": round(float(row["vol_pct"]), 1), "signal": row["vol_signal"], "score": round(float(row["vol_score"]), 1)}
+    }
+
+
+def screen_technical_scores(tickers, period: str = "3mo") -> pd.DataFrame:
+    """
+    Technical scores for a whole universe of tickers
+    
+    Price history comes from one bulk download (seeding the market data
+    cache), then all tickers are scored in a single vectorized pass.
+    Tickers with no data are left out.
+    
+    Returns:
+        DataFrame indexed by ticker, sorted by score (best first)
+    """
+    loaded = prefetch_price_history(tickers, period=period)
+    if not loaded:
+        return pd.DataFrame()
+    
+    history = {ticker: get_price_history(ticker, period=period) for ticker in loaded}
+    close = pd.DataFrame({ticker: hist["Close"] for ticker, hist in history.items()})
+    volume = pd.DataFrame({ticker: hist["Volume"] for ticker, hist in history.items()})
+    
+    scores = calculate_technical_scores(close, volume)
+    return scores.sort_values("score", ascending=False)
+
+
 def calculate_technical_score(ticker: str) -> Dict:
     """
     Calculate technical analysis score (0-100)
     """
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="3mo")
+        hist = get_price_history(ticker, period="3mo")
         
         if hist.empty:
             return {"score": 50, "details": "No data available"}
         
-        prices = hist['Close']
-        volume = hist['Volume']
-        
-        # RSI (25% weight)
-        rsi = calculate_rsi(prices)
-        if rsi < 30:
-            rsi_score = 80 + (30 - rsi)  # Oversold = Bullish
-        elif rsi > 70:
-            rsi_score = 20 - (rsi - 70)  # Overbought = Bearish
-        else:
-            rsi_score = 50  # Neutral
-        rsi_score = max(0, min(100, rsi_score))
-        
-        # MACD (25% weight)
-        macd_val, signal_val, macd_signal = calculate_macd(prices)
-        if macd_signal == "BULLISH":
-            macd_score = 70 + min(30, abs(macd_val - signal_val) * 10)
-        elif macd_signal == "BEARISH":
-            macd_score = 30 - min(30, abs(macd_val - signal_val) * 10)
-        else:
-            macd_score = 50
-        macd_score = max(0, min(100, macd_score))
-        
-        # SMA Position (25% weight)
-        sma_pct, sma_signal = calculate_sma_position(prices)
-        sma_score = 50 + (sma_pct * 2)  # +/- 2% = +/- 4 points
-        sma_score = max(0, min(100, sma_score))
-        
-        # Volume Trend (25% weight)
-        vol_pct, vol_signal = calculate_volume_trend(volume)
-        vol_score = 50 + (vol_pct / 4)  # Normalize
-        vol_score = max(0, min(100, vol_score))
-        
-        # Combined Technical Score
-        total_score = (rsi_score * 0.25 + macd_score * 0.25 + 
-                       sma_score * 0.25 + vol_score * 0.25)
-        
-        return {
-            "score": round(total_score, 1),
-            "rsi": {"value": round(rsi, 1), "score": round(rsi_score, 1)},
-            "macd": {"signal": macd_signal, "score": round(macd_score, 1)},
-            "sma50": {"pct": round(sma_pct, 2), "signal": sma_signal, "score": round(sma_score, 1)},
-            "volume": {"pct": round(vol_pct, 1), "signal": vol_signal, "score": round(vol_score, 1)}
-        }
+        scores = calculate_technical_scores(pd.DataFrame({ticker: hist['Close']}),
+                                            pd.DataFrame({ticker: hist['Volume']}))
+        return _technical_details(scores.loc[ticker])
     except Exception as e:
         print(f"[MetricsScorer] Technical error: {e}")
         return {"score": 50, "error": str(e)}
@@ -170,8 +279,7 @@ def calculate_fundamental_score(ticker: str) -> Dict:
     Calculate fundamental analysis score (0-100)
     """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_ticker_info(ticker)
         
         scores = []
         details = {}
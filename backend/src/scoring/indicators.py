@@ -0,0 +1,223 @@
+"""
+Incremental Indicators - Stateful RSI / MACD / SMA / volume trend
+Seed once from history, then update one bar at a time in O(1).
+Values match the batch functions in combined_scorer.
+"""
+
+import math
+from collections import deque
+from typing import Dict, Optional
+
+import pandas as pd
+
+from src.scoring.combined_scorer import _technical_components, _technical_details
+
+
+class RollingMean:
+    """Mean of the last `window` values, kept as a running sum"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._sum = 0.0
+        self._pushes = 0
+
+    def update(self, value: float) -> Optional[float]:
+        """Add a value; returns the mean once the window is full, else None"""
+        if len(self._values) == self.window:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+
+        # Re-sum once per window so add/subtract rounding never accumulates
+        self._pushes += 1
+        if self._pushes % self.window == 0:
+            self._sum = math.fsum(self._values)
+
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self._values) < self.window:
+            return None
+        return self._sum / self.window
+
+
+class EMA:
+    """Exponential moving average, same recursion as pandas ewm(span, adjust=False)"""
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1)
+        self.value: Optional[float] = None
+
+    def update(self, value: float) -> float:
+        if self.value is None:
+            self.value = value
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * value
+        return self.value
+
+
+class RSIState:
+    """
+    RSI over simple rolling means of gains and losses
+    (the same definition as calculate_rsi, not Wilder smoothing)
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._gain = RollingMean(period)
+        self._loss = RollingMean(period)
+        self._last_price: Optional[float] = None
+
+    def update(self, price: float) -> float:
+        if self._last_price is not None:
+            delta = price - self._last_price
+            self._gain.update(delta if delta > 0 else 0.0)
+            self._loss.update(-delta if delta < 0 else 0.0)
+        self._last_price = price
+        return self.value
+
+    @property
+    def value(self) -> float:
+        gain, loss = self._gain.value, self._loss.value
+        if gain is None:
+            return 50.0  # Neutral
+        if loss == 0:
+            return 100.0 if gain > 0 else 50.0
+        return 100 - (100 / (1 + gain / loss))
+
+
+class MACDState:
+    """MACD (12, 26) with its 9-period signal line"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.slow = slow
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self._count = 0
+
+    def update(self, price: float):
+        macd = self._fast.update(price) - self._slow.update(price)
+        self._signal.update(macd)
+        self._count += 1
+        return self.value
+
+    @property
+    def value(self):
+        """(MACD line, Signal line) - zeros until `slow` bars are seen"""
+        if self._count < self.slow:
+            return 0.0, 0.0
+        return self._fast.value - self._slow.value, self._signal.value
+
+
+class SMAPositionState:
+    """Percentage of the last price above/below its SMA"""
+
+    def __init__(self, period: int = 50):
+        self._sma = RollingMean(period)
+        self._last_price: Optional[float] = None
+
+    def update(self, price: float) -> float:
+        self._sma.update(price)
+        self._last_price = price
+        return self.value
+
+    @property
+    def value(self) -> float:
+        sma = self._sma.value
+        if sma is None or sma == 0:
+            return 0.0
+        return (self._last_price - sma) / sma * 100
+
+
+class VolumeTrendState:
+    """Last-5-day average volume vs the `period`-day average ending `period` bars ago"""
+
+    def __init__(self, period: int = 20):
+        self._avg = RollingMean(period)
+        self._recent = RollingMean(5)
+        self._past_avgs = deque(maxlen=period)
+        self._count = 0
+        self.period = period
+
+    def update(self, volume: float) -> float:
+        self._count += 1
+        self._recent.update(volume)
+        avg = self._avg.update(volume)
+        if avg is not None:
+            self._past_avgs.append(avg)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self._count < self.period or len(self._past_avgs) < self.period:
+            return 0.0
+        historical_avg = self._past_avgs[0]
+        recent_avg = self._recent.value
+        if not historical_avg or recent_avg is None:
+            return 0.0
+        return (recent_avg - historical_avg) / historical_avg * 100
+
+
+class TechnicalState:
+    """
+    All four technical indicators for one ticker
+
+    Usage:
+        state = TechnicalState.from_history(hist)
+        state.update(close, volume)   # on each new bar
+        state.score()                 # same dict as calculate_technical_score
+    """
+
+    def __init__(self):
+        self.rsi = RSIState()
+        self.macd = MACDState()
+        self.sma = SMAPositionState()
+        self.volume = VolumeTrendState()
+        self.bars = 0
+
+    @classmethod
+    def from_history(cls, hist: pd.DataFrame) -> "TechnicalState":
+        """Seed from an OHLCV DataFrame (needs Close and Volume columns)"""
+        state = cls()
+        if hist is None or hist.empty:
+            return state
+        for close, volume in zip(hist["Close"].to_numpy(dtype=float),
+                                 hist["Volume"].to_numpy(dtype=float)):
+            state.update(close, volume)
+        return state
+
+    def update(self, close: float, volume: float):
+        """Append one bar"""
+        close = float(close)
+        volume = float(volume)
+        if math.isnan(close):
+            return
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.sma.update(close)
+        if not math.isnan(volume):
+            self.volume.update(volume)
+        self.bars += 1
+
+    def indicators(self) -> Dict:
+        """Current raw indicator values"""
+        macd_val, signal_val = self.macd.value
+        return {
+            "rsi": self.rsi.value,
+            "macd": macd_val,
+            "macd_signal_line": signal_val,
+            "sma_pct": self.sma.value,
+            "volume_pct": self.volume.value,
+        }
+
+    def score(self) -> Dict:
+        """Technical score (0-100) with per-indicator breakdown"""
+        values = self.indicators()
+        components = _technical_components(
+            values["rsi"], values["macd"], values["macd_signal_line"],
+            values["sma_pct"], values["volume_pct"], has_data=self.bars > 0
+        )
+        return _technical_details({key: value.item() for key, value in components.items()})
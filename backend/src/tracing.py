@@ -0,0 +1,253 @@
+"""
+Tracing - Structured timing spans for the analysis pipeline
+Graph nodes, agents, LLM calls and data/provider fetches record spans
+(wall time, queue time, sizes, cache hits). Finished spans are aggregated
+for the /metrics endpoint and optionally appended to a JSON-lines file.
+"""
+
+import functools
+import inspect
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from src.config import TRACE_ENABLED, TRACE_FILE, TRACE_WINDOW
+
+_current_span: ContextVar = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed operation; use as a (sync or async) context manager
+
+    Spans opened inside another span (same task, or a thread/task started
+    from it) share its trace_id and record it as their parent.
+    """
+
+    __slots__ = ("name", "kind", "attrs", "trace_id", "span_id", "parent_id",
+                 "start", "duration_ms", "queue_ms", "error", "_t0", "_token")
+
+    def __init__(self, name: str, kind: str, **attrs):
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.trace_id = None
+        self.span_id = None
+        self.parent_id = None
+        self.start = None
+        self.duration_ms = None
+        self.queue_ms = 0.0
+        self.error = None
+        self._t0 = None
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        if not TRACE_ENABLED:
+            return self
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = uuid.uuid4().hex[:8]
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._token is None:
+            return False
+        self.duration_ms = (time.perf_counter() - self._t0) * 1000
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self._token = None
+        get_tracer().finish(self)
+        return False
+
+    async def __aenter__(self) -> "Span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    def set(self, **attrs):
+        """Attach attributes (sizes, cache status, ...)"""
+        self.attrs.update(attrs)
+
+    def add_queue_time(self, seconds: float):
+        """Record time spent waiting for a slot (semaphore, rate limit) rather than working"""
+        self.queue_ms += seconds * 1000
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 2),
+            "queue_ms": round(self.queue_ms, 2),
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+def span(name: str, kind: str, **attrs) -> Span:
+    """Open a span: `with span("get_news", "data", ticker=t):` (or `async with`)"""
+    return Span(name, kind, **attrs)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span in this context, if any"""
+    return _current_span.get()
+
+
+def annotate(**attrs):
+    """Attach attributes to the current span (no-op outside a span)"""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def traced(kind: str, name: Optional[str] = None):
+    """Decorator recording a span around every call of a sync or async function"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                async with Span(span_name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _SpanStats:
+    """Aggregates for one (kind, name)"""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.queue_ms = 0.0
+        self.max_ms = 0.0
+        self.cache = defaultdict(int)
+        self.recent = deque(maxlen=window)
+
+    def add(self, finished: Span):
+        self.count += 1
+        self.total_ms += finished.duration_ms
+        self.queue_ms += finished.queue_ms
+        self.max_ms = max(self.max_ms, finished.duration_ms)
+        self.recent.append(finished.duration_ms)
+        if finished.error:
+            self.errors += 1
+        cache = finished.attrs.get("cache")
+        if cache:
+            self.cache[cache] += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 1),
+            "p95_ms": round(self.percentile(0.95), 1),
+            "max_ms": round(self.max_ms, 1),
+            "queue_ms": round(self.queue_ms, 1),
+            "cache": dict(self.cache),
+        }
+
+
+class Tracer:
+    """Collects finished spans: in-memory aggregates + optional JSONL file"""
+
+    def __init__(self, path: str = TRACE_FILE, window: int = TRACE_WINDOW):
+        self.path = path
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats: Dict[tuple, _SpanStats] = {}
+        self._file = None
+
+    def finish(self, finished: Span):
+        key = (finished.kind, finished.name)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _SpanStats(self.window)
+            stats.add(finished)
+            if self.path:
+                self._write(finished)
+
+    def _write(self, finished: Span):
+        try:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(json.dumps(finished.to_dict(), ensure_ascii=False, default=str) + "\n")
+        except Exception as e:
+            print(f"[Tracer] Error writing {self.path}: {e}")
+            self.path = ""
+
+    def metrics(self) -> Dict:
+        """Aggregates grouped by span kind, slowest total first"""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+            result = defaultdict(dict)
+            for (kind, name), stats in items:
+                result[kind][name] = stats.to_dict()
+            return dict(result)
+
+    def prometheus(self) -> str:
+        """Aggregates in Prometheus text exposition format"""
+        lines = [
+            "# TYPE analysis_span_duration_ms summary",
+            "# TYPE analysis_span_errors_total counter",
+            "# TYPE analysis_span_queue_ms_total counter",
+            "# TYPE analysis_span_cache_total counter",
+        ]
+        with self._lock:
+            for (kind, name), stats in sorted(self._stats.items()):
+                labels = f'kind="{kind}",name="{name}"'
+                for q in (0.5, 0.95):
+                    lines.append(f'analysis_span_duration_ms{{{labels},quantile="{q}"}} {stats.percentile(q):.1f}')
+                lines.append(f"analysis_span_duration_ms_sum{{{labels}}} {stats.total_ms:.1f}")
+                lines.append(f"analysis_span_duration_ms_count{{{labels}}} {stats.count}")
+                lines.append(f"analysis_span_errors_total{{{labels}}} {stats.errors}")
+                lines.append(f"analysis_span_queue_ms_total{{{labels}}} {stats.queue_ms:.1f}")
+                for status, count in sorted(stats.cache.items()):
+                    lines.append(f'analysis_span_cache_total{{{labels},status="{status}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+# Singleton instance
+_tracer = None
+
+def get_tracer() -> Tracer:
+    """Get or create the process-wide tracer"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
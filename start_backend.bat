@@ -7,4 +7,4 @@ call venv\Scripts\activate 2>nul || (
     call venv\Scripts\activate
     pip install -r requirements.txt
 )
-python api/openai_server.py
+python -m api